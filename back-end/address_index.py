@@ -0,0 +1,226 @@
+import logging
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from address_normalization import normalize_address
+from config import ADDRESS_INDEX_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip while building the index
+FETCH_SIZE = 50000
+
+# The street number at the start of a normalized address; addresses are also
+# keyed without it so "yaldhurst road" finds "292 yaldhurst road"
+HOUSE_NUMBER_PATTERN = "^[0-9][^ ]* "
+
+
+class IndexTooLarge(Exception):
+    pass
+
+
+class _PackedIndex:
+    """
+    Immutable, compact prefix index.
+
+    Keys are the normalized addresses (and the same addresses without their
+    street number, so "yaldhurst road" finds "292 yaldhurst road"), sorted
+    bytewise and packed into one bytes blob with an offsets array. Each key
+    points at a row holding the display address and address_id, also packed.
+    """
+
+    def __init__(self, keys, key_offsets, key_rows, addresses, address_offsets, address_ids):
+        self.keys = keys
+        self.key_offsets = key_offsets
+        self.key_rows = key_rows
+        self.addresses = addresses
+        self.address_offsets = address_offsets
+        self.address_ids = address_ids
+
+    def __len__(self):
+        return len(self.key_rows)
+
+    def nbytes(self) -> int:
+        arrays = (self.key_offsets, self.key_rows, self.address_offsets, self.address_ids)
+        return len(self.keys) + len(self.addresses) + sum(a.itemsize * len(a) for a in arrays)
+
+    def _key(self, i: int) -> bytes:
+        return self.keys[self.key_offsets[i]:self.key_offsets[i + 1]]
+
+    def _address(self, row: int) -> str:
+        return self.addresses[self.address_offsets[row]:self.address_offsets[row + 1]].decode("utf-8")
+
+    def search(self, prefix: bytes, limit: int) -> List[Dict]:
+        # Binary search for the first key >= prefix
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        suggestions = []
+        seen = set()
+        for i in range(lo, len(self)):
+            if not self._key(i).startswith(prefix):
+                break
+            row = self.key_rows[i]
+            if row in seen:
+                continue
+            seen.add(row)
+            suggestions.append({
+                "address_id": self.address_ids[row],
+                "full_address": self._address(row),
+            })
+            if len(suggestions) >= limit:
+                break
+        return suggestions
+
+
+class AddressPrefixIndex:
+    """
+    In-process autocomplete over nz_addresses.
+
+    The index is built in a background thread when the API starts and
+    rebuilt when the importers bump the nz_addresses data version, serving
+    the previous index meanwhile. Until the first build finishes, or if the
+    index would not fit in max_bytes, there are no suggestions: a database
+    lookup per keystroke would scan nz_addresses for short prefixes.
+    """
+
+    def __init__(self, session_factory, versions, max_bytes: int = ADDRESS_INDEX_MAX_BYTES):
+        self.session_factory = session_factory
+        self.versions = versions
+        self.max_bytes = max_bytes
+        self._index: Optional[_PackedIndex] = None
+        self._index_version = None
+        self._building = False
+        self._skipped_version = None
+        self._lock = threading.Lock()
+
+    def build_in_background(self) -> None:
+        """Start building the index, unless it is current or already being built."""
+        self._ensure_current()
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict]:
+        """Top `limit` addresses starting with query, in address order."""
+        # The last token may still be being typed ("ave" -> "avenal") or be a
+        # finished abbreviation ("ave" -> "avenue"), so try both readings.
+        prefixes = [normalize_address(query, expand_last_token=False)]
+        expanded = normalize_address(query)
+        if expanded != prefixes[0]:
+            prefixes.append(expanded)
+        if not prefixes[0]:
+            return []
+
+        self._ensure_current()
+        index = self._index
+        if index is None:
+            return []
+        suggestions = []
+        seen = set()
+        for prefix in prefixes:
+            for match in index.search(prefix.encode("utf-8"), limit):
+                if match["address_id"] not in seen:
+                    seen.add(match["address_id"])
+                    suggestions.append(match)
+        return suggestions[:limit]
+
+    def _ensure_current(self) -> None:
+        version = self.versions.get("nz_addresses")
+        with self._lock:
+            if (
+                self._building
+                or version == self._index_version
+                or version == self._skipped_version
+            ):
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild, args=(version,), daemon=True).start()
+
+    def _rebuild(self, version) -> None:
+        try:
+            index = self._build()
+            logger.info(f"Address index built: {len(index)} keys, {index.nbytes() / 1e6:.1f} MB")
+            with self._lock:
+                self._index = index
+                self._index_version = version
+        except IndexTooLarge:
+            logger.warning(
+                f"Address index exceeds {self.max_bytes} bytes; autocomplete is disabled"
+            )
+            with self._lock:
+                self._index = None
+                self._skipped_version = version
+        except Exception as e:
+            # Don't retry on every keystroke; wait for the next data version
+            logger.error(f"Error building address index: {str(e)}")
+            with self._lock:
+                self._skipped_version = version
+        finally:
+            with self._lock:
+                self._building = False
+
+    def _build(self) -> _PackedIndex:
+        addresses = bytearray()
+        address_offsets = array("Q", [0])
+        address_ids = array("q")
+        keys = bytearray()
+        key_offsets = array("Q", [0])
+        key_rows = array("I")
+
+        def check_budget():
+            size = (
+                len(addresses) + len(keys)
+                + 8 * (len(address_offsets) + len(address_ids) + len(key_offsets))
+                + 4 * len(key_rows)
+            )
+            if size > self.max_bytes:
+                raise IndexTooLarge()
+
+        with self.session_factory() as db:
+            # Both passes read the same snapshot
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            # Reading every address takes longer than the API statement timeout
+            db.execute(text("SET LOCAL statement_timeout = 0"))
+
+            rows = db.execute(text("""
+                SELECT address_id, full_address
+                FROM nz_addresses
+                ORDER BY address_id
+            """).execution_options(stream_results=True, yield_per=FETCH_SIZE))
+            for address_id, full_address in rows:
+                addresses += (full_address or "").encode("utf-8")
+                address_offsets.append(len(addresses))
+                address_ids.append(address_id)
+                if len(address_ids) % FETCH_SIZE == 0:
+                    check_budget()
+
+            entries = db.execute(text(f"""
+                WITH numbered AS (
+                    SELECT row_number() OVER (ORDER BY address_id) - 1 AS row_no,
+                        normalize_address(full_address) AS address_key
+                    FROM nz_addresses
+                )
+                SELECT address_key, row_no FROM (
+                    SELECT address_key, row_no FROM numbered
+                    UNION ALL
+                    SELECT regexp_replace(address_key, '{HOUSE_NUMBER_PATTERN}', ''), row_no
+                    FROM numbered
+                    WHERE address_key ~ '^[0-9]'
+                ) entries
+                ORDER BY address_key COLLATE "C", row_no
+            """).execution_options(stream_results=True, yield_per=FETCH_SIZE))
+            for key, row_no in entries:
+                keys += (key or "").encode("utf-8")
+                key_offsets.append(len(keys))
+                key_rows.append(row_no)
+                if len(key_rows) % FETCH_SIZE == 0:
+                    check_budget()
+
+        check_budget()
+        return _PackedIndex(keys, key_offsets, key_rows, addresses, address_offsets, address_ids)
@@ -0,0 +1,92 @@
+"""
+Address normalization shared by the API and the importers.
+
+This module is the single definition of how addresses are normalized: the
+Python normalize_address() used by the API and the normalize_address() SQL
+function that data_process/address_search.py creates from
+normalize_address_function_sql(). Both lower-case, fold macrons, turn runs
+of anything but letters, digits and "/" into one space, and expand road
+type abbreviations that make up a whole token, so "1/23 Main Rd." and
+"1/23 main road" normalize alike.
+"""
+import re
+
+# Road type abbreviations expanded by normalize_address so that "Rd" and
+# "Road" match. Applied to both the indexed addresses and the search term.
+ROAD_TYPE_ABBREVIATIONS = {
+    "ave": "avenue",
+    "av": "avenue",
+    "blvd": "boulevard",
+    "cl": "close",
+    "cres": "crescent",
+    "ct": "court",
+    "dr": "drive",
+    "esp": "esplanade",
+    "gdns": "gardens",
+    "gr": "grove",
+    "hwy": "highway",
+    "ln": "lane",
+    "mt": "mount",
+    "pde": "parade",
+    "pl": "place",
+    "rd": "road",
+    "sq": "square",
+    "st": "street",
+    "tce": "terrace",
+}
+
+MACRONS = "āēīōū"
+MACRONS_FOLDED = "aeiou"
+
+# Token separators. "/" is kept so unit numbers such as "1/23" stay one token.
+SEPARATOR_PATTERN = "[^a-z0-9/]+"
+
+_MACRON_TABLE = str.maketrans(MACRONS, MACRONS_FOLDED)
+_SEPARATOR = re.compile(SEPARATOR_PATTERN)
+
+
+def abbreviation_pattern(abbreviation: str) -> str:
+    """
+    Regex matching abbreviation as a whole token of a normalized address.
+
+    Tokens are separated by single spaces once separators are collapsed, so
+    this is what splitting on spaces gives in Python. The pattern has the
+    same meaning in Python re and PostgreSQL regular expressions.
+    """
+    return f"(^| ){abbreviation}(?= |$)"
+
+
+def normalize_address(value: str, expand_last_token: bool = True) -> str:
+    """
+    Python equivalent of the normalize_address() SQL function.
+
+    Args:
+        value: Address or search text
+        expand_last_token: Whether to expand an abbreviation in the final
+            token. Autocomplete passes False while the user is still typing
+            that token, so "ave" can still grow into "avenal".
+
+    Returns:
+        str: Lower-case, punctuation free address with road types expanded
+    """
+    tokens = _SEPARATOR.sub(" ", value.lower().translate(_MACRON_TABLE)).strip(" ").split(" ")
+    last = len(tokens) - 1
+    return " ".join(
+        token if (i == last and not expand_last_token) else ROAD_TYPE_ABBREVIATIONS.get(token, token)
+        for i, token in enumerate(tokens)
+    )
+
+
+def normalize_address_function_sql() -> str:
+    """Build the CREATE FUNCTION statement for normalize_address(text)."""
+    # Lower-case, fold macrons, turn separators into single spaces
+    expression = f"translate(lower(value), '{MACRONS}', '{MACRONS_FOLDED}')"
+    expression = f"btrim(regexp_replace({expression}, '{SEPARATOR_PATTERN}', ' ', 'g'), ' ')"
+    for abbreviation, full in ROAD_TYPE_ABBREVIATIONS.items():
+        expression = f"regexp_replace({expression}, '{abbreviation_pattern(abbreviation)}', '\\1{full}', 'g')"
+
+    return f"""
+        CREATE OR REPLACE FUNCTION normalize_address(value TEXT) RETURNS TEXT
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+        AS $$ SELECT {expression} $$
+    """
@@ -0,0 +1,187 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import ANALYTICS_SNAPSHOT_DIR
+
+logger = logging.getLogger(__name__)
+
+# Must match data_process/analytics_snapshot.py
+MANIFEST_FILE = "manifest.json"
+
+QUANTILES = {"p10": 0.1, "p25": 0.25, "median": 0.5, "p75": 0.75, "p90": 0.9}
+
+
+class SnapshotUnavailable(Exception):
+    pass
+
+
+class _Snapshot:
+    """Memory-mapped columns of one snapshot version."""
+
+    def __init__(self, directory: str, manifest: Dict):
+        path = os.path.join(directory, manifest["directory"])
+        self.numeric_columns = manifest["numeric_columns"]
+        self.category_columns = manifest["category_columns"]
+        self.columns = {
+            column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r")
+            for column in self.numeric_columns + self.category_columns
+        }
+        self.dictionaries = manifest["dictionaries"]
+        self.codes = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in self.dictionaries.items()
+        }
+        self.rows = manifest["rows"]
+
+    def mask(self, filters: Dict[str, Optional[str]]) -> np.ndarray:
+        """Rows whose category columns equal every given filter value."""
+        mask = np.ones(self.rows, dtype=bool)
+        for column, value in filters.items():
+            if value is None:
+                continue
+            code = self.codes[column].get(value)
+            if code is None:
+                return np.zeros(self.rows, dtype=bool)
+            mask &= self.columns[column] == code
+        return mask
+
+    def decode(self, column: str, code: int) -> Optional[str]:
+        return None if code < 0 else self.dictionaries[column][code]
+
+
+def _grouped_quantiles(groups: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Count, mean and QUANTILES of values per group, without a Python loop.
+
+    Values are sorted within their group, so each quantile is a linear
+    interpolation between two positions of the group's slice.
+    """
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    codes, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+
+    result = {"code": codes, "count": counts}
+    if not len(codes):
+        result["mean"] = np.array([])
+        result.update({name: np.array([]) for name in QUANTILES})
+        return result
+    result["mean"] = np.add.reduceat(values, starts) / counts
+    for name, fraction in QUANTILES.items():
+        position = starts + fraction * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        result[name] = values[lower] + (values[upper] - values[lower]) * (position - lower)
+    return result
+
+
+class AnalyticsStore:
+    """
+    Vectorized aggregates over the columnar snapshot exported by the importers.
+
+    The snapshot's .npy columns are memory-mapped, so they are shared with
+    the page cache rather than copied into each worker, and heavy analytic
+    reads never reach Postgres. It is remapped when the importers bump the
+    analytics_snapshot data version.
+    """
+
+    def __init__(self, versions, directory: str = ANALYTICS_SNAPSHOT_DIR):
+        self.versions = versions
+        self.directory = directory
+        self._snapshot: Optional[_Snapshot] = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def summary(self, field: str, group_by: str, filters: Dict[str, Optional[str]]) -> List[Dict]:
+        """
+        Count, mean and quantiles of a numeric field per value of group_by.
+
+        Args:
+            field: Numeric column to summarize, e.g. capital_value
+            group_by: Category column to group by, e.g. suburb_locality
+            filters: Category column values the properties must match
+
+        Returns:
+            List[Dict]: One entry per group, largest group first
+        """
+        snapshot = self._current()
+        self._check_columns(snapshot, field, group_by, filters)
+
+        values = snapshot.columns[field]
+        mask = snapshot.mask(filters) & ~np.isnan(values)
+        stats = _grouped_quantiles(np.asarray(snapshot.columns[group_by][mask]), np.asarray(values[mask]))
+
+        groups = []
+        for i in np.argsort(-stats["count"], kind="stable"):
+            group = {group_by: snapshot.decode(group_by, int(stats["code"][i])), "count": int(stats["count"][i])}
+            group["mean"] = float(stats["mean"][i])
+            group.update({name: float(stats[name][i]) for name in QUANTILES})
+            groups.append(group)
+        return groups
+
+    def distribution(self, field: str, bins: int, filters: Dict[str, Optional[str]],
+                     min_value: Optional[float] = None, max_value: Optional[float] = None) -> Dict:
+        """
+        Histogram of a numeric field over the matching properties.
+
+        Without explicit bounds the range runs from the 1st to the 99th
+        percentile, so a few extreme values don't squash every other bin.
+        """
+        snapshot = self._current()
+        self._check_columns(snapshot, field, None, filters)
+
+        values = snapshot.columns[field]
+        values = np.asarray(values[snapshot.mask(filters) & ~np.isnan(values)])
+        if not len(values):
+            return {"count": 0, "bin_edges": [], "counts": []}
+        if min_value is None or max_value is None:
+            low, high = np.percentile(values, [1, 99])
+            min_value = low if min_value is None else min_value
+            max_value = high if max_value is None else max_value
+        if max_value <= min_value:
+            max_value = min_value + 1
+
+        counts, edges = np.histogram(values, bins=bins, range=(min_value, max_value))
+        return {
+            "count": len(values),
+            "below_range": int((values < min_value).sum()),
+            "above_range": int((values > max_value).sum()),
+            "bin_edges": edges.tolist(),
+            "counts": counts.tolist(),
+        }
+
+    @staticmethod
+    def _check_columns(snapshot: _Snapshot, field: str, group_by: Optional[str],
+                       filters: Dict[str, Optional[str]]) -> None:
+        if field not in snapshot.numeric_columns:
+            raise ValueError(f"Unknown numeric field: {field}")
+        for column in ([group_by] if group_by else []) + list(filters):
+            if column not in snapshot.category_columns:
+                raise ValueError(f"Unknown category column: {column}")
+
+    def _current(self) -> _Snapshot:
+        version = self.versions.get("analytics_snapshot")
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._snapshot = self._load()
+                    self._version = version
+        if self._snapshot is None:
+            raise SnapshotUnavailable()
+        return self._snapshot
+
+    def _load(self) -> Optional[_Snapshot]:
+        try:
+            with open(os.path.join(self.directory, MANIFEST_FILE), encoding="utf-8") as f:
+                manifest = json.load(f)
+            snapshot = _Snapshot(self.directory, manifest)
+            logger.info(f"Mapped analytics snapshot {manifest['directory']}: {snapshot.rows} properties")
+            return snapshot
+        except Exception as e:
+            # Not exported yet; retry at the next data version
+            logger.warning(f"Could not load analytics snapshot: {str(e)}")
+            return None
@@ -0,0 +1,87 @@
+"""
+Latency of the /properties/search query, by kind of search term.
+
+Samples addresses from property_search and times the first page of the
+search query for the full address, the road and suburb, the road alone and
+the first few characters as typed, reporting p50/p95/p99 per kind. The
+query runs directly against the database, without HTTP or the result cache.
+
+Run from the back-end directory against a loaded database:
+    python -m benchmarks.bench_search --terms 200 --repeat 3
+"""
+import argparse
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from benchmarks.latency import format_summary, summarize
+from database import engine
+from main import SEARCH_ORDER_SQL, SEARCH_TIER_SQL, search_term_params
+from search_cursor import CONTAINS_TIER, PREFIX_TIER
+
+TIER_SQL = {tier: SEARCH_TIER_SQL[tier] + SEARCH_ORDER_SQL for tier in (PREFIX_TIER, CONTAINS_TIER)}
+
+
+def first_page(connection, term: str, limit: int) -> int:
+    """Fetch the first page as the endpoint does, returning the row count."""
+    params = search_term_params(term)
+    # One extra row, as the endpoint fetches to detect a next page
+    params["limit"] = limit + 1
+    rows = len(connection.execute(text(TIER_SQL[PREFIX_TIER]), params).fetchall())
+    if rows <= limit:
+        params["limit"] = limit + 1 - rows
+        rows += len(connection.execute(text(TIER_SQL[CONTAINS_TIER]), params).fetchall())
+    return rows
+
+
+def sample_terms(count: int) -> Dict[str, List[str]]:
+    """Search terms of each kind, built from randomly sampled addresses."""
+    with engine.connect() as connection:
+        rows = connection.execute(text("""
+            SELECT full_address, full_road_name, suburb_locality
+            FROM property_search
+            ORDER BY random()
+            LIMIT :count
+        """), {"count": count}).all()
+    if not rows:
+        raise SystemExit("property_search is empty; load some data first (see benchmarks.bench_import)")
+    return {
+        "full address": [row.full_address for row in rows],
+        "road and suburb": [f"{row.full_road_name} {row.suburb_locality}" for row in rows if row.full_road_name],
+        "road": [row.full_road_name for row in rows if row.full_road_name],
+        "typed prefix": [row.full_address[:6] for row in rows],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--terms", type=int, default=200, help="Addresses to sample (default: 200)")
+    parser.add_argument("--repeat", type=int, default=3, help="Times each term is searched (default: 3)")
+    parser.add_argument("--limit", type=int, default=20, help="Page size (default: 20)")
+    parser.add_argument("--explain", action="store_true", help="Print the plan for one term of each kind")
+    args = parser.parse_args()
+
+    terms = sample_terms(args.terms)
+    print(f"Search query, {args.terms} sampled addresses, {args.repeat} run(s) per term, limit {args.limit}")
+    with engine.connect() as connection:
+        for kind, kind_terms in terms.items():
+            if args.explain:
+                for tier, sql in TIER_SQL.items():
+                    plan = connection.execute(
+                        text("EXPLAIN (ANALYZE, BUFFERS) " + sql),
+                        {**search_term_params(kind_terms[0]), "limit": args.limit + 1}
+                    ).scalars().all()
+                    print(f"\n{kind}, tier {tier}: {kind_terms[0]!r}\n" + "\n".join(plan))
+
+            timings = []
+            for _ in range(args.repeat):
+                for term in kind_terms:
+                    start = time.perf_counter()
+                    first_page(connection, term, args.limit)
+                    timings.append(time.perf_counter() - start)
+            print(format_summary(kind, summarize(timings)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Per-row cost of turning property_search rows into a JSON response body.
+
+Compares the original handler path (dict per row, 18 key lookups, then
+FastAPI's jsonable_encoder and json.dumps), validating through the
+PropertyResponse model, and the positional row mapping plus orjson used by
+/properties/search.
+
+Run from the back-end directory:
+    python -m benchmarks.bench_serialization --rows 10000
+"""
+import argparse
+import json
+import random
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+import schemas
+from serialization import PROPERTY_COLUMNS, dumps, row_to_property_data
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+SUBURBS = ["Hornby", "Riccarton", "Sockburn", "Islington", "Yaldhurst", "Avonhead"]
+ROADS = ["Yaldhurst Road", "Main South Road", "Racecourse Road", "Buchanans Road"]
+
+
+def synthetic_rows(count: int) -> List[tuple]:
+    """Rows shaped like the search query results, without a database."""
+    rng = random.Random(42)
+    rows = []
+    for i in range(count):
+        number = rng.randint(1, 500)
+        road = rng.choice(ROADS)
+        suburb = rng.choice(SUBURBS)
+        land_value = rng.randint(200, 900) * 1000
+        improvements_value = rng.randint(100, 900) * 1000
+        rows.append((
+            f"{rng.getrandbits(128):032x}",
+            rng.randint(20000, 29999),
+            land_value + improvements_value,
+            improvements_value,
+            land_value,
+            rng.randint(1, 6),
+            "DWG OI",
+            rng.randint(60, 400),
+            "RD",
+            "Residential",
+            f"LOT {rng.randint(1, 99)} DP {rng.randint(10000, 99999)}",
+            1000000 + i,
+            f"{number} {road}, {suburb}, Christchurch",
+            "Christchurch",
+            suburb,
+            "Christchurch City",
+            road,
+            number,
+        ))
+    return rows
+
+
+def original_row_to_property_data(row_dict):
+    return {
+        "valuation": {
+            "unit_of_property_id": row_dict["unit_of_property_id"],
+            "valuation_no_roll": row_dict["valuation_no_roll"],
+            "capital_value": row_dict["capital_value"],
+            "improvements_value": row_dict["improvements_value"],
+            "land_value": row_dict["land_value"],
+            "no_of_bedrooms": row_dict["no_of_bedrooms"],
+            "improvements_description": row_dict["improvements_description"],
+            "building_total_floor_area": row_dict["building_total_floor_area"],
+            "property_category": row_dict["property_category"],
+            "actual_property_use": row_dict["actual_property_use"],
+            "legal_description": row_dict["legal_description"]
+        },
+        "address": {
+            "address_id": row_dict["address_id"],
+            "full_address": row_dict["full_address"],
+            "town_city": row_dict["town_city"],
+            "suburb_locality": row_dict["suburb_locality"],
+            "territorial_authority": row_dict["territorial_authority"],
+            "full_road_name": row_dict["full_road_name"],
+            "address_number": row_dict["address_number"]
+        }
+    }
+
+
+def encode_original(rows) -> bytes:
+    data = [original_row_to_property_data(dict(zip(PROPERTY_COLUMNS, row))) for row in rows]
+    if jsonable_encoder is not None:
+        data = jsonable_encoder(data)
+    return json.dumps(data, default=str).encode("utf-8")
+
+
+_response_adapter = TypeAdapter(List[schemas.PropertyResponse])
+
+
+def encode_validated(rows) -> bytes:
+    return _response_adapter.dump_json(
+        _response_adapter.validate_python([row_to_property_data(row) for row in rows])
+    )
+
+
+def encode_orjson(rows) -> bytes:
+    return dumps([row_to_property_data(row) for row in rows])
+
+
+def best_time(func, rows, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per run (default: 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per path; the best is kept (default: 5)")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    assert json.loads(encode_original(rows)) == json.loads(encode_orjson(rows))
+
+    paths = [
+        ("dict + jsonable_encoder + json" if jsonable_encoder else "dict + json", encode_original),
+        ("PropertyResponse validation", encode_validated),
+        ("positional + orjson", encode_orjson),
+    ]
+    baseline = None
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, func in paths:
+        seconds = best_time(func, rows, args.repeat)
+        baseline = baseline or seconds
+        print(f"  {name:<34} {seconds / args.rows * 1e6:8.2f} us/row  {baseline / seconds:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Stand-in chat model for benchmarks and load tests.
+
+FakeChatModel answers with canned text after a configurable delay, so the
+report endpoints can be measured without an API key, cost or rate limits:
+
+    from benchmarks.fake_llm import FakeChatModel
+    generator = PropertyDescriptionGenerator(model=FakeChatModel(latency_seconds=2))
+"""
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import anthropic
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORDS = (
+    "the property is a well presented home in an established residential area with good access "
+    "to local schools shops and transport and the valuation reflects recent market conditions"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that sleeps instead of calling an API.
+
+    A response takes latency_seconds in total; when streamed, the first
+    token arrives after first_token_seconds and the rest are spread evenly
+    over the remainder. error_rate of calls fail with a retryable
+    connection error, as a rate-limited or flaky API would.
+    """
+
+    # Read by ContentCache.make_key and the LLM metrics
+    model: str = "fake-chat-model"
+    temperature: float = 0.0
+    latency_seconds: float = 1.0
+    first_token_seconds: float = 0.3
+    response_words: int = 200
+    error_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _words(self) -> List[str]:
+        return [WORDS[i % len(WORDS)] for i in range(self.response_words)]
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate and random.random() < self.error_rate:
+            raise anthropic.APIConnectionError(request=httpx.Request("POST", "https://fake-llm.invalid"))
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=" ".join(self._words())))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        self._maybe_fail()
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        self._maybe_fail()
+        return self._result()
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_seconds)
+        self._maybe_fail()
+        words = self._words()
+        delay = max(self.latency_seconds - self.first_token_seconds, 0) / max(len(words), 1)
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            time.sleep(delay)
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_seconds)
+        self._maybe_fail()
+        words = self._words()
+        delay = max(self.latency_seconds - self.first_token_seconds, 0) / max(len(words), 1)
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            await asyncio.sleep(delay)
@@ -0,0 +1,34 @@
+"""Latency summaries shared by the benchmarks."""
+import math
+from typing import Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Linearly interpolated percentile of already sorted values."""
+    if not sorted_values:
+        return math.nan
+    position = fraction * (len(sorted_values) - 1)
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(seconds: List[float]) -> Dict[str, float]:
+    """Count, mean, p50/p95/p99 and max of a list of durations, in milliseconds."""
+    values = sorted(s * 1000 for s in seconds)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) if values else math.nan,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else math.nan,
+    }
+
+
+def format_summary(name: str, summary: Dict[str, float]) -> str:
+    return (
+        f"  {name:<24} {summary['count']:>7}  "
+        f"p50 {summary['p50_ms']:8.1f} ms  p95 {summary['p95_ms']:8.1f} ms  "
+        f"p99 {summary['p99_ms']:8.1f} ms  max {summary['max_ms']:8.1f} ms"
+    )
@@ -0,0 +1,213 @@
+"""
+HTTP load test reporting throughput and p50/p95/p99 latency per endpoint.
+
+Concurrent clients send a weighted mix of autocomplete, search, market
+statistics, comparables and AI content requests to a running API for a
+fixed time. Properties and addresses to request are discovered first
+through /properties/search. Results can be saved as JSON and compared
+with an earlier run to fail on regressions.
+
+Run from the back-end directory, against a server started with
+benchmarks.serve_fake_llm (or a real one):
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 32 --duration 60
+    python -m benchmarks.load_test --json after.json --baseline before.json --max-regression 0.2
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from benchmarks.latency import format_summary, summarize
+from benchmarks.synthetic_data import ROAD_NAMES
+
+DEFAULT_MIX = "autocomplete=10,search=5,market_stats=2,comparables=2,ai_content=1"
+
+Request = Tuple[str, str, Optional[bytes]]
+
+
+class Seeds:
+    """Addresses and property ids to build requests from."""
+
+    def __init__(self, addresses: List[str], unit_of_property_ids: List[str]):
+        self.addresses = addresses
+        self.unit_of_property_ids = unit_of_property_ids
+
+    def request(self, scenario: str, rng: random.Random) -> Request:
+        address = rng.choice(self.addresses)
+        uid = rng.choice(self.unit_of_property_ids)
+        if scenario == "autocomplete":
+            # As typed: a random-length prefix of a real address
+            return "GET", f"/addresses/autocomplete?q={quote(address[:rng.randint(3, 12)])}", None
+        if scenario == "search":
+            term = address.split(",")[0]
+            return "POST", "/properties/search", json.dumps({"address": term}).encode("utf-8")
+        if scenario == "market_stats":
+            return "GET", f"/properties/{uid}/market-stats", None
+        if scenario == "comparables":
+            return "GET", f"/properties/{uid}/comparables", None
+        if scenario == "ai_content":
+            return "GET", f"/properties/{uid}/ai-content", None
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def send(connection: http.client.HTTPConnection, request: Request) -> int:
+    method, path, body = request
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def discover_seeds(host: str, port: int, terms: List[str], timeout: float) -> Seeds:
+    """Collect addresses and property ids by searching for common road names."""
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    addresses, uids = [], []
+    for term in terms:
+        body = json.dumps({"address": term, "limit": 100}).encode("utf-8")
+        connection.request("POST", "/properties/search", body=body, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        data = response.read()
+        if response.status != 200:
+            continue
+        for item in json.loads(data):
+            addresses.append(item["address"]["full_address"])
+            uids.append(item["valuation"]["unit_of_property_id"])
+    connection.close()
+    if not addresses:
+        raise SystemExit(f"No properties found for the seed terms {terms}; is the database loaded?")
+    return Seeds(addresses, list(dict.fromkeys(uids)))
+
+
+def run_client(host: str, port: int, timeout: float, seeds: Seeds, weights: Dict[str, float],
+               measure_from: float, deadline: float, seed: int, samples: list, lock: threading.Lock) -> None:
+    rng = random.Random(seed)
+    scenarios, scenario_weights = list(weights), list(weights.values())
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    local = []
+    while time.monotonic() < deadline:
+        scenario = rng.choices(scenarios, weights=scenario_weights)[0]
+        request = seeds.request(scenario, rng)
+        start = time.monotonic()
+        try:
+            status = send(connection, request)
+        except (OSError, http.client.HTTPException):
+            status = None
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=timeout)
+        if start >= measure_from:
+            local.append((scenario, time.monotonic() - start, status))
+    connection.close()
+    with lock:
+        samples.extend(local)
+
+
+def report(samples: list, duration: float) -> Dict:
+    by_scenario = defaultdict(list)
+    errors = defaultdict(int)
+    for scenario, seconds, status in samples:
+        if status is not None and status < 400:
+            by_scenario[scenario].append(seconds)
+        else:
+            errors[scenario] += 1
+
+    results = {}
+    for scenario in sorted(set(by_scenario) | set(errors)):
+        summary = summarize(by_scenario[scenario])
+        summary["errors"] = errors[scenario]
+        summary["rps"] = summary["count"] / duration
+        results[scenario] = summary
+    total = summarize([seconds for timings in by_scenario.values() for seconds in timings])
+    total["errors"] = sum(errors.values())
+    total["rps"] = total["count"] / duration
+    results["total"] = total
+    return results
+
+
+def regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Scenarios whose p95 latency grew or throughput fell by more than tolerance."""
+    found = []
+    for scenario, current in results.items():
+        before = baseline.get(scenario)
+        if not before:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{scenario}: p95 {before['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if current["rps"] < before["rps"] * (1 - tolerance):
+            found.append(f"{scenario}: throughput {before['rps']:.1f} -> {current['rps']:.1f} req/s")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="API base URL")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients (default: 16)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds (default: 30)")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds first (default: 5)")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout (default: 120)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed-terms", default=",".join(ROAD_NAMES[:8]),
+                        help="Comma-separated searches used to discover properties")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed p95 increase / throughput drop vs the baseline (default: 0.2)")
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    weights = parse_mix(args.mix)
+    seeds = discover_seeds(host, port, args.seed_terms.split(","), args.timeout)
+    print(f"{len(seeds.unit_of_property_ids)} properties to request; "
+          f"{args.concurrency} clients for {args.warmup:g}s warmup + {args.duration:g}s")
+
+    samples = []
+    lock = threading.Lock()
+    measure_from = time.monotonic() + args.warmup
+    deadline = measure_from + args.duration
+    clients = [
+        threading.Thread(target=run_client, args=(
+            host, port, args.timeout, seeds, weights, measure_from, deadline, i, samples, lock
+        ))
+        for i in range(args.concurrency)
+    ]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    results = report(samples, args.duration)
+    for scenario, summary in results.items():
+        print(f"{format_summary(scenario, summary)}  {summary['rps']:7.1f} req/s  {summary['errors']} errors")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"url": args.url, "concurrency": args.concurrency, "mix": weights, "results": results},
+                      f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        found = regressions(results, baseline, args.max_regression)
+        if found:
+            print("\nRegressions against " + args.baseline + ":\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.max_regression:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
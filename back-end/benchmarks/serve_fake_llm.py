@@ -0,0 +1,46 @@
+"""
+Run the API with FakeChatModel in place of Claude, for load testing.
+
+Every endpoint behaves as in production except that LLM calls sleep for a
+configurable time instead of calling Anthropic, so no API key is needed.
+Set LLM_CACHE_ENABLED=false to measure generation on every request rather
+than cache hits.
+
+Run from the back-end directory:
+    python -m benchmarks.serve_fake_llm --latency 2 --port 8000
+"""
+import argparse
+
+import uvicorn
+
+from benchmarks.fake_llm import FakeChatModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=2.0, help="Seconds per LLM response (default: 2)")
+    parser.add_argument("--first-token", type=float, default=0.3,
+                        help="Seconds to the first streamed token (default: 0.3)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of LLM calls failing with a retryable error (default: 0)")
+    args = parser.parse_args()
+
+    import main as app_module
+
+    # The generators are shared by the endpoints and the report job queue,
+    # so swap the model they hold rather than the generators themselves
+    model = FakeChatModel(
+        latency_seconds=args.latency,
+        first_token_seconds=args.first_token,
+        error_rate=args.error_rate
+    )
+    app_module.client_letter_gen.model = model
+    app_module.property_desc_gen.model = model
+
+    uvicorn.run(app_module.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
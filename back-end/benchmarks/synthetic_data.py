@@ -0,0 +1,205 @@
+"""
+Synthetic LINZ extracts for benchmarking the importers and the API.
+
+Writes nz-addresses.csv, nz-properties-property-address-reference.csv and
+nz-properties-national-district-valuation-roll.csv (the file names the
+importers read) with the columns the importers and property_search use.
+Values follow the shape of the real data: a few large territorial
+authorities, log-normal capital values, floor area growing with bedrooms,
+vacant land without buildings, and some properties with several addresses.
+
+Run from the back-end directory:
+    python -m benchmarks.synthetic_data --properties 100000 --output synthetic_data
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import zlib
+from typing import Dict, List
+
+# (territorial authority, town, suburbs, weight, median capital value, centre longitude, latitude)
+AREAS = [
+    ("Auckland", "Auckland", ["Ponsonby", "Remuera", "Mount Eden", "Henderson", "Manurewa", "Takapuna",
+                              "Papakura", "Onehunga", "Glen Eden", "Howick"], 34, 1150000, 174.76, -36.85),
+    ("Christchurch City", "Christchurch", ["Riccarton", "Hornby", "Sockburn", "Avonhead", "Papanui",
+                                           "Linwood", "Sydenham", "Halswell"], 16, 720000, 172.63, -43.53),
+    ("Wellington City", "Wellington", ["Karori", "Kelburn", "Newtown", "Johnsonville", "Island Bay",
+                                       "Miramar"], 8, 980000, 174.78, -41.29),
+    ("Hamilton City", "Hamilton", ["Hillcrest", "Chartwell", "Frankton", "Rototuna", "Dinsdale"],
+     7, 760000, 175.28, -37.79),
+    ("Tauranga City", "Tauranga", ["Mount Maunganui", "Papamoa", "Otumoetai", "Bethlehem"],
+     6, 930000, 176.17, -37.69),
+    ("Dunedin City", "Dunedin", ["Roslyn", "Mornington", "St Kilda", "Andersons Bay", "Mosgiel"],
+     6, 560000, 170.50, -45.87),
+    ("Selwyn District", "Rolleston", ["Rolleston", "Lincoln", "Prebbleton", "Leeston"],
+     4, 780000, 172.38, -43.59),
+    ("Westland District", "Hokitika", ["Hokitika", "Kaniere", "Ross"], 1, 330000, 170.97, -42.72),
+]
+
+ROAD_NAMES = ["Yaldhurst", "Main South", "Racecourse", "Buchanans", "Riccarton", "Queen", "Victoria",
+              "Church", "Station", "Park", "George", "King", "Great North", "Kowhai", "Rimu",
+              "Totara", "Matai", "Pohutukawa", "Kauri", "Harbour View", "Hill", "Beach", "Moana"]
+ROAD_TYPES = ["Road", "Street", "Avenue", "Drive", "Place", "Crescent", "Terrace", "Lane"]
+
+# (category, actual property use, improvements description, weight)
+CATEGORIES = [
+    ("RD", "Residential dwelling", "DWG OI", 70),
+    ("RF", "Residential flats", "FLATS OI", 8),
+    ("RB", "Residential bach", "DWG", 3),
+    ("RS", "Residential section", None, 6),
+    ("LV", "Lifestyle vacant", None, 3),
+    ("LI", "Lifestyle improved", "DWG OB", 4),
+    ("CR", "Commercial retail", "SHOP OI", 3),
+    ("IL", "Industrial light", "FACTORY", 2),
+    ("OS", "Other sporting", "CLUBROOMS", 1),
+]
+
+# File names and columns, as read by the importers
+ADDRESSES_FILE = "nz-addresses.csv"
+ADDRESS_REF_FILE = "nz-properties-property-address-reference.csv"
+VALUATION_ROLL_FILE = "nz-properties-national-district-valuation-roll.csv"
+
+ADDRESS_COLUMNS = [
+    "address_id", "address_number", "address_number_high", "road_section_id", "full_road_name",
+    "full_address", "suburb_locality", "town_city", "territorial_authority",
+    "gd2000_xcoord", "gd2000_ycoord",
+]
+ADDRESS_REF_COLUMNS = ["id", "unit_of_property_id", "address_id"]
+VALUATION_ROLL_COLUMNS = [
+    "unit_of_property_id", "valuation_no_roll", "valuation_no_assessment", "district_ta_code",
+    "land_area", "ownership_code", "current_effective_valuation_date", "capital_value",
+    "improvements_value", "land_value", "trees", "annual_value", "gross_rental", "no_of_bedrooms",
+    "units_of_use", "off_street_parking", "building_site_coverage", "building_total_floor_area",
+    "mass_total_living_area", "production", "sales_group", "improvements_description",
+    "property_category", "actual_property_use", "legal_description",
+]
+
+# Share of properties with a second address, and roads per suburb
+SECOND_ADDRESS_RATE = 0.05
+ROADS_PER_SUBURB = 40
+
+
+def _weighted(rng: random.Random, items: List, weight_index: int):
+    return rng.choices(items, weights=[item[weight_index] for item in items])[0]
+
+
+def _suburb_roads(rng: random.Random) -> Dict[str, List[str]]:
+    """A fixed set of roads per suburb, so addresses share streets like real ones."""
+    roads = {}
+    for _, _, suburbs, *_ in AREAS:
+        for suburb in suburbs:
+            roads[suburb] = [
+                f"{rng.choice(ROAD_NAMES)} {rng.choice(ROAD_TYPES)}" for _ in range(ROADS_PER_SUBURB)
+            ]
+    return roads
+
+
+def _valuation_row(rng: random.Random, unit_of_property_id: str, roll: int, ta_code: int,
+                   median_value: int) -> List:
+    category, use, improvements_description, _ = _weighted(rng, CATEGORIES, 3)
+    land_area = round(rng.lognormvariate(math.log(0.07 if category[0] == "R" else 1.5), 0.6), 4)
+    capital_value = int(rng.lognormvariate(math.log(median_value), 0.35) / 1000) * 1000
+    built = improvements_description is not None
+    land_value = int(capital_value * (rng.uniform(0.35, 0.7) if built else 1) / 1000) * 1000
+    improvements_value = capital_value - land_value
+    bedrooms = min(max(int(rng.gauss(3, 1.1)), 1), 8) if built and category[0] in "RL" else None
+    floor_area = int(45 + 38 * bedrooms + rng.gauss(0, 25)) if bedrooms else (
+        rng.randint(150, 2000) if built else None
+    )
+    return [
+        unit_of_property_id,
+        roll,
+        rng.randint(1, 99999),
+        ta_code,
+        land_area,
+        rng.randint(1, 9),
+        f"01{rng.choice(['06', '07', '08', '09'])}{rng.choice(['2022', '2023', '2024'])}",
+        capital_value,
+        improvements_value,
+        land_value,
+        0,
+        int(capital_value * 0.05),
+        int(capital_value * 0.045) if category in ("RF", "CR", "IL") else None,
+        bedrooms,
+        2 if category == "RF" else 1,
+        rng.randint(0, 3) if built else None,
+        rng.randint(60, 400) if built else None,
+        floor_area,
+        int(floor_area * 0.9) if bedrooms else None,
+        None,
+        rng.randint(1, 50),
+        improvements_description,
+        category,
+        use,
+        f"LOT {rng.randint(1, 300)} DP {rng.randint(10000, 599999)}",
+    ]
+
+
+def generate(properties: int, output: str, seed: int = 42) -> None:
+    """Write the three CSVs for `properties` properties into output."""
+    rng = random.Random(seed)
+    roads = _suburb_roads(rng)
+    os.makedirs(output, exist_ok=True)
+    next_address_id = 1000000
+    next_ref_id = 1
+    # Last street number used on each road, so numbers are unique and ascending
+    road_numbers: Dict[tuple, int] = {}
+
+    with open(os.path.join(output, ADDRESSES_FILE), "w", newline="", encoding="utf-8") as addresses_file, \
+            open(os.path.join(output, ADDRESS_REF_FILE), "w", newline="", encoding="utf-8") as ref_file, \
+            open(os.path.join(output, VALUATION_ROLL_FILE), "w", newline="", encoding="utf-8") as roll_file:
+        addresses = csv.writer(addresses_file)
+        refs = csv.writer(ref_file)
+        roll = csv.writer(roll_file)
+        addresses.writerow(ADDRESS_COLUMNS)
+        refs.writerow(ADDRESS_REF_COLUMNS)
+        roll.writerow(VALUATION_ROLL_COLUMNS)
+
+        for i in range(properties):
+            ta_code, area = rng.choices(list(enumerate(AREAS, start=1)), weights=[a[3] for a in AREAS])[0]
+            territorial_authority, town, suburbs, _, median_value, longitude, latitude = area
+            suburb = rng.choice(suburbs)
+            unit_of_property_id = f"{rng.getrandbits(128):032x}"
+            roll.writerow(_valuation_row(rng, unit_of_property_id, 10000 + ta_code * 1000 + suburbs.index(suburb),
+                                         ta_code, median_value))
+
+            for _ in range(2 if rng.random() < SECOND_ADDRESS_RATE else 1):
+                road = rng.choice(roads[suburb])
+                number = road_numbers.get((suburb, road), 0) + rng.randint(1, 4)
+                road_numbers[(suburb, road)] = number
+                addresses.writerow([
+                    next_address_id,
+                    number,
+                    None,
+                    zlib.crc32(f"{suburb}/{road}".encode("utf-8")) & 0xFFFFFF,
+                    road,
+                    f"{number} {road}, {suburb}, {town}",
+                    suburb,
+                    town,
+                    territorial_authority,
+                    round(longitude + rng.gauss(0, 0.05), 6),
+                    round(latitude + rng.gauss(0, 0.04), 6),
+                ])
+                refs.writerow([next_ref_id, unit_of_property_id, next_address_id])
+                next_address_id += 1
+                next_ref_id += 1
+
+            if (i + 1) % 100000 == 0:
+                print(f"Generated {i + 1} properties")
+
+    print(f"Wrote {properties} properties and {next_address_id - 1000000} addresses to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--properties", type=int, default=100000, help="Properties to generate (default: 100000)")
+    parser.add_argument("--output", default="synthetic_data", help="Output directory (default: synthetic_data)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    args = parser.parse_args()
+    generate(args.properties, args.output, args.seed)
+
+
+if __name__ == "__main__":
+    main()
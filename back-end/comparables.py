@@ -0,0 +1,188 @@
+import logging
+import threading
+import warnings
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from config import COMPARABLES_MAX_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Weight of each feature in the distance, after standardizing per bucket.
+# Floor area and land value are compared on a log scale.
+FEATURE_WEIGHTS = np.array([1.0, 0.5, 1.0], dtype=np.float32)  # floor area, bedrooms, land value
+# Distance added for a property in a different suburb
+OTHER_SUBURB_PENALTY = 1.0
+# Squared distance, in standard deviations, charged for a feature the subject
+# has but the candidate lacks (times the feature weight): as if two standard
+# deviations apart, so a missing value never ranks as a close match
+MISSING_FEATURE_PENALTY = 4.0
+
+
+class _Bucket:
+    """Feature matrix for the properties of one territorial authority and category."""
+
+    def __init__(self, unit_of_property_ids: List[str], suburbs: List[str], features: np.ndarray):
+        self.unit_of_property_ids = unit_of_property_ids
+        self.positions = {uid: i for i, uid in enumerate(unit_of_property_ids)}
+        self.suburb_names, self.suburb_codes = np.unique(np.array(suburbs, dtype=object), return_inverse=True)
+
+        if not len(features):
+            self.features = features.astype(np.float32)
+            return
+
+        # Standardize each feature over the properties that have it. Missing
+        # values stay NaN and are handled when ranking, rather than imputed
+        # to a value they would then match closely.
+        with warnings.catch_warnings():
+            # A feature missing for the whole bucket has no mean
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean = np.nanmean(features, axis=0)
+            std = np.nanstd(features, axis=0)
+        mean = np.where(np.isnan(mean), 0, mean)
+        std = np.where(np.isnan(std) | (std == 0), 1, std)
+        self.features = ((features - mean) / std * np.sqrt(FEATURE_WEIGHTS)).astype(np.float32)
+
+    def nearest(self, unit_of_property_id: str, k: int) -> List[Tuple[str, float]]:
+        position = self.positions[unit_of_property_id]
+        subject = self.features[position]
+        # Only the features the subject has are compared; a candidate missing
+        # one of them is charged MISSING_FEATURE_PENALTY for it
+        known = ~np.isnan(subject)
+        differences = self.features[:, known] - subject[known]
+        distances = np.where(
+            np.isnan(differences),
+            MISSING_FEATURE_PENALTY * FEATURE_WEIGHTS[known],
+            differences ** 2
+        ).sum(axis=1)
+        distances += OTHER_SUBURB_PENALTY * (self.suburb_codes != self.suburb_codes[position])
+        distances[position] = np.inf
+
+        k = min(k, len(distances) - 1)
+        if k <= 0:
+            return []
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest])]
+        return [(self.unit_of_property_ids[i], float(np.sqrt(distances[i]))) for i in nearest]
+
+
+class ComparablesIndex:
+    """
+    k-nearest-neighbour search for comparable properties.
+
+    Candidates share the subject's territorial authority and property
+    category; they are ranked by floor area, bedrooms and land value, with
+    properties in the same suburb preferred. Buckets are loaded from
+    property_search and kept in an LRU until the property_search data version
+    changes. warm_in_background() loads the largest buckets ahead of
+    requests, at startup and again after each data version change; a bucket
+    it has not reached is loaded on first use.
+    """
+
+    def __init__(self, session_factory, versions, max_buckets: int = COMPARABLES_MAX_BUCKETS):
+        self.session_factory = session_factory
+        self.versions = versions
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[Tuple[str, str], _Bucket]" = OrderedDict()
+        self._version = None
+        self._warming = False
+        self._lock = threading.Lock()
+
+    def find(self, unit_of_property_id: str, territorial_authority: Optional[str],
+             property_category: Optional[str], k: int = 10) -> List[Tuple[str, float]]:
+        """
+        The k properties most similar to unit_of_property_id.
+
+        Returns:
+            List[Tuple[str, float]]: (unit_of_property_id, distance) pairs, closest first
+        """
+        if territorial_authority is None or property_category is None:
+            return []
+        bucket = self._bucket(territorial_authority, property_category)
+        if unit_of_property_id not in bucket.positions:
+            return []
+        return bucket.nearest(unit_of_property_id, k)
+
+    def warm_in_background(self) -> None:
+        """Load the largest buckets in a background thread, unless already doing so."""
+        with self._lock:
+            if self._warming:
+                return
+            self._warming = True
+        threading.Thread(target=self._warm, daemon=True).start()
+
+    def _warm(self) -> None:
+        try:
+            with self.session_factory() as db:
+                keys = db.execute(text("""
+                    SELECT territorial_authority, property_category
+                    FROM property_search
+                    WHERE territorial_authority IS NOT NULL AND property_category IS NOT NULL
+                    GROUP BY territorial_authority, property_category
+                    ORDER BY count(*) DESC
+                    LIMIT :max_buckets
+                """), {"max_buckets": self.max_buckets}).all()
+            for territorial_authority, property_category in keys:
+                self._bucket(territorial_authority, property_category, warming=True)
+            logger.info(f"Warmed {len(keys)} comparables buckets")
+        except Exception as e:
+            logger.error(f"Error warming comparables buckets: {str(e)}")
+        finally:
+            with self._lock:
+                self._warming = False
+
+    def _bucket(self, territorial_authority: str, property_category: str, warming: bool = False) -> _Bucket:
+        key = (territorial_authority, property_category)
+        version = self.versions.get("property_search")
+        with self._lock:
+            changed = version != self._version
+            if changed:
+                self._buckets.clear()
+                self._version = version
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                self._buckets.move_to_end(key)
+        if changed and not warming:
+            self.warm_in_background()
+        if bucket is not None:
+            return bucket
+
+        # Loaded outside the lock; two requests may race to load the same
+        # bucket, which only costs a duplicate query
+        bucket = self._load(territorial_authority, property_category)
+        with self._lock:
+            if version == self._version:
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_buckets:
+                    self._buckets.popitem(last=False)
+        return bucket
+
+    def _load(self, territorial_authority: str, property_category: str) -> _Bucket:
+        with self.session_factory() as db:
+            rows = db.execute(text("""
+                SELECT DISTINCT ON (unit_of_property_id)
+                    unit_of_property_id, suburb_locality,
+                    building_total_floor_area, no_of_bedrooms, land_value
+                FROM property_search
+                WHERE territorial_authority = :territorial_authority
+                    AND property_category = :property_category
+                ORDER BY unit_of_property_id, address_id
+            """), {
+                "territorial_authority": territorial_authority,
+                "property_category": property_category,
+            }).all()
+
+        features = np.array([
+            (
+                np.log1p(floor_area) if floor_area else np.nan,
+                bedrooms if bedrooms is not None else np.nan,
+                np.log1p(land_value) if land_value else np.nan,
+            )
+            for _, _, floor_area, bedrooms, land_value in rows
+        ], dtype=np.float64).reshape(-1, 3)
+        logger.debug("Loaded comparables bucket %s/%s: %d properties",
+                     territorial_authority, property_category, len(rows))
+        return _Bucket([row[0] for row in rows], [row[1] or "" for row in rows], features)
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+from config import DATA_VERSION_POLL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersionTracker:
+    """
+    Read-through view of the data_versions table maintained by the importers.
+
+    Each importer bumps its dataset's version after a load; in-process caches
+    compare versions to know when to rebuild. The table is polled at most
+    once per poll interval.
+
+    Code running on the event loop must use current(), which never queries;
+    start() keeps the versions fresh from a background task so get() in
+    worker threads doesn't need to poll either.
+    """
+
+    def __init__(self, session_factory, poll_seconds: float = DATA_VERSION_POLL_SECONDS,
+                 async_session_factory=None):
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self.poll_seconds = poll_seconds
+        self._versions: Dict[str, int] = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, dataset: str) -> int:
+        """Current version of dataset, or 0 if it has never been recorded."""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.poll_seconds:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.poll_seconds:
+                    self._refresh()
+                    self._checked_at = now
+        return self._versions.get(dataset, 0)
+
+    def current(self, dataset: str) -> int:
+        """Last polled version of dataset, without querying the database."""
+        return self._versions.get(dataset, 0)
+
+    async def start(self) -> None:
+        """Poll the table from a background task on the running event loop."""
+        await self._arefresh()
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            await self._arefresh()
+
+    async def _arefresh(self) -> None:
+        try:
+            async with self.async_session_factory() as db:
+                rows = (await db.execute(text("SELECT dataset, version FROM data_versions"))).all()
+            self._versions = {dataset: version for dataset, version in rows}
+        except Exception as e:
+            logger.warning(f"Could not read data_versions: {str(e)}")
+        self._checked_at = time.monotonic()
+
+    def _refresh(self) -> None:
+        try:
+            with self.session_factory() as db:
+                rows = db.execute(text("SELECT dataset, version FROM data_versions")).all()
+            self._versions = {dataset: version for dataset, version in rows}
+        except Exception as e:
+            # Table not created yet (no import has run) or database unavailable
+            logger.warning(f"Could not read data_versions: {str(e)}")
@@ -0,0 +1,214 @@
+import asyncio
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Tuple
+
+from sqlalchemy import text
+
+import schemas
+from config import EXPORT_BATCH_ROWS, EXPORT_QUEUE_CHUNKS
+from database import async_session
+from serialization import PROPERTY_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Columns matched exactly when given in an export request
+EXACT_FILTERS = ("territorial_authority", "suburb_locality", "town_city", "actual_property_use")
+
+# Same order as PROPERTY_COLUMNS
+if pa is not None:
+    PARQUET_SCHEMA = pa.schema([
+        ("unit_of_property_id", pa.string()),
+        ("valuation_no_roll", pa.int32()),
+        ("capital_value", pa.int64()),
+        ("improvements_value", pa.int64()),
+        ("land_value", pa.int64()),
+        ("no_of_bedrooms", pa.int32()),
+        ("improvements_description", pa.string()),
+        ("building_total_floor_area", pa.int32()),
+        ("property_category", pa.string()),
+        ("actual_property_use", pa.string()),
+        ("legal_description", pa.string()),
+        ("address_id", pa.int64()),
+        ("full_address", pa.string()),
+        ("town_city", pa.string()),
+        ("suburb_locality", pa.string()),
+        ("territorial_authority", pa.string()),
+        ("full_road_name", pa.string()),
+        ("address_number", pa.int32()),
+    ])
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so value matches literally (with ESCAPE '\\')."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_export_query(request: schemas.PropertyExportRequest) -> Tuple[str, List]:
+    """
+    SELECT of PROPERTY_COLUMNS from property_search matching the request.
+
+    Uses asyncpg's $n placeholders, since the query is run on the driver
+    connection for COPY.
+    """
+    conditions = []
+    args = []
+
+    def bind(value) -> str:
+        args.append(value)
+        return f"${len(args)}"
+
+    if request.address:
+        conditions.append(
+            f"full_address_normalized LIKE '%' || normalize_address({bind(request.address)}) || '%'"
+        )
+    for column in EXACT_FILTERS:
+        value = getattr(request, column)
+        if value is not None:
+            conditions.append(f"{column} = {bind(value)}")
+    if request.property_category:
+        # "R" exports every residential category; the prefix itself is literal
+        prefix = bind(escape_like(request.property_category))
+        conditions.append(f"property_category LIKE {prefix} || '%' ESCAPE '\\'")
+    if request.min_capital_value is not None:
+        conditions.append(f"capital_value >= {bind(request.min_capital_value)}")
+    if request.max_capital_value is not None:
+        conditions.append(f"capital_value <= {bind(request.max_capital_value)}")
+
+    query = f"SELECT {', '.join(PROPERTY_COLUMNS)} FROM property_search"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, args
+
+
+@asynccontextmanager
+async def _export_connection():
+    """asyncpg connection in a transaction with no statement timeout."""
+    async with async_session() as db:
+        # An export reads for longer than the API statement timeout allows
+        await db.execute(text("SET LOCAL statement_timeout = 0"))
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        yield raw.driver_connection
+
+
+async def csv_chunks(query: str, args: List) -> AsyncIterator[bytes]:
+    """
+    Rows of query as CSV with a header, straight from COPY ... TO STDOUT.
+
+    COPY writes into a bounded queue, so a slow client pauses the read
+    instead of the chunks piling up in memory.
+    """
+    async with _export_connection() as connection:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+        done = object()
+        errors = []
+
+        async def copy():
+            try:
+                await connection.copy_from_query(query, *args, output=queue.put, format="csv", header=True)
+            except Exception as e:
+                errors.append(e)
+            await queue.put(done)
+
+        task = asyncio.create_task(copy())
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            if not task.done():
+                # Client went away; stop the COPY
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if errors:
+            raise errors[0]
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain_chunks(self) -> List[bytes]:
+        """Pieces written since the last drain, as written, without joining them."""
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def _record_batch(records: List) -> "pa.RecordBatch":
+    columns = list(zip(*records))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, PARQUET_SCHEMA)],
+        schema=PARQUET_SCHEMA
+    )
+
+
+def _write_row_group(writer: "pq.ParquetWriter", records: List) -> None:
+    """Convert and encode one row group; CPU bound, so run off the event loop."""
+    writer.write_batch(_record_batch(records))
+
+
+async def parquet_chunks(query: str, args: List, batch_rows: int = EXPORT_BATCH_ROWS) -> AsyncIterator[bytes]:
+    """
+    Rows of query as a Parquet file, one row group per batch_rows rows.
+
+    Rows are read through a server-side cursor. Each row group is built and
+    encoded in a worker thread, so other requests keep being served, and is
+    sent as soon as it is written; only the file footer is held until the end.
+    """
+    async with _export_connection() as connection:
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, PARQUET_SCHEMA, compression="zstd")
+        batch = []
+        async for record in connection.cursor(query, *args, prefetch=min(batch_rows, 10000)):
+            batch.append(record)
+            if len(batch) >= batch_rows:
+                await asyncio.to_thread(_write_row_group, writer, batch)
+                batch = []
+                for chunk in sink.drain_chunks():
+                    yield chunk
+        if batch:
+            await asyncio.to_thread(_write_row_group, writer, batch)
+        await asyncio.to_thread(writer.close)
+        for chunk in sink.drain_chunks():
+            yield chunk
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
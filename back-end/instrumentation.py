@@ -0,0 +1,126 @@
+import logging
+import random
+import time
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from config import LOG_LEVEL, SQL_LOG_SAMPLE_RATE, SQL_SLOW_QUERY_MS
+
+logger = logging.getLogger("sql")
+
+SQL_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Time spent executing SQL statements",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time spent waiting for a connection from the engine's pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+ROW_CONVERSION_SECONDS = Histogram(
+    "row_conversion_duration_seconds",
+    "Time spent mapping result rows onto response dicts, per request",
+    ["endpoint"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response headers are ready, by route",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled",
+)
+
+
+def configure_logging() -> None:
+    """Set the root log level from LOG_LEVEL."""
+    logging.basicConfig(level=LOG_LEVEL)
+
+
+def timed_pool_class(pool_class, engine_label: str):
+    """
+    Subclass of pool_class timing every checkout in db_pool_checkout_duration_seconds.
+
+    The time is measured around the pool's own checkout, so it covers every
+    caller of the engine (sessions, engine.connect(), streaming, COPY), and
+    includes waiting for a free connection or opening a new one. Pool
+    events can't be used: checkout only fires once the connection is held.
+    """
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_CHECKOUT_SECONDS.labels(engine_label).observe(time.perf_counter() - start)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def install_sql_instrumentation(target=Engine) -> None:
+    """
+    Time every statement executed through target (all engines by default).
+
+    Durations go into the db_query_duration_seconds histogram. Only slow
+    statements are logged unconditionally; a sample of the rest is logged
+    at DEBUG. Log arguments are passed through for lazy formatting, so
+    disabled levels cost nothing beyond the level check.
+    """
+
+    @event.listens_for(target, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(target, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop(-1)
+        SQL_QUERY_SECONDS.observe(elapsed)
+
+        if elapsed * 1000 >= SQL_SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms): %s | parameters: %s", elapsed * 1000, statement, parameters)
+        elif logger.isEnabledFor(logging.DEBUG) and random.random() < SQL_LOG_SAMPLE_RATE:
+            logger.debug("Query (%.1f ms): %s | parameters: %s", elapsed * 1000, statement, parameters)
+
+    @event.listens_for(target, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute doesn't run for failed statements
+        start_times = context.connection.info.get('query_start_time') if context.connection else None
+        if start_times:
+            start_times.pop(-1)
+
+
+def _route_template(app, scope) -> str:
+    # Label by path template, not the raw path, to keep label cardinality bounded
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+def install_request_metrics(app) -> None:
+    """Track in-flight requests and per-route latency for app."""
+
+    @app.middleware("http")
+    async def track_requests(request, call_next):
+        route = _route_template(app, request.scope)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            return await call_next(request)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_SECONDS.labels(request.method, route).observe(time.perf_counter() - start)
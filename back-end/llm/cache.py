@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from prometheus_client import Counter
+from sqlalchemy import text
+
+from .config import LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Run TTL/LRU eviction once every this many writes
+EVICTION_INTERVAL = 200
+
+CACHE_LOOKUPS = Counter(
+    "llm_content_cache_lookups_total",
+    "Generated content cache lookups",
+    ["result"],
+)
+
+
+class ContentCache:
+    """
+    Content-addressed cache for generated report sections.
+
+    Entries live in the llm_content_cache table and are keyed on a hash of
+    everything that determines the model output: model name, prompt template
+    version, temperature and the variables formatted into the prompt. Each
+    entry also records its property, so the importers can clear the entries
+    for properties whose source data changed.
+    """
+
+    def __init__(self, session_factory, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(generator, section: str, prompt_variables: Dict) -> str:
+        """
+        Build the cache key for one generated section.
+
+        Args:
+            generator: Generator whose model produces the section
+            section: Name of the generated section (e.g. "client_letter")
+            prompt_variables: Values formatted into the prompt template
+
+        Returns:
+            str: Hex SHA-256 digest identifying the content
+        """
+        payload = json.dumps({
+            "section": section,
+            "model": generator.model.model,
+            "prompt_version": generator.PROMPT_VERSION,
+            "temperature": generator.model.temperature,
+            "variables": prompt_variables,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached content for key, or None on a miss or expired entry."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        try:
+            with self.session_factory() as db:
+                content = db.execute(text("""
+                    UPDATE llm_content_cache
+                    SET last_accessed_at = now(), hit_count = hit_count + 1
+                    WHERE cache_key = :key AND created_at > :cutoff
+                    RETURNING content
+                """), {"key": key, "cutoff": cutoff}).scalar()
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Content cache lookup failed: {str(e)}")
+            content = None
+
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_LOOKUPS.labels("miss" if content is None else "hit").inc()
+        return content
+
+    def set(self, key: str, section: str, model_name: str, content: str,
+            unit_of_property_id: Optional[str] = None) -> None:
+        """Store generated content under key, evicting old entries periodically."""
+        try:
+            with self.session_factory() as db:
+                db.execute(text("""
+                    INSERT INTO llm_content_cache
+                        (cache_key, section, model_name, content, unit_of_property_id)
+                    VALUES (:key, :section, :model_name, :content, :unit_of_property_id)
+                    ON CONFLICT (cache_key) DO UPDATE
+                    SET content = EXCLUDED.content,
+                        unit_of_property_id = EXCLUDED.unit_of_property_id,
+                        created_at = now(),
+                        last_accessed_at = now()
+                """), {
+                    "key": key,
+                    "section": section,
+                    "model_name": model_name,
+                    "content": content,
+                    "unit_of_property_id": unit_of_property_id,
+                })
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Content cache write failed: {str(e)}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % EVICTION_INTERVAL == 0
+        if should_evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least recently used ones beyond max_entries."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        try:
+            with self.session_factory() as db:
+                expired = db.execute(text("""
+                    DELETE FROM llm_content_cache WHERE created_at <= :cutoff
+                """), {"cutoff": cutoff}).rowcount
+                overflow = db.execute(text("""
+                    DELETE FROM llm_content_cache
+                    WHERE cache_key IN (
+                        SELECT cache_key FROM llm_content_cache
+                        ORDER BY last_accessed_at DESC
+                        OFFSET :max_entries
+                    )
+                """), {"max_entries": self.max_entries}).rowcount
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Content cache eviction failed: {str(e)}")
+            return 0
+
+        with self._lock:
+            self.evictions += expired + overflow
+        return expired + overflow
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
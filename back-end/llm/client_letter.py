@@ -1,35 +1,48 @@
 from langchain_anthropic import ChatAnthropic
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict
+from langchain_core.language_models import BaseChatModel
+from typing import AsyncIterator, Dict, Optional
 import logging
 from .config import ANTHROPIC_API_KEY, CLAUDE_MODEL
 
 logger = logging.getLogger(__name__)
 
 class ClientLetterGenerator:
-    def __init__(self):
-        self.model = ChatAnthropic(
+    # Bump whenever the prompt template changes so cached letters are not reused
+    PROMPT_VERSION = "1"
+
+    def __init__(self, model: Optional[BaseChatModel] = None):
+        """
+        Args:
+            model: Chat model to generate with; defaults to Claude via
+                ChatAnthropic. Benchmarks pass a stand-in here.
+        """
+        self.model = model or ChatAnthropic(
             anthropic_api_key=ANTHROPIC_API_KEY,
             model_name=CLAUDE_MODEL,
             max_tokens=1500,
             temperature=0.7
         )
 
-    def generate_client_letter(self, property_data: Dict, client_name: str, purpose: str) -> str:
-        """
-        Generate a professional client letter for property valuation.
-        
-        Args:
-            property_data: Dictionary containing property details
-            client_name: Name of the client
-            purpose: Purpose of the valuation (e.g., "mortgage", "sale", "insurance")
-            
-        Returns:
-            str: Generated client letter
-        """
-        try:
-            # Create a prompt template
-            prompt = ChatPromptTemplate.from_template("""
+    def prompt_variables(self, property_data: Dict, client_name: str, purpose: str) -> Dict:
+        """Values formatted into the client letter prompt, which also key its cached content."""
+        return {
+            "client_name": client_name,
+            "purpose": purpose,
+            "address": property_data['address']['full_address'],
+            "town_city": property_data['address']['town_city'],
+            "property_category": property_data['valuation']['property_category'],
+            "capital_value": property_data['valuation']['capital_value'],
+            "land_value": property_data['valuation']['land_value'],
+            "improvements_value": property_data['valuation']['improvements_value'],
+            "bedrooms": property_data['valuation']['no_of_bedrooms'],
+            "building_area": property_data['valuation']['building_total_floor_area']
+        }
+
+    def _build_prompt(self, property_data: Dict, client_name: str, purpose: str):
+        """Format the client letter prompt messages for a property."""
+        # Create a prompt template
+        prompt = ChatPromptTemplate.from_template("""
 Please write a professional client letter for a property valuation report with the following details:
 
 Client Name: {client_name}
@@ -56,19 +69,25 @@ Please write a formal letter that:
 The letter should be formatted with proper paragraphs and structure.
 """)
 
-            # Format the prompt with property data
-            formatted_prompt = prompt.format_messages(
-                client_name=client_name,
-                purpose=purpose,
-                address=property_data['address']['full_address'],
-                town_city=property_data['address']['town_city'],
-                property_category=property_data['valuation']['property_category'],
-                capital_value=property_data['valuation']['capital_value'],
-                land_value=property_data['valuation']['land_value'],
-                improvements_value=property_data['valuation']['improvements_value'],
-                bedrooms=property_data['valuation']['no_of_bedrooms'],
-                building_area=property_data['valuation']['building_total_floor_area']
-            )
+        # Format the prompt with property data
+        return prompt.format_messages(
+            **self.prompt_variables(property_data, client_name, purpose)
+        )
+
+    def generate_client_letter(self, property_data: Dict, client_name: str, purpose: str) -> str:
+        """
+        Generate a professional client letter for property valuation.
+        
+        Args:
+            property_data: Dictionary containing property details
+            client_name: Name of the client
+            purpose: Purpose of the valuation (e.g., "mortgage", "sale", "insurance")
+            
+        Returns:
+            str: Generated client letter
+        """
+        try:
+            formatted_prompt = self._build_prompt(property_data, client_name, purpose)
 
             # Generate the letter using Claude through LangChain
             response = self.model.invoke(formatted_prompt)
@@ -78,3 +97,50 @@ The letter should be formatted with proper paragraphs and structure.
         except Exception as e:
             logger.error(f"Error generating client letter: {str(e)}")
             raise Exception(f"Failed to generate client letter: {str(e)}")
+
+    async def agenerate_client_letter(self, property_data: Dict, client_name: str, purpose: str) -> str:
+        """
+        Async variant of generate_client_letter using the model's ainvoke.
+        
+        Args:
+            property_data: Dictionary containing property details
+            client_name: Name of the client
+            purpose: Purpose of the valuation (e.g., "mortgage", "sale", "insurance")
+            
+        Returns:
+            str: Generated client letter
+        """
+        try:
+            formatted_prompt = self._build_prompt(property_data, client_name, purpose)
+
+            # Generate the letter using Claude through LangChain
+            response = await self.model.ainvoke(formatted_prompt)
+            
+            return response.content
+
+        except Exception as e:
+            logger.error(f"Error generating client letter: {str(e)}")
+            raise Exception(f"Failed to generate client letter: {str(e)}") from e
+
+    async def astream_client_letter(self, property_data: Dict, client_name: str, purpose: str) -> AsyncIterator[str]:
+        """
+        Stream the client letter as it is generated, using the model's astream.
+        
+        Args:
+            property_data: Dictionary containing property details
+            client_name: Name of the client
+            purpose: Purpose of the valuation (e.g., "mortgage", "sale", "insurance")
+            
+        Yields:
+            str: Successive pieces of the letter
+        """
+        try:
+            formatted_prompt = self._build_prompt(property_data, client_name, purpose)
+
+            async for chunk in self.model.astream(formatted_prompt):
+                if chunk.content:
+                    yield chunk.content
+
+        except Exception as e:
+            logger.error(f"Error streaming client letter: {str(e)}")
+            raise Exception(f"Failed to generate client letter: {str(e)}") from e
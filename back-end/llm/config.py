@@ -14,11 +14,26 @@ load_dotenv(env_path)
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
 CLAUDE_MODEL = os.getenv('CLAUDE_MODEL', 'claude-3-sonnet-20240229')
 
+# Maximum number of LLM calls in flight at once across all requests
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+# Per-call timeout for a single LLM generation, in seconds
+LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '60'))
+# Exponential backoff for retried calls (rate limits, overload, timeouts)
+LLM_RETRY_BASE_SECONDS = float(os.getenv('LLM_RETRY_BASE_SECONDS', '2'))
+LLM_RETRY_MAX_SECONDS = float(os.getenv('LLM_RETRY_MAX_SECONDS', '60'))
+
+# Generated content cache (stored in the llm_content_cache table)
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '100000'))
+
 # Log configuration status
 logger.info(f"Environment loaded from: {env_path}")
 logger.info(f"API Key loaded: {'Yes' if ANTHROPIC_API_KEY else 'No'}")
 logger.info(f"Model version: {CLAUDE_MODEL}")
+logger.info(f"LLM concurrency: {LLM_MAX_CONCURRENCY}, timeout: {LLM_TIMEOUT_SECONDS}s")
 
-# Validate required environment variables
+# Without a key the app still starts (so it can run against a stand-in model,
+# see benchmarks/fake_llm.py), but AI content requests to Anthropic will fail
 if not ANTHROPIC_API_KEY:
-    raise ValueError("ANTHROPIC_API_KEY environment variable is not set. Please check your .env file.")
+    logger.warning("ANTHROPIC_API_KEY environment variable is not set. Please check your .env file.")
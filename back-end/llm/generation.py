@@ -0,0 +1,397 @@
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import anthropic
+from prometheus_client import Histogram
+
+from .cache import ContentCache
+from .client_letter import ClientLetterGenerator
+from .config import (
+    LLM_MAX_CONCURRENCY,
+    LLM_RETRY_BASE_SECONDS,
+    LLM_RETRY_MAX_SECONDS,
+    LLM_TIMEOUT_SECONDS,
+)
+from .property_description import PropertyDescriptionGenerator
+
+logger = logging.getLogger(__name__)
+
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds",
+    "Time spent in a single LLM generation call, excluding queueing",
+    ["section", "model"],
+    buckets=(0.5, 1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120),
+)
+
+LLM_FIRST_TOKEN_SECONDS = Histogram(
+    "llm_first_token_seconds",
+    "Time from starting a streamed LLM call to its first piece of output",
+    ["section", "model"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+
+# API responses worth retrying: rate limited, overloaded or briefly unavailable
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 529}
+
+# Shared across requests so the total number of in-flight LLM calls stays bounded
+_call_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_call_semaphore() -> asyncio.Semaphore:
+    global _call_semaphore
+    if _call_semaphore is None:
+        _call_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _call_semaphore
+
+
+async def _limited_call(coro, timeout: float, section: str, model: str):
+    async with _get_call_semaphore():
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(coro, timeout=timeout)
+        finally:
+            LLM_CALL_SECONDS.labels(section, model).observe(time.perf_counter() - start)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    # The generators wrap API errors, so look down the cause chain
+    while error is not None:
+        if isinstance(error, (asyncio.TimeoutError, anthropic.RateLimitError, anthropic.APIConnectionError)):
+            return True
+        if isinstance(error, anthropic.APIStatusError) and error.status_code in RETRYABLE_STATUS_CODES:
+            return True
+        error = error.__cause__
+    return False
+
+
+def _retry_delay(error: BaseException, attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1, honouring retry-after."""
+    while error is not None:
+        if isinstance(error, anthropic.APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), LLM_RETRY_MAX_SECONDS)
+                except ValueError:
+                    pass
+        error = error.__cause__
+    delay = min(LLM_RETRY_BASE_SECONDS * 2 ** attempt, LLM_RETRY_MAX_SECONDS)
+    # Jitter so retries from many jobs don't arrive together
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def _generate(coro_factory, timeout: float, section: str, model: str, retries: int) -> str:
+    """Make one LLM call, retrying transient failures up to retries times."""
+    attempt = 0
+    while True:
+        try:
+            return await _limited_call(coro_factory(), timeout, section, model)
+        except Exception as e:
+            if attempt >= retries or not _is_retryable(e):
+                raise
+            delay = _retry_delay(e, attempt)
+            attempt += 1
+            logger.warning(f"Retrying {section} in {delay:.1f}s (attempt {attempt}/{retries}): {str(e)}")
+            await asyncio.sleep(delay)
+
+
+def _property_id(property_data: Dict) -> Optional[str]:
+    return (property_data.get("valuation") or {}).get("unit_of_property_id")
+
+
+async def _cached_call(
+    cache: Optional[ContentCache],
+    generator,
+    section: str,
+    prompt_variables: Dict,
+    coro_factory,
+    timeout: float,
+    retries: int = 0,
+    unit_of_property_id: Optional[str] = None,
+) -> str:
+    """Serve a section from the cache, generating and storing it on a miss."""
+    model_name = generator.model.model
+    if cache is None:
+        return await _generate(coro_factory, timeout, section, model_name, retries)
+
+    key = cache.make_key(generator, section, prompt_variables)
+    content = await asyncio.to_thread(cache.get, key)
+    if content is not None:
+        return content
+
+    content = await _generate(coro_factory, timeout, section, model_name, retries)
+    await asyncio.to_thread(cache.set, key, section, model_name, content, unit_of_property_id)
+    return content
+
+
+async def generate_ai_content(
+    property_data: Dict,
+    description_gen: PropertyDescriptionGenerator,
+    letter_gen: ClientLetterGenerator,
+    client_name: str = "Property Owner",
+    purpose: str = "Valuation Report",
+    timeout: float = LLM_TIMEOUT_SECONDS,
+    cache: Optional[ContentCache] = None,
+    retries: int = 0,
+) -> Dict:
+    """
+    Generate the property description and client letter for one property concurrently.
+
+    Args:
+        property_data: Dictionary containing property details
+        description_gen: Generator used for the property description
+        letter_gen: Generator used for the client letter
+        client_name: Name of the client
+        purpose: Purpose of the valuation
+        timeout: Timeout in seconds applied to each LLM call
+        cache: Optional content cache consulted before calling the model
+        retries: Times to retry a call that was rate limited, overloaded or
+            timed out, with exponential backoff
+
+    Returns:
+        Dict: Generated content keyed by section. Sections that failed or timed
+        out are omitted and reported under "errors" instead.
+    """
+    sections = ["property_description", "client_letter"]
+    results = await asyncio.gather(
+        _cached_call(
+            cache,
+            description_gen,
+            "property_description",
+            description_gen.description_variables(property_data),
+            lambda: description_gen.agenerate_description(property_data),
+            timeout,
+            retries,
+            _property_id(property_data)
+        ),
+        _cached_call(
+            cache,
+            letter_gen,
+            "client_letter",
+            letter_gen.prompt_variables(property_data, client_name, purpose),
+            lambda: letter_gen.agenerate_client_letter(
+                property_data,
+                client_name=client_name,
+                purpose=purpose
+            ),
+            timeout,
+            retries,
+            _property_id(property_data)
+        ),
+        return_exceptions=True
+    )
+
+    content = {}
+    errors = {}
+    for section, result in zip(sections, results):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.error(f"Timed out generating {section} after {timeout}s")
+            errors[section] = f"Timed out after {timeout}s"
+        elif isinstance(result, Exception):
+            logger.error(f"Error generating {section}: {str(result)}")
+            errors[section] = str(result)
+        else:
+            content[section] = result
+
+    if errors:
+        content["errors"] = errors
+    return content
+
+
+async def generate_market_analysis(
+    property_data: Dict,
+    market_trends: Dict,
+    description_gen: PropertyDescriptionGenerator,
+    timeout: float = LLM_TIMEOUT_SECONDS,
+    cache: Optional[ContentCache] = None,
+    retries: int = 0,
+) -> str:
+    """
+    Generate the market analysis section for one property.
+
+    Args:
+        property_data: Dictionary containing property details
+        market_trends: Local market figures from the market_stats table
+        description_gen: Generator used for the analysis
+        timeout: Timeout in seconds applied to the LLM call
+        cache: Optional content cache consulted before calling the model
+        retries: Times to retry a rate limited, overloaded or timed out call
+
+    Returns:
+        str: Generated market analysis
+    """
+    return await _cached_call(
+        cache,
+        description_gen,
+        "market_analysis",
+        description_gen.market_analysis_variables(property_data, market_trends),
+        lambda: description_gen.agenerate_market_analysis(property_data, market_trends),
+        timeout,
+        retries,
+        _property_id(property_data)
+    )
+
+
+async def generate_ai_content_batch(
+    properties: List[Dict],
+    description_gen: PropertyDescriptionGenerator,
+    letter_gen: ClientLetterGenerator,
+    client_name: str = "Property Owner",
+    purpose: str = "Valuation Report",
+    timeout: float = LLM_TIMEOUT_SECONDS,
+    cache: Optional[ContentCache] = None,
+    retries: int = 0,
+) -> List[Dict]:
+    """
+    Generate AI content for several properties at once.
+
+    All calls are started together and throttled by the shared LLM semaphore,
+    so wall-clock time is close to the slowest call rather than the sum.
+
+    Returns:
+        List[Dict]: One generate_ai_content result per property, in input order
+    """
+    return await asyncio.gather(*(
+        generate_ai_content(
+            property_data,
+            description_gen,
+            letter_gen,
+            client_name=client_name,
+            purpose=purpose,
+            timeout=timeout,
+            cache=cache,
+            retries=retries
+        )
+        for property_data in properties
+    ))
+
+
+async def _stream_section(
+    cache: Optional[ContentCache],
+    generator,
+    section: str,
+    prompt_variables: Dict,
+    stream_factory,
+    timeout: float,
+    unit_of_property_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream one section as it is generated.
+
+    A cached section is yielded in one piece; a generated one is cached once
+    complete. timeout applies to the wait for each piece, not the whole call.
+    """
+    model_name = generator.model.model
+    key = None
+    if cache is not None:
+        key = cache.make_key(generator, section, prompt_variables)
+        content = await asyncio.to_thread(cache.get, key)
+        if content is not None:
+            yield content
+            return
+
+    pieces = []
+    async with _get_call_semaphore():
+        start = time.perf_counter()
+        stream = stream_factory()
+        try:
+            while True:
+                try:
+                    piece = await asyncio.wait_for(stream.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                if not pieces:
+                    LLM_FIRST_TOKEN_SECONDS.labels(section, model_name).observe(time.perf_counter() - start)
+                pieces.append(piece)
+                yield piece
+        finally:
+            await stream.aclose()
+            LLM_CALL_SECONDS.labels(section, model_name).observe(time.perf_counter() - start)
+
+    if cache is not None:
+        await asyncio.to_thread(cache.set, key, section, model_name, "".join(pieces), unit_of_property_id)
+
+
+async def stream_ai_content(
+    property_data: Dict,
+    description_gen: PropertyDescriptionGenerator,
+    letter_gen: ClientLetterGenerator,
+    client_name: str = "Property Owner",
+    purpose: str = "Valuation Report",
+    timeout: float = LLM_TIMEOUT_SECONDS,
+    cache: Optional[ContentCache] = None,
+) -> AsyncIterator[Tuple[str, str, str]]:
+    """
+    Stream the property description and client letter concurrently.
+
+    Args:
+        property_data: Dictionary containing property details
+        description_gen: Generator used for the property description
+        letter_gen: Generator used for the client letter
+        client_name: Name of the client
+        purpose: Purpose of the valuation
+        timeout: Longest wait for the next piece of a section, in seconds
+        cache: Optional content cache consulted before calling the model
+
+    Yields:
+        Tuple[str, str, str]: (event, section, value) where event is "delta"
+        (value is the next piece of text), "section_complete" (value is the
+        full section) or "section_error" (value is the error message). Each
+        section ends with exactly one complete or error event.
+    """
+    streams = {
+        "property_description": _stream_section(
+            cache,
+            description_gen,
+            "property_description",
+            description_gen.description_variables(property_data),
+            lambda: description_gen.astream_description(property_data),
+            timeout,
+            _property_id(property_data)
+        ),
+        "client_letter": _stream_section(
+            cache,
+            letter_gen,
+            "client_letter",
+            letter_gen.prompt_variables(property_data, client_name, purpose),
+            lambda: letter_gen.astream_client_letter(
+                property_data,
+                client_name=client_name,
+                purpose=purpose
+            ),
+            timeout,
+            _property_id(property_data)
+        ),
+    }
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def pump(section: str, stream: AsyncIterator[str]) -> None:
+        pieces = []
+        try:
+            async for piece in stream:
+                pieces.append(piece)
+                await events.put(("delta", section, piece))
+            await events.put(("section_complete", section, "".join(pieces)))
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out streaming {section} after {timeout}s without output")
+            await events.put(("section_error", section, f"Timed out after {timeout}s"))
+        except Exception as e:
+            logger.error(f"Error streaming {section}: {str(e)}")
+            await events.put(("section_error", section, str(e)))
+
+    tasks = [asyncio.create_task(pump(section, stream)) for section, stream in streams.items()]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await events.get()
+            if event[0] != "delta":
+                remaining -= 1
+            yield event
+    finally:
+        # The client may disconnect mid-stream
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
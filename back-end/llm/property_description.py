@@ -1,33 +1,46 @@
 from langchain_anthropic import ChatAnthropic
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict
+from langchain_core.language_models import BaseChatModel
+from typing import AsyncIterator, Dict, Optional
 import logging
 from .config import ANTHROPIC_API_KEY, CLAUDE_MODEL
 
 logger = logging.getLogger(__name__)
 
 class PropertyDescriptionGenerator:
-    def __init__(self):
-        self.model = ChatAnthropic(
+    # Bump whenever a prompt template changes so cached content is not reused
+    PROMPT_VERSION = "1"
+
+    def __init__(self, model: Optional[BaseChatModel] = None):
+        """
+        Args:
+            model: Chat model to generate with; defaults to Claude via
+                ChatAnthropic. Benchmarks pass a stand-in here.
+        """
+        self.model = model or ChatAnthropic(
             anthropic_api_key=ANTHROPIC_API_KEY,
             model_name=CLAUDE_MODEL,
             max_tokens=1000,
             temperature=0.7
         )
 
-    def generate_description(self, property_data: Dict) -> str:
-        """
-        Generate a detailed property description using Claude through LangChain.
-        
-        Args:
-            property_data: Dictionary containing property details
-            
-        Returns:
-            str: Generated property description
-        """
-        try:
-            # Create a prompt template
-            prompt = ChatPromptTemplate.from_template("""
+    def description_variables(self, property_data: Dict) -> Dict:
+        """Values formatted into the property description prompt, which also key its cached content."""
+        return {
+            "address": property_data['address']['full_address'],
+            "location": property_data['address']['town_city'],
+            "suburb": property_data['address']['suburb_locality'],
+            "category": property_data['valuation']['property_category'],
+            "actual_use": property_data['valuation']['actual_property_use'],
+            "bedrooms": property_data['valuation']['no_of_bedrooms'],
+            "building_area": property_data['valuation']['building_total_floor_area'],
+            "improvements": property_data['valuation']['improvements_description']
+        }
+
+    def _build_description_prompt(self, property_data: Dict):
+        """Format the property description prompt messages for a property."""
+        # Create a prompt template
+        prompt = ChatPromptTemplate.from_template("""
 Generate a professional property description for a valuation report using these details:
 
 Property Information:
@@ -49,17 +62,21 @@ Please write a detailed description that:
 The description should be factual and objective, suitable for a valuation report.
 """)
 
-            # Format the prompt with property data
-            formatted_prompt = prompt.format_messages(
-                address=property_data['address']['full_address'],
-                location=property_data['address']['town_city'],
-                suburb=property_data['address']['suburb_locality'],
-                category=property_data['valuation']['property_category'],
-                actual_use=property_data['valuation']['actual_property_use'],
-                bedrooms=property_data['valuation']['no_of_bedrooms'],
-                building_area=property_data['valuation']['building_total_floor_area'],
-                improvements=property_data['valuation']['improvements_description']
-            )
+        # Format the prompt with property data
+        return prompt.format_messages(**self.description_variables(property_data))
+
+    def generate_description(self, property_data: Dict) -> str:
+        """
+        Generate a detailed property description using Claude through LangChain.
+        
+        Args:
+            property_data: Dictionary containing property details
+            
+        Returns:
+            str: Generated property description
+        """
+        try:
+            formatted_prompt = self._build_description_prompt(property_data)
 
             # Generate the description using Claude through LangChain
             response = self.model.invoke(formatted_prompt)
@@ -70,19 +87,64 @@ The description should be factual and objective, suitable for a valuation report
             logger.error(f"Error generating property description: {str(e)}")
             raise Exception(f"Failed to generate property description: {str(e)}")
 
-    def generate_market_analysis(self, property_data: Dict, market_trends: Dict) -> str:
+    async def agenerate_description(self, property_data: Dict) -> str:
         """
-        Generate a market analysis section for the property using LangChain.
+        Async variant of generate_description using the model's ainvoke.
         
         Args:
             property_data: Dictionary containing property details
-            market_trends: Dictionary containing local market data
             
         Returns:
-            str: Generated market analysis
+            str: Generated property description
+        """
+        try:
+            formatted_prompt = self._build_description_prompt(property_data)
+
+            # Generate the description using Claude through LangChain
+            response = await self.model.ainvoke(formatted_prompt)
+            
+            return response.content
+
+        except Exception as e:
+            logger.error(f"Error generating property description: {str(e)}")
+            raise Exception(f"Failed to generate property description: {str(e)}") from e
+
+    async def astream_description(self, property_data: Dict) -> AsyncIterator[str]:
+        """
+        Stream the property description as it is generated, using the model's astream.
+        
+        Args:
+            property_data: Dictionary containing property details
+            
+        Yields:
+            str: Successive pieces of the description
         """
         try:
-            prompt = ChatPromptTemplate.from_template("""
+            formatted_prompt = self._build_description_prompt(property_data)
+
+            async for chunk in self.model.astream(formatted_prompt):
+                if chunk.content:
+                    yield chunk.content
+
+        except Exception as e:
+            logger.error(f"Error streaming property description: {str(e)}")
+            raise Exception(f"Failed to generate property description: {str(e)}") from e
+
+    def market_analysis_variables(self, property_data: Dict, market_trends: Dict) -> Dict:
+        """Values formatted into the market analysis prompt, which also key its cached content."""
+        return {
+            "location": property_data['address']['town_city'],
+            "suburb": property_data['address']['suburb_locality'],
+            "property_type": property_data['valuation']['property_category'],
+            "current_value": property_data['valuation']['capital_value'],
+            "median_price": market_trends.get('median_price', 'N/A'),
+            "price_trend": market_trends.get('price_trend', 'N/A'),
+            "market_activity": market_trends.get('market_activity', 'N/A')
+        }
+
+    def _build_market_analysis_prompt(self, property_data: Dict, market_trends: Dict):
+        """Format the market analysis prompt messages for a property."""
+        prompt = ChatPromptTemplate.from_template("""
 Generate a market analysis section for this property:
 
 Property Details:
@@ -105,16 +167,24 @@ Please provide a concise market analysis that:
 Keep the analysis factual and evidence-based.
 """)
 
-            # Format the prompt with property data
-            formatted_prompt = prompt.format_messages(
-                location=property_data['address']['town_city'],
-                suburb=property_data['address']['suburb_locality'],
-                property_type=property_data['valuation']['property_category'],
-                current_value=property_data['valuation']['capital_value'],
-                median_price=market_trends.get('median_price', 'N/A'),
-                price_trend=market_trends.get('price_trend', 'N/A'),
-                market_activity=market_trends.get('market_activity', 'N/A')
-            )
+        # Format the prompt with property data
+        return prompt.format_messages(
+            **self.market_analysis_variables(property_data, market_trends)
+        )
+
+    def generate_market_analysis(self, property_data: Dict, market_trends: Dict) -> str:
+        """
+        Generate a market analysis section for the property using LangChain.
+        
+        Args:
+            property_data: Dictionary containing property details
+            market_trends: Dictionary containing local market data
+            
+        Returns:
+            str: Generated market analysis
+        """
+        try:
+            formatted_prompt = self._build_market_analysis_prompt(property_data, market_trends)
 
             # Generate the analysis using Claude through LangChain
             response = self.model.invoke(formatted_prompt)
@@ -124,3 +194,26 @@ Keep the analysis factual and evidence-based.
         except Exception as e:
             logger.error(f"Error generating market analysis: {str(e)}")
             raise Exception(f"Failed to generate market analysis: {str(e)}")
+
+    async def agenerate_market_analysis(self, property_data: Dict, market_trends: Dict) -> str:
+        """
+        Async variant of generate_market_analysis using the model's ainvoke.
+        
+        Args:
+            property_data: Dictionary containing property details
+            market_trends: Dictionary containing local market data
+            
+        Returns:
+            str: Generated market analysis
+        """
+        try:
+            formatted_prompt = self._build_market_analysis_prompt(property_data, market_trends)
+
+            # Generate the analysis using Claude through LangChain
+            response = await self.model.ainvoke(formatted_prompt)
+            
+            return response.content
+
+        except Exception as e:
+            logger.error(f"Error generating market analysis: {str(e)}")
+            raise Exception(f"Failed to generate market analysis: {str(e)}") from e
@@ -1,43 +1,102 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-from sqlalchemy import event, text
-from sqlalchemy.engine import Engine
+from sqlalchemy import text
 import time
-import json
+import asyncio
+
+from instrumentation import (
+    ROW_CONVERSION_SECONDS,
+    configure_logging,
+    install_request_metrics,
+    install_sql_instrumentation,
+)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 import models
 import schemas
-from database import engine, get_db
+from database import engine, get_async_db, async_session, SessionLocal, AsyncSessionLocal
 from llm.client_letter import ClientLetterGenerator
 from llm.property_description import PropertyDescriptionGenerator
+from llm.generation import (
+    generate_ai_content,
+    generate_ai_content_batch,
+    generate_market_analysis,
+    stream_ai_content,
+)
+from llm.cache import ContentCache
+from llm.config import LLM_CACHE_ENABLED
+from address_index import AddressPrefixIndex
+from address_normalization import normalize_address
+from data_version import DataVersionTracker
+from search_cursor import CONTAINS_TIER, PREFIX_TIER, decode_cursor, encode_cursor
+from search_cache import SearchResultCache
+from config import BATCH_LOOKUP_MAX_ROWS, SEARCH_CACHE_ENABLED
+from serialization import PROPERTY_COLUMNS, dumps, row_to_property_data
+from report_jobs import JobQueueFull, ReportJobQueue
+from market_stats import MarketStatsStore, market_trends_for
+from comparables import ComparablesIndex
+from spatial import SpatialIndex
+from analytics import AnalyticsStore, SnapshotUnavailable
+import export
+
+# Rows fetched per round trip by streaming endpoints
+STREAM_BATCH_SIZE = 500
 
 # Initialize LLM generators
 client_letter_gen = ClientLetterGenerator()
 property_desc_gen = PropertyDescriptionGenerator()
+content_cache = ContentCache(SessionLocal) if LLM_CACHE_ENABLED else None
+
+# Versions of the imported datasets, bumped by the importers after each load
+data_versions = DataVersionTracker(SessionLocal, async_session_factory=async_session)
+address_index = AddressPrefixIndex(SessionLocal, data_versions)
+search_cache = SearchResultCache(data_versions) if SEARCH_CACHE_ENABLED else None
+market_stats = MarketStatsStore(SessionLocal, data_versions)
+comparables_index = ComparablesIndex(SessionLocal, data_versions)
+spatial_index = SpatialIndex(SessionLocal, data_versions)
+analytics = AnalyticsStore(data_versions)
 
-# Log SQL queries
-@event.listens_for(Engine, "before_cursor_execute")
-def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-    conn.info.setdefault('query_start_time', []).append(time.time())
-    logger.info(f"SQL Query: {statement}")
-    logger.info(f"Parameters: {parameters}")
+# Time SQL statements and log slow ones
+install_sql_instrumentation()
 
-@event.listens_for(Engine, "after_cursor_execute")
-def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
-    total = time.time() - conn.info['query_start_time'].pop(-1)
-    logger.info(f"Total Time: {total:.3f}s")
+# Create the tables the API owns. The imported tables are created by
+# data_process with their full columns; creating them here from the models'
+# subset of columns would send the first import down the incremental path.
+models.Base.metadata.create_all(
+    bind=engine,
+    tables=[models.LLMContentCache.__table__, models.ReportJob.__table__],
+)
+# create_all doesn't add columns to existing tables
+with engine.begin() as connection:
+    connection.execute(text("""
+        ALTER TABLE llm_content_cache ADD COLUMN IF NOT EXISTS unit_of_property_id VARCHAR
+    """))
+    connection.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_llm_content_cache_unit_of_property_id
+        ON llm_content_cache (unit_of_property_id)
+    """))
 
-# Create the database tables
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Data versions are polled and report job workers run on this event loop
+    await data_versions.start()
+    await report_jobs.start()
+    address_index.build_in_background()
+    comparables_index.warm_in_background()
+    yield
+    await report_jobs.stop()
+    await data_versions.stop()
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -46,114 +105,535 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# In-flight requests and per-route latency, exported on /metrics
+install_request_metrics(app)
+
 @app.get("/test")
 def test_endpoint():
     return {"message": "API is working"}
 
-@app.post("/properties/search")
-def search_properties(search_criteria: schemas.PropertySearch, db: Session = Depends(get_db)):
+@app.get("/metrics")
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# property_search is the denormalized valuation/address join built by the
+# importers (data_process/property_search.py). Rows are mapped positionally
+# by row_to_property_data, so PROPERTY_COLUMNS must come first.
+PROPERTY_COLUMNS_SQL = f"""
+    SELECT {', '.join(PROPERTY_COLUMNS)}
+    FROM property_search
+"""
+
+@app.get("/addresses/autocomplete")
+def autocomplete_addresses(
+    q: str = Query(..., min_length=1, max_length=200, description="Address typed so far"),
+    limit: int = Query(10, ge=1, le=50)
+):
     try:
-        logger.info(f"Received search criteria: {search_criteria.dict()}")
-
-        # Use raw SQL query
-        sql = text("""
-            SELECT 
-                a.unit_of_property_id,
-                a.valuation_no_roll,
-                a.capital_value,
-                a.improvements_value,
-                a.land_value,
-                a.no_of_bedrooms,
-                a.improvements_description,
-                a.building_total_floor_area,
-                a.property_category,
-                a.actual_property_use,
-                a.legal_description,
-                c.address_id,
-                c.full_address,
-                c.town_city,
-                c.suburb_locality,
-                c.territorial_authority,
-                c.full_road_name,
-                c.address_number
-            FROM nz_valuation_roll a
-            INNER JOIN nz_property_address_ref b ON a.unit_of_property_id = b.unit_of_property_id
-            INNER JOIN nz_addresses c ON b.address_id = c.address_id
-            WHERE c.full_address LIKE :address
-        """)
-        
-        # Execute the query with parameters
-        search_term = f"%{search_criteria.address}%"
-        logger.info(f"Executing search with term: {search_term}")
-        
-        result = db.execute(sql, {"address": search_term})
-        
-        # Get column names
-        columns = result.keys()
-        logger.info(f"Query columns: {columns}")
-        
-        # Convert results to list of dictionaries
-        response_data = []
-        for row in result:
-            # Convert row to dictionary with column names
-            row_dict = dict(zip(columns, row))
-            logger.info(f"Processing row: {row_dict}")
-            
-            # Create property data dictionary
-            property_data = {
-                "valuation": {
-                    "unit_of_property_id": row_dict["unit_of_property_id"],
-                    "valuation_no_roll": row_dict["valuation_no_roll"],
-                    "capital_value": row_dict["capital_value"],
-                    "improvements_value": row_dict["improvements_value"],
-                    "land_value": row_dict["land_value"],
-                    "no_of_bedrooms": row_dict["no_of_bedrooms"],
-                    "improvements_description": row_dict["improvements_description"],
-                    "building_total_floor_area": row_dict["building_total_floor_area"],
-                    "property_category": row_dict["property_category"],
-                    "actual_property_use": row_dict["actual_property_use"],
-                    "legal_description": row_dict["legal_description"]
-                },
-                "address": {
-                    "address_id": row_dict["address_id"],
-                    "full_address": row_dict["full_address"],
-                    "town_city": row_dict["town_city"],
-                    "suburb_locality": row_dict["suburb_locality"],
-                    "territorial_authority": row_dict["territorial_authority"],
-                    "full_road_name": row_dict["full_road_name"],
-                    "address_number": row_dict["address_number"]
-                }
-            }
+        return address_index.suggest(q, limit)
+    except Exception as e:
+        logger.error(f"Error during autocomplete: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Results come in two tiers: addresses starting with the term, so an exact
+# address comes first, then the other addresses containing it. Within a tier
+# matches are paged in (full_address_normalized, unit_of_property_id,
+# address_id) order, the key of a btree index, so every page is an index
+# range scan from the cursor rather than a rescan and sort of all matches,
+# which a keyset ranked by similarity would need. full_address_normalized
+# uses the "C" collation, so the prefix tier is a plain range of that index;
+# the other tier is served by the trigram index.
+SEARCH_COLUMNS_SQL = f"""
+    SELECT {', '.join(PROPERTY_COLUMNS)}, full_address_normalized
+    FROM property_search
+"""
+
+SEARCH_TIER_SQL = {
+    PREFIX_TIER: SEARCH_COLUMNS_SQL + """
+        WHERE full_address_normalized >= :term AND full_address_normalized < :term_end
+    """,
+    CONTAINS_TIER: SEARCH_COLUMNS_SQL + """
+        WHERE full_address_normalized LIKE '%' || :term || '%'
+          AND full_address_normalized NOT LIKE :term || '%'
+    """,
+}
+
+SEARCH_KEYSET_SQL = """
+    AND (full_address_normalized, unit_of_property_id, address_id)
+        > (:cursor_full_address_normalized, :cursor_unit_of_property_id,
+           CAST(:cursor_address_id AS bigint))
+"""
+
+SEARCH_ORDER_SQL = """
+    ORDER BY full_address_normalized, unit_of_property_id, address_id
+    LIMIT :limit
+"""
+
+def search_term_params(address: str) -> Dict[str, str]:
+    """
+    Query parameters for the normalized search term.
+
+    term_end is the smallest string greater than every string starting with
+    term, which bounds the prefix tier. Normalized terms are non-empty and
+    made of letters, digits, "/" and spaces, so the last character can
+    always be incremented.
+    """
+    term = normalize_address(address)
+    return {"term": term, "term_end": term[:-1] + chr(ord(term[-1]) + 1)}
+
+def search_response(body: bytes, next_cursor: Optional[str]) -> Response:
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# The handler returns pre-encoded JSON; response_model documents its shape
+@app.post("/properties/search", response_model=List[schemas.PropertyResponse])
+async def search_properties(search_criteria: schemas.PropertySearch):
+    try:
+        logger.debug("Received search criteria: %s", search_criteria)
+
+        # Popular searches are answered from the cache without a connection
+        cache_key = None
+        if search_cache is not None:
+            cache_key = search_cache.make_key(
+                search_criteria.address, search_criteria.limit, search_criteria.cursor
+            )
+            cached = await search_cache.get(cache_key)
+            if cached is not None:
+                return search_response(*cached)
 
+        params = search_term_params(search_criteria.address)
+        tier = PREFIX_TIER
+        keyset = ""
+        if search_criteria.cursor:
             try:
-                # Generate property description
-                property_description = property_desc_gen.generate_description(property_data)
-                
-                # Generate client letter (using default values for client name and purpose)
-                client_letter = client_letter_gen.generate_client_letter(
-                    property_data,
-                    client_name="Property Owner",
-                    purpose="Valuation Report"
-                )
-
-                # Add AI content to response
-                property_data["AI_content"] = {
-                    "property_description": property_description,
-                    "client_letter": client_letter
-                }
-            except Exception as e:
-                logger.error(f"Error generating LLM content: {str(e)}")
-                property_data["AI_content"] = {
-                    "error": f"Failed to generate content: {str(e)}"
-                }
-
-            response_data.append(property_data)
-
-        logger.info(f"Found {len(response_data)} matching properties")
-        return response_data
+                params.update(decode_cursor(search_criteria.cursor))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            tier = params["cursor_tier"]
+            keyset = SEARCH_KEYSET_SQL
 
+        # One extra row is requested to tell whether another page exists. A
+        # page that exhausts the prefix tier carries on into the other one.
+        rows = []
+        async with async_session() as db:
+            while True:
+                sql = text(SEARCH_TIER_SQL[tier] + keyset + SEARCH_ORDER_SQL)
+                params["limit"] = search_criteria.limit + 1 - len(rows)
+                rows += [(tier, row) for row in (await db.execute(sql, params)).fetchall()]
+                if len(rows) > search_criteria.limit or tier == CONTAINS_TIER:
+                    break
+                tier, keyset = CONTAINS_TIER, ""
+
+        # Map rows straight onto the response structure and encode them once;
+        # the bytes are what gets cached. AI content is not generated here;
+        # the front-end requests it per property from /ai-content.
+        page = rows[:search_criteria.limit]
+        start = time.perf_counter()
+        response_data = [row_to_property_data(row) for _, row in page]
+        ROW_CONVERSION_SECONDS.labels("search").observe(time.perf_counter() - start)
+        body = dumps(response_data)
+
+        next_cursor = encode_cursor(*page[-1]) if len(rows) > search_criteria.limit else None
+
+        logger.debug("Found %d matching properties", len(response_data))
+        if search_cache is not None:
+            await search_cache.set(cache_key, body, next_cursor)
+        return search_response(body, next_cursor)
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during search: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/properties/search/stream")
+def stream_search_properties(search_criteria: schemas.PropertySearchStream):
+    """
+    Stream every match as newline-delimited JSON.
+
+    Rows are read through a server-side cursor and written as they arrive,
+    so memory stays bounded and the first results go out immediately. The
+    stream is in index order rather than ranked, since ranking would have
+    to read every match before sending the first.
+    """
+    sql = text(PROPERTY_COLUMNS_SQL + """
+        WHERE full_address_normalized LIKE '%' || normalize_address(:address) || '%'
+    """).execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+
+    async def generate_rows():
+        # The request's dependency session is closed before a streamed body
+        # is sent, so the generator owns its own session
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(sql, {"address": search_criteria.address})
+            async for row in result:
+                yield dumps(row_to_property_data(row)) + b"\n"
+
+    return StreamingResponse(generate_rows(), media_type="application/x-ndjson")
+
+@app.post("/properties/export")
+async def export_properties(request: schemas.PropertyExportRequest):
+    """
+    Stream every property matching the filters as a CSV or Parquet download.
+
+    CSV comes straight from COPY TO STDOUT and Parquet is written a row group
+    at a time from a server-side cursor, so memory use does not depend on
+    the size of the extract.
+    """
+    if request.format == "parquet" and not export.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires the pyarrow package")
+
+    query, args = export.build_export_query(request)
+    if request.format == "parquet":
+        chunks = export.parquet_chunks(query, args)
+        media_type, filename = "application/vnd.apache.parquet", "properties.parquet"
+    elif request.gzip:
+        chunks = export.gzip_chunks(export.csv_chunks(query, args))
+        media_type, filename = "application/gzip", "properties.csv.gz"
+    else:
+        chunks = export.csv_chunks(query, args)
+        media_type, filename = "text/csv", "properties.csv"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Each requested identifier is left joined so misses are reported too. The
+# three lists are resolved set-wise in one statement.
+BATCH_LOOKUP_SQL = f"""
+    SELECT 'unit_of_property_id' AS match_type, r.requested, {', '.join('ps.' + c for c in PROPERTY_COLUMNS)}
+    FROM unnest(CAST(:unit_of_property_ids AS text[])) AS r(requested)
+    LEFT JOIN property_search ps ON ps.unit_of_property_id = r.requested
+    UNION ALL
+    SELECT 'valuation_no_roll', r.requested::text, {', '.join('ps.' + c for c in PROPERTY_COLUMNS)}
+    FROM unnest(CAST(:valuation_no_rolls AS integer[])) AS r(requested)
+    LEFT JOIN property_search ps ON ps.valuation_no_roll = r.requested
+    UNION ALL
+    SELECT 'address', r.requested, {', '.join('ps.' + c for c in PROPERTY_COLUMNS)}
+    FROM unnest(CAST(:addresses AS text[])) AS r(requested)
+    LEFT JOIN property_search ps ON ps.full_address_normalized = normalize_address(r.requested)
+    LIMIT :row_limit
+"""
+
+@app.post("/properties/batch")
+async def batch_lookup_properties(request: schemas.PropertyBatchRequest):
+    """
+    Resolve a portfolio of properties in a single query, streamed as NDJSON.
+
+    Each line carries match_type and requested (the identifier as sent)
+    so results can be matched to inputs; identifiers with no match are
+    returned once with null valuation and address. Lines are not in
+    request order.
+
+    A valuation roll can hold thousands of properties, so at most
+    BATCH_LOOKUP_MAX_ROWS lines are returned. When the cap is reached the
+    last line is {"truncated": true, "max_rows": ...}; split the request
+    to get the rest.
+    """
+    params = {
+        "unit_of_property_ids": list(dict.fromkeys(request.unit_of_property_ids)),
+        "valuation_no_rolls": list(dict.fromkeys(request.valuation_no_rolls)),
+        "addresses": list(dict.fromkeys(request.addresses)),
+        # One extra row to tell whether the result was cut short
+        "row_limit": BATCH_LOOKUP_MAX_ROWS + 1,
+    }
+    sql = text(BATCH_LOOKUP_SQL).execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+
+    async def generate_rows():
+        async with async_session() as db:
+            result = await db.stream(sql, params)
+            rows = 0
+            async for row in result:
+                rows += 1
+                if rows > BATCH_LOOKUP_MAX_ROWS:
+                    yield dumps({"truncated": True, "max_rows": BATCH_LOOKUP_MAX_ROWS}) + b"\n"
+                    break
+                if row.unit_of_property_id is None:
+                    property_data = {"valuation": None, "address": None}
+                else:
+                    property_data = row_to_property_data(row[2:])
+                yield dumps({
+                    "match_type": row.match_type,
+                    "requested": row.requested,
+                    **property_data
+                }) + b"\n"
+
+    return StreamingResponse(generate_rows(), media_type="application/x-ndjson")
+
+async def fetch_property_data(db: AsyncSession, unit_of_property_ids: List[str]) -> dict:
+    """Load property data for the given ids, keyed by unit_of_property_id."""
+    sql = text(PROPERTY_COLUMNS_SQL + """
+        WHERE unit_of_property_id = ANY(:unit_of_property_ids)
+    """)
+    result = await db.execute(sql, {"unit_of_property_ids": list(unit_of_property_ids)})
+    rows = result.all()
+    start = time.perf_counter()
+    properties = {}
+    for row in rows:
+        # Keep the first address for properties with several
+        if row.unit_of_property_id not in properties:
+            properties[row.unit_of_property_id] = row_to_property_data(row)
+    ROW_CONVERSION_SECONDS.labels("property_data").observe(time.perf_counter() - start)
+    return properties
+
+async def load_property(unit_of_property_id: str) -> Optional[Dict]:
+    async with async_session() as db:
+        properties = await fetch_property_data(db, [unit_of_property_id])
+    return properties.get(unit_of_property_id)
+
+# Background report generation, started by lifespan
+report_jobs = ReportJobQueue(load_property, property_desc_gen, client_letter_gen, cache=content_cache)
+
+@app.get("/properties/{unit_of_property_id}/ai-content")
+async def get_ai_content(
+    unit_of_property_id: str,
+    client_name: str = Query("Property Owner", min_length=1, max_length=200),
+    purpose: str = Query("Valuation Report", min_length=1, max_length=200),
+    db: AsyncSession = Depends(get_async_db)
+):
+    properties = await fetch_property_data(db, [unit_of_property_id])
+    # Release the connection before the slow LLM calls
+    await db.close()
+    if unit_of_property_id not in properties:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+    # Description and client letter are generated concurrently
+    ai_content = await generate_ai_content(
+        properties[unit_of_property_id],
+        property_desc_gen,
+        client_letter_gen,
+        client_name=client_name,
+        purpose=purpose,
+        cache=content_cache
+    )
+    if "property_description" not in ai_content and "client_letter" not in ai_content:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to generate content: {ai_content['errors']}"
+        )
+    return ai_content
+
+def sse_event(event: str, data) -> bytes:
+    """Encode one server-sent event."""
+    return b"event: " + event.encode("ascii") + b"\ndata: " + dumps(data) + b"\n\n"
+
+# Payload key of each stream_ai_content event
+SSE_VALUE_KEYS = {"delta": "text", "section_complete": "content", "section_error": "error"}
+
+@app.get("/properties/{unit_of_property_id}/ai-content/stream")
+async def stream_ai_content_events(
+    unit_of_property_id: str,
+    client_name: str = Query("Property Owner", min_length=1, max_length=200),
+    purpose: str = Query("Valuation Report", min_length=1, max_length=200)
+):
+    """
+    Stream the description and client letter as server-sent events.
+
+    Both sections are generated concurrently and their delta events are
+    interleaved, each tagged with its section. Every section finishes with a
+    section_complete or section_error event, and the stream ends with done.
+    """
+    property_data = await load_property(unit_of_property_id)
+    if property_data is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+    async def generate_events():
+        async for event, section, value in stream_ai_content(
+            property_data,
+            property_desc_gen,
+            client_letter_gen,
+            client_name=client_name,
+            purpose=purpose,
+            cache=content_cache
+        ):
+            yield sse_event(event, {"section": section, SSE_VALUE_KEYS[event]: value})
+        yield sse_event("done", {})
+
+    return StreamingResponse(
+        generate_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/properties/ai-content")
+async def get_ai_content_batch(request: schemas.AIContentBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    properties = await fetch_property_data(db, request.unit_of_property_ids)
+    await db.close()
+    found_ids = [uid for uid in dict.fromkeys(request.unit_of_property_ids) if uid in properties]
+
+    ai_contents = await generate_ai_content_batch(
+        [properties[uid] for uid in found_ids],
+        property_desc_gen,
+        client_letter_gen,
+        client_name=request.client_name,
+        purpose=request.purpose,
+        cache=content_cache
+    )
+    return [
+        {"unit_of_property_id": uid, "AI_content": ai_content}
+        for uid, ai_content in zip(found_ids, ai_contents)
+    ]
+
+async def load_market_stats(property_data: Dict) -> Dict:
+    address = property_data["address"]
+    return await asyncio.to_thread(
+        market_stats.lookup,
+        address["territorial_authority"],
+        address["suburb_locality"],
+        property_data["valuation"]["property_category"]
+    )
+
+@app.get("/properties/{unit_of_property_id}/market-stats")
+async def get_market_stats(unit_of_property_id: str):
+    """Precomputed statistics for the property's suburb and territorial authority."""
+    property_data = await load_property(unit_of_property_id)
+    if property_data is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return await load_market_stats(property_data)
+
+@app.get("/properties/{unit_of_property_id}/market-analysis")
+async def get_market_analysis(unit_of_property_id: str):
+    property_data = await load_property(unit_of_property_id)
+    if property_data is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+    stats = await load_market_stats(property_data)
+    market_trends = market_trends_for(property_data, stats)
+    try:
+        analysis = await generate_market_analysis(
+            property_data,
+            market_trends,
+            property_desc_gen,
+            cache=content_cache
+        )
+    except Exception as e:
+        logger.error(f"Error generating market analysis: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Failed to generate market analysis: {str(e)}")
+    return {"market_trends": market_trends, "market_stats": stats, "market_analysis": analysis}
+
+@app.get("/properties/{unit_of_property_id}/comparables")
+async def get_comparables(unit_of_property_id: str, k: int = Query(10, ge=1, le=50)):
+    """
+    The k most similar properties in the same territorial authority and
+    property category, closest first, preferring the same suburb.
+    """
+    property_data = await load_property(unit_of_property_id)
+    if property_data is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+    try:
+        nearest = await asyncio.to_thread(
+            comparables_index.find,
+            unit_of_property_id,
+            property_data["address"]["territorial_authority"],
+            property_data["valuation"]["property_category"],
+            k
+        )
+        async with async_session() as db:
+            properties = await fetch_property_data(db, [uid for uid, _ in nearest])
+    except Exception as e:
+        logger.error(f"Error finding comparables: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return [
+        {"distance": distance, **properties[uid]}
+        for uid, distance in nearest
+        if uid in properties
+    ]
+
+@app.get("/properties/nearby")
+async def get_nearby_properties(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_m: float = Query(500, ge=1, le=5000),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Properties within radius_m metres of the point, closest first."""
+    try:
+        return await asyncio.to_thread(spatial_index.within, latitude, longitude, radius_m, limit)
+    except Exception as e:
+        logger.error(f"Error searching nearby properties: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/properties/nearest")
+async def get_nearest_properties(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    n: int = Query(10, ge=1, le=100)
+):
+    """The n properties closest to the point, closest first."""
+    try:
+        return await asyncio.to_thread(spatial_index.nearest, latitude, longitude, n)
+    except Exception as e:
+        logger.error(f"Error finding nearest properties: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def analytics_filters(
+    territorial_authority: Optional[str] = None,
+    suburb_locality: Optional[str] = None,
+    town_city: Optional[str] = None,
+    property_category: Optional[str] = None
+) -> Dict[str, Optional[str]]:
+    return {
+        "territorial_authority": territorial_authority,
+        "suburb_locality": suburb_locality,
+        "town_city": town_city,
+        "property_category": property_category,
+    }
+
+async def run_analytics(method, *args):
+    try:
+        return await asyncio.to_thread(method, *args)
+    except SnapshotUnavailable:
+        raise HTTPException(status_code=503, detail="Analytics snapshot has not been exported yet")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error computing analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/analytics/summary")
+async def get_analytics_summary(
+    field: str = "capital_value",
+    group_by: str = "suburb_locality",
+    filters: Dict[str, Optional[str]] = Depends(analytics_filters)
+):
+    """Count, mean and quantiles of field for each group_by value, from the columnar snapshot."""
+    return await run_analytics(analytics.summary, field, group_by, filters)
+
+@app.get("/analytics/distribution")
+async def get_analytics_distribution(
+    field: str = "capital_value",
+    bins: int = Query(20, ge=1, le=200),
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    filters: Dict[str, Optional[str]] = Depends(analytics_filters)
+):
+    """Histogram of field over the matching properties, from the columnar snapshot."""
+    return await run_analytics(analytics.distribution, field, bins, filters, min_value, max_value)
+
+@app.post("/reports/jobs", status_code=202)
+async def submit_report_job(request: schemas.ReportJobRequest):
+    if await load_property(request.unit_of_property_id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    try:
+        return await report_jobs.submit(request.unit_of_property_id, request.client_name, request.purpose)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="Report job queue is full, please retry later")
+
+@app.get("/reports/jobs/{job_id}")
+async def get_report_job(job_id: str):
+    job = await report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/cache/stats")
+def cache_stats():
+    if content_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **content_cache.stats()}
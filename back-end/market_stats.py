@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Value data_process/market_stats.py uses for a rolled-up suburb or category
+ALL = "*"
+
+
+class MarketStatsStore:
+    """
+    In-process copy of the market_stats table built by the importers.
+
+    The table holds a few rows per suburb, so it is loaded whole and looked
+    up by (territorial authority, suburb, category) in a dict. It is reloaded
+    when the importers bump the market_stats data version.
+    """
+
+    def __init__(self, session_factory, versions):
+        self.session_factory = session_factory
+        self.versions = versions
+        self._stats: Dict[Tuple[str, str, str], Dict] = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def lookup(self, territorial_authority: Optional[str], suburb_locality: Optional[str],
+               property_category: Optional[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Statistics for a property's area, from most to least specific.
+
+        Returns:
+            Dict: market_stats rows (or None) for the suburb and category, the
+            whole suburb, the territorial authority and category, and the whole
+            territorial authority
+        """
+        self._ensure_current()
+        ta = territorial_authority or ""
+        suburb = suburb_locality or ""
+        category = property_category or ""
+        stats = self._stats
+        return {
+            "suburb_category": stats.get((ta, suburb, category)),
+            "suburb": stats.get((ta, suburb, ALL)),
+            "territorial_authority_category": stats.get((ta, ALL, category)),
+            "territorial_authority": stats.get((ta, ALL, ALL)),
+        }
+
+    def _ensure_current(self) -> None:
+        version = self.versions.get("market_stats")
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            try:
+                with self.session_factory() as db:
+                    rows = db.execute(text("SELECT * FROM market_stats")).mappings().all()
+                self._stats = {
+                    (row["territorial_authority"], row["suburb_locality"], row["property_category"]): dict(row)
+                    for row in rows
+                }
+                logger.info(f"Loaded {len(self._stats)} market statistics rows")
+            except Exception as e:
+                # Table not built yet; retry at the next data version
+                logger.warning(f"Could not load market_stats: {str(e)}")
+            self._version = version
+
+
+def market_trends_for(property_data: Dict, stats: Dict[str, Optional[Dict]]) -> Dict:
+    """
+    Summarize the area statistics as the market_trends generate_market_analysis expects.
+
+    The valuation roll holds current valuations only, with no sales history,
+    so the "trend" compares the local market with its wider area rather than
+    over time.
+    """
+    address = property_data["address"]
+    local = stats["suburb_category"] or stats["suburb"]
+    wider = stats["territorial_authority_category"] or stats["territorial_authority"]
+    area = address["suburb_locality"]
+    if local is None:
+        local, wider, area = wider, None, address["territorial_authority"]
+    if local is None or local["capital_value_median"] is None:
+        return {}
+
+    trends = {"median_price": f"{local['capital_value_median']:,}"}
+
+    price_trend = (
+        f"Middle half of capital values in {area} range from "
+        f"${local['capital_value_p25']:,} to ${local['capital_value_p75']:,}"
+    )
+    if wider is not None and wider["capital_value_median"]:
+        difference = local["capital_value_median"] / wider["capital_value_median"] - 1
+        price_trend += (
+            f"; the local median is {abs(difference):.0%} "
+            f"{'above' if difference >= 0 else 'below'} the {address['territorial_authority']} median"
+        )
+    trends["price_trend"] = price_trend
+
+    activity = [f"{local['property_count']:,} comparable properties in {area}"]
+    if local["value_per_sqm_median"]:
+        activity.append(f"median ${local['value_per_sqm_median']:,} per sqm of floor area")
+    bedrooms = {k: v for k, v in (local["bedroom_distribution"] or {}).items() if k != "unknown" and v}
+    known = sum(bedrooms.values())
+    if known:
+        activity.append("bedrooms: " + ", ".join(
+            f"{beds} ({count / known:.0%})" for beds, count in bedrooms.items()
+        ))
+    trends["market_activity"] = "; ".join(activity)
+    return trends
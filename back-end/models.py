@@ -1,17 +1,17 @@
-from sqlalchemy import Column, String, Integer, Text
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Text, DateTime, JSON, func
 from database import Base
 
 class ValuationRoll(Base):
     __tablename__ = "nz_valuation_roll"
 
     unit_of_property_id = Column(String, primary_key=True)
-    valuation_no_roll = Column(String)
-    capital_value = Column(String)
-    improvements_value = Column(String)
-    land_value = Column(String)
-    no_of_bedrooms = Column(String)
+    valuation_no_roll = Column(Integer)
+    capital_value = Column(BigInteger)
+    improvements_value = Column(BigInteger)
+    land_value = Column(BigInteger)
+    no_of_bedrooms = Column(Integer)
     improvements_description = Column(String)
-    building_total_floor_area = Column(String)
+    building_total_floor_area = Column(Integer)
     property_category = Column(String)
     actual_property_use = Column(String)
     legal_description = Column(String)
@@ -19,18 +19,77 @@ class ValuationRoll(Base):
 class PropertyAddressRef(Base):
     __tablename__ = "nz_property_address_ref"
 
-    id = Column(String, primary_key=True)
-    unit_of_property_id = Column(String)
-    address_id = Column(String)
+    id = Column(BigInteger, primary_key=True)
+    unit_of_property_id = Column(String, index=True)
+    address_id = Column(BigInteger, index=True)
 
 class Address(Base):
     __tablename__ = "nz_addresses"
 
     id = Column(Integer, primary_key=True)
-    address_id = Column(String)
+    address_id = Column(BigInteger, unique=True)
     full_address = Column(Text)
     town_city = Column(Text)
     suburb_locality = Column(Text)
     territorial_authority = Column(Text)
     full_road_name = Column(Text)
-    address_number = Column(Text)
+    address_number = Column(Integer)
+
+class PropertySearch(Base):
+    """Denormalized valuation/address rows, rebuilt by the importers."""
+    __tablename__ = "property_search"
+
+    unit_of_property_id = Column(String, primary_key=True)
+    address_id = Column(BigInteger, primary_key=True)
+    valuation_no_roll = Column(Integer)
+    capital_value = Column(BigInteger)
+    improvements_value = Column(BigInteger)
+    land_value = Column(BigInteger)
+    no_of_bedrooms = Column(Integer)
+    improvements_description = Column(String)
+    building_total_floor_area = Column(Integer)
+    property_category = Column(String)
+    actual_property_use = Column(String)
+    legal_description = Column(String)
+    full_address = Column(Text)
+    town_city = Column(Text)
+    suburb_locality = Column(Text)
+    territorial_authority = Column(Text)
+    full_road_name = Column(Text)
+    address_number = Column(Integer)
+    full_address_normalized = Column(Text)
+    longitude = Column(Float)
+    latitude = Column(Float)
+
+class LLMContentCache(Base):
+    __tablename__ = "llm_content_cache"
+
+    cache_key = Column(String(64), primary_key=True)
+    section = Column(String, nullable=False)
+    model_name = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_accessed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+    hit_count = Column(Integer, nullable=False, server_default="0")
+    # Property the content was generated for, so importers can invalidate
+    # just the properties whose data changed
+    unit_of_property_id = Column(String, index=True)
+
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+
+    id = Column(String(36), primary_key=True)
+    unit_of_property_id = Column(String, nullable=False)
+    client_name = Column(String, nullable=False)
+    purpose = Column(String, nullable=False)
+    # queued, running, succeeded or failed
+    status = Column(String, nullable=False, index=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    result = Column(JSON)
+    errors = Column(JSON)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    # Lease held by the worker running the job, renewed while it runs
+    worker_id = Column(String)
+    locked_until = Column(DateTime(timezone=True))
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import JSON, text
+
+from config import (
+    REPORT_JOB_LEASE_SECONDS,
+    REPORT_JOB_MAX_ATTEMPTS,
+    REPORT_JOB_MAX_RETRIES,
+    REPORT_JOB_POLL_SECONDS,
+    REPORT_JOB_QUEUE_SIZE,
+    REPORT_JOB_WORKERS,
+)
+from database import async_session
+from llm.cache import ContentCache
+from llm.client_letter import ClientLetterGenerator
+from llm.generation import generate_ai_content
+from llm.property_description import PropertyDescriptionGenerator
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS_SQL = """
+    SELECT id, unit_of_property_id, client_name, purpose, status, attempts,
+        result, errors, created_at, started_at, finished_at
+    FROM report_jobs
+"""
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class ReportJobQueue:
+    """
+    Background generation of report content.
+
+    Jobs are persisted in the report_jobs table and run by a pool of asyncio
+    workers, so HTTP requests only submit and poll. The table is the queue:
+    several processes can serve the API, and each worker claims the oldest
+    job with SELECT ... FOR UPDATE SKIP LOCKED and holds a lease on it
+    (worker_id, locked_until) that it renews while running. Jobs whose
+    lease expired, because their process died, are claimed again by any
+    worker; jobs held by live workers are never taken, and a job claimed
+    max_attempts times without finishing is marked failed rather than
+    claimed again. Rate limited or timed out LLM calls are retried with
+    backoff.
+    """
+
+    def __init__(
+        self,
+        load_property: Callable[[str], Awaitable[Optional[Dict]]],
+        description_gen: PropertyDescriptionGenerator,
+        letter_gen: ClientLetterGenerator,
+        cache: Optional[ContentCache] = None,
+        workers: int = REPORT_JOB_WORKERS,
+        max_queued: int = REPORT_JOB_QUEUE_SIZE,
+        retries: int = REPORT_JOB_MAX_RETRIES,
+        lease_seconds: float = REPORT_JOB_LEASE_SECONDS,
+        poll_seconds: float = REPORT_JOB_POLL_SECONDS,
+        max_attempts: int = REPORT_JOB_MAX_ATTEMPTS,
+    ):
+        self.load_property = load_property
+        self.description_gen = description_gen
+        self.letter_gen = letter_gen
+        self.cache = cache
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retries = retries
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Set on submit so idle workers in this process claim at once rather
+        # than at their next poll
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Add the lease columns to tables created before them, and start the workers."""
+        async with async_session() as db:
+            await db.execute(text("""
+                ALTER TABLE report_jobs
+                    ADD COLUMN IF NOT EXISTS worker_id VARCHAR,
+                    ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP WITH TIME ZONE
+            """))
+            await db.commit()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers and release their jobs for other processes to claim."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            async with async_session() as db:
+                # An attempt cut short by shutdown doesn't count against the job
+                await db.execute(text("""
+                    UPDATE report_jobs
+                    SET status = 'queued', worker_id = NULL, locked_until = NULL,
+                        attempts = greatest(attempts - 1, 0)
+                    WHERE worker_id = :worker_id AND status = 'running'
+                """), {"worker_id": self.worker_id})
+                await db.commit()
+        except Exception as e:
+            # The leases expire anyway; this only saves the wait
+            logger.error(f"Error releasing report jobs: {str(e)}")
+
+    async def submit(self, unit_of_property_id: str, client_name: str, purpose: str) -> Dict:
+        """
+        Queue a report job.
+
+        Args:
+            unit_of_property_id: Property to generate the report content for
+            client_name: Name of the client the letter is addressed to
+            purpose: Purpose of the valuation
+
+        Returns:
+            Dict: The new job
+
+        Raises:
+            JobQueueFull: If max_queued jobs are already waiting
+        """
+        job_id = str(uuid.uuid4())
+        async with async_session() as db:
+            queued = (await db.execute(text("""
+                SELECT count(*) FROM report_jobs WHERE status = 'queued'
+            """))).scalar()
+            if queued >= self.max_queued:
+                raise JobQueueFull()
+            await db.execute(text("""
+                INSERT INTO report_jobs (id, unit_of_property_id, client_name, purpose, status)
+                VALUES (:id, :unit_of_property_id, :client_name, :purpose, 'queued')
+            """), {
+                "id": job_id,
+                "unit_of_property_id": unit_of_property_id,
+                "client_name": client_name,
+                "purpose": purpose,
+            })
+            await db.commit()
+        self._wakeup.set()
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Current state of a job, or None if there is no such job."""
+        sql = text(JOB_COLUMNS_SQL + " WHERE id = :id").columns(result=JSON, errors=JSON)
+        async with async_session() as db:
+            row = (await db.execute(sql, {"id": job_id})).mappings().first()
+        return dict(row) if row is not None else None
+
+    async def _worker(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming a report job: {str(e)}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heartbeat = asyncio.create_task(self._heartbeat(job.id))
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Error running report job {job.id}: {str(e)}")
+            finally:
+                heartbeat.cancel()
+
+    async def _claim(self):
+        """
+        Lease the oldest job that is queued or whose lease has expired.
+
+        SKIP LOCKED lets concurrent workers, in this and other processes,
+        each claim a different job without waiting on one another. Jobs
+        that have used up their attempts are marked failed instead.
+        """
+        async with async_session() as db:
+            await db.execute(text("""
+                UPDATE report_jobs
+                SET status = 'failed',
+                    errors = CAST(:errors AS json),
+                    finished_at = now(),
+                    worker_id = NULL,
+                    locked_until = NULL
+                WHERE id IN (
+                    SELECT id FROM report_jobs
+                    WHERE (status = 'queued' OR (status = 'running' AND locked_until < now()))
+                        AND attempts >= :max_attempts
+                    FOR UPDATE SKIP LOCKED
+                )
+            """), {
+                "max_attempts": self.max_attempts,
+                "errors": json.dumps({"job": f"Gave up after {self.max_attempts} attempts"}),
+            })
+            job = (await db.execute(text("""
+                UPDATE report_jobs
+                SET status = 'running',
+                    worker_id = :worker_id,
+                    locked_until = now() + make_interval(secs => :lease_seconds),
+                    started_at = now(),
+                    attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM report_jobs
+                    WHERE (status = 'queued' OR (status = 'running' AND locked_until < now()))
+                        AND attempts < :max_attempts
+                    ORDER BY created_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, unit_of_property_id, client_name, purpose
+            """), {
+                "worker_id": self.worker_id,
+                "lease_seconds": float(self.lease_seconds),
+                "max_attempts": self.max_attempts,
+            })).first()
+            await db.commit()
+        return job
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Renew the lease on a running job until cancelled."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with async_session() as db:
+                    await db.execute(text("""
+                        UPDATE report_jobs
+                        SET locked_until = now() + make_interval(secs => :lease_seconds)
+                        WHERE id = :id AND worker_id = :worker_id
+                    """), {
+                        "id": job_id,
+                        "worker_id": self.worker_id,
+                        "lease_seconds": float(self.lease_seconds),
+                    })
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Error renewing the lease on report job {job_id}: {str(e)}")
+
+    async def _run(self, job) -> None:
+        job_id = job.id
+        content, errors = None, None
+        try:
+            property_data = await self.load_property(job.unit_of_property_id)
+            if property_data is None:
+                errors = {"job": "Property not found"}
+            else:
+                content = await generate_ai_content(
+                    property_data,
+                    self.description_gen,
+                    self.letter_gen,
+                    client_name=job.client_name,
+                    purpose=job.purpose,
+                    cache=self.cache,
+                    retries=self.retries
+                )
+                errors = content.pop("errors", None)
+        except Exception as e:
+            logger.error(f"Error generating report job {job_id}: {str(e)}")
+            errors = {"job": str(e)}
+
+        async with async_session() as db:
+            await db.execute(text("""
+                UPDATE report_jobs
+                SET status = :status,
+                    result = CAST(:result AS json),
+                    errors = CAST(:errors AS json),
+                    finished_at = now(),
+                    worker_id = NULL,
+                    locked_until = NULL
+                WHERE id = :id AND worker_id = :worker_id
+            """), {
+                "id": job_id,
+                "worker_id": self.worker_id,
+                "status": "failed" if errors else "succeeded",
+                "result": json.dumps(content) if content else None,
+                "errors": json.dumps(errors) if errors else None,
+            })
+            await db.commit()
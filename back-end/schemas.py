@@ -1,8 +1,35 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional
+import re
+
+from address_normalization import normalize_address
+
+# Substring search uses the trigram index on full_address_normalized, which
+# pg_trgm can only use when the term holds a trigram: a run of at least
+# three letters or digits. Shorter terms would scan the whole table.
+MIN_SEARCH_TERM_CHARS = 3
+_SEARCHABLE_TERM = re.compile(f"[a-z0-9]{{{MIN_SEARCH_TERM_CHARS}}}")
+
+def check_search_term(value: Optional[str]) -> Optional[str]:
+    """Reject address search terms the trigram index cannot serve."""
+    if value is not None and not _SEARCHABLE_TERM.search(normalize_address(value)):
+        raise ValueError(
+            f"Address must contain at least {MIN_SEARCH_TERM_CHARS} consecutive letters or digits"
+        )
+    return value
 
 class PropertySearch(BaseModel):
     address: str = Field(..., description="Address to search for", min_length=1)
+    limit: int = Field(20, description="Page size", ge=1, le=100)
+    cursor: Optional[str] = Field(
+        None,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page"
+    )
+
+    @field_validator("address")
+    @classmethod
+    def check_address(cls, value):
+        return check_search_term(value)
 
     class Config:
         json_schema_extra = {
@@ -11,24 +38,72 @@ class PropertySearch(BaseModel):
             }
         }
 
+class PropertySearchStream(BaseModel):
+    address: str = Field(..., description="Address to search for", min_length=1)
+
+    @field_validator("address")
+    @classmethod
+    def check_address(cls, value):
+        return check_search_term(value)
+
+class PropertyBatchRequest(BaseModel):
+    unit_of_property_ids: List[str] = Field(default_factory=list, max_length=10000)
+    valuation_no_rolls: List[int] = Field(
+        default_factory=list,
+        description="Valuation roll numbers; every property on each roll is returned",
+        max_length=100
+    )
+    addresses: List[str] = Field(
+        default_factory=list,
+        description="Full addresses, matched exactly after normalization",
+        max_length=10000
+    )
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if not (self.unit_of_property_ids or self.valuation_no_rolls or self.addresses):
+            raise ValueError("At least one unit_of_property_id, valuation_no_roll or address is required")
+        return self
+
+class PropertyExportRequest(BaseModel):
+    address: Optional[str] = Field(None, description="Substring of the address, as in search", min_length=1)
+    territorial_authority: Optional[str] = None
+    suburb_locality: Optional[str] = None
+    town_city: Optional[str] = None
+    property_category: Optional[str] = Field(
+        None,
+        description="Property category prefix, e.g. R for every residential category",
+        min_length=1
+    )
+    actual_property_use: Optional[str] = None
+    min_capital_value: Optional[int] = Field(None, ge=0)
+    max_capital_value: Optional[int] = Field(None, ge=0)
+    format: Literal["csv", "parquet"] = "csv"
+    gzip: bool = Field(False, description="Gzip the CSV (Parquet is always compressed)")
+
+    @field_validator("address")
+    @classmethod
+    def check_address(cls, value):
+        return check_search_term(value)
+
 class Address(BaseModel):
-    address_id: str
+    address_id: int
     full_address: str
     town_city: Optional[str]
     suburb_locality: Optional[str]
     territorial_authority: Optional[str]
     full_road_name: Optional[str]
-    address_number: Optional[str]
+    address_number: Optional[int]
 
 class ValuationRoll(BaseModel):
     unit_of_property_id: str
-    valuation_no_roll: Optional[str]
-    capital_value: Optional[str]
-    improvements_value: Optional[str]
-    land_value: Optional[str]
-    no_of_bedrooms: Optional[str]
+    valuation_no_roll: Optional[int]
+    capital_value: Optional[int]
+    improvements_value: Optional[int]
+    land_value: Optional[int]
+    no_of_bedrooms: Optional[int]
     improvements_description: Optional[str]
-    building_total_floor_area: Optional[str]
+    building_total_floor_area: Optional[int]
     property_category: Optional[str]
     actual_property_use: Optional[str]
     legal_description: Optional[str]
@@ -40,3 +115,23 @@ class PropertyResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class AIContentBatchRequest(BaseModel):
+    unit_of_property_ids: List[str] = Field(
+        ...,
+        description="Properties to generate AI content for",
+        min_length=1,
+        max_length=50
+    )
+    client_name: str = Field("Property Owner", min_length=1, max_length=200)
+    purpose: str = Field("Valuation Report", min_length=1, max_length=200)
+
+class ReportJobRequest(BaseModel):
+    unit_of_property_id: str = Field(..., min_length=1)
+    client_name: str = Field("Property Owner", description="Client the letter is addressed to", min_length=1, max_length=200)
+    purpose: str = Field(
+        "Valuation Report",
+        description="Purpose of the valuation, e.g. mortgage, sale or insurance",
+        min_length=1,
+        max_length=200
+    )
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from prometheus_client import Counter
+
+from address_normalization import normalize_address
+from config import (
+    REDIS_URL,
+    SEARCH_CACHE_MAX_BYTES,
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_TTL_SECONDS,
+)
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_LOOKUPS = Counter(
+    "search_cache_lookups_total",
+    "Search result cache lookups, by tier",
+    ["tier", "result"],
+)
+
+# Rough per-entry bookkeeping cost (OrderedDict node, tuple, key string)
+_ENTRY_OVERHEAD_BYTES = 200
+
+# A cached page: the encoded JSON body and the X-Next-Cursor value, if any
+CachedPage = Tuple[bytes, Optional[str]]
+
+
+class SearchResultCache:
+    """
+    Cache of encoded /properties/search responses.
+
+    Keys combine the normalized search term, page size, cursor and the
+    property_search data version, so a reimport makes every old entry
+    unreachable; the local tier is also emptied when the version moves.
+    Lookups try the in-process LRU first, then Redis if REDIS_URL is set.
+    """
+
+    def __init__(self, versions, max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+                 max_bytes: int = SEARCH_CACHE_MAX_BYTES, ttl_seconds: int = SEARCH_CACHE_TTL_SECONDS,
+                 redis_url: Optional[str] = REDIS_URL):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self._redis = None
+        if redis_url:
+            if redis is None:
+                logger.warning("REDIS_URL is set but the redis package is not installed; "
+                               "using the in-process search cache only")
+            else:
+                self._redis = redis.from_url(redis_url)
+
+    def make_key(self, address: str, limit: int, cursor: Optional[str]) -> str:
+        """
+        Build the cache key for one page of search results.
+
+        Args:
+            address: Search term as entered
+            limit: Page size
+            cursor: Cursor of the requested page, or None for the first page
+
+        Returns:
+            str: Key identifying the page in the current data version
+        """
+        # Called on the event loop, so read the polled version without querying
+        version = self.versions.current("property_search")
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+        payload = json.dumps([version, normalize_address(address), limit, cursor])
+        return "search:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedPage]:
+        """Return the cached page for key, or None on a miss."""
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None:
+                self._entries.move_to_end(key)
+        SEARCH_CACHE_LOOKUPS.labels("local", "miss" if page is None else "hit").inc()
+        if page is not None or self._redis is None:
+            return page
+
+        try:
+            fields = await self._redis.hgetall(key)
+        except Exception as e:
+            logger.warning(f"Search cache lookup in Redis failed: {str(e)}")
+            fields = None
+        SEARCH_CACHE_LOOKUPS.labels("redis", "hit" if fields else "miss").inc()
+        if not fields:
+            return None
+
+        page = (fields[b"body"], fields[b"next_cursor"].decode("ascii") or None)
+        self._store_local(key, page)
+        return page
+
+    async def set(self, key: str, body: bytes, next_cursor: Optional[str]) -> None:
+        """Store an encoded page in both tiers."""
+        self._store_local(key, (body, next_cursor))
+        if self._redis is None:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, mapping={"body": body, "next_cursor": next_cursor or ""})
+                pipe.expire(key, self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Search cache write to Redis failed: {str(e)}")
+
+    def _store_local(self, key: str, page: CachedPage) -> None:
+        size = self._entry_size(key, page)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(key, previous)
+            self._entries[key] = page
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, old_page = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_key, old_page)
+
+    @staticmethod
+    def _entry_size(key: str, page: CachedPage) -> int:
+        body, next_cursor = page
+        return len(key) + len(body) + len(next_cursor or "") + _ENTRY_OVERHEAD_BYTES
@@ -0,0 +1,49 @@
+"""
+Keyset cursors for /properties/search.
+
+Results come in two tiers, addresses starting with the term and then the
+other addresses containing it. Each tier is ordered by
+(full_address_normalized, unit_of_property_id, address_id), the columns of a
+btree index on property_search, so each page is an index range scan starting
+just after the previous one. A cursor is the tier and that key for the last
+row of a page, as base64 JSON.
+"""
+import base64
+import json
+from typing import Dict
+
+
+# Search tiers, in the order results are returned
+PREFIX_TIER = 0
+CONTAINS_TIER = 1
+
+
+def encode_cursor(tier: int, row) -> str:
+    """Opaque cursor pointing just after row, which came from tier."""
+    key = [tier, row.full_address_normalized, row.unit_of_property_id, row.address_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Query parameters for the page after the one that produced cursor.
+
+    Raises:
+        ValueError: If cursor was not produced by encode_cursor
+    """
+    try:
+        tier, full_address_normalized, unit_of_property_id, address_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(tier, int) or isinstance(tier, bool) or tier not in (PREFIX_TIER, CONTAINS_TIER) \
+            or not isinstance(full_address_normalized, str) or not isinstance(unit_of_property_id, str) \
+            or not isinstance(address_id, int) or isinstance(address_id, bool):
+        raise ValueError("Invalid cursor")
+    return {
+        "cursor_tier": tier,
+        "cursor_full_address_normalized": full_address_normalized,
+        "cursor_unit_of_property_id": unit_of_property_id,
+        "cursor_address_id": address_id,
+    }
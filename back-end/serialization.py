@@ -0,0 +1,52 @@
+from decimal import Decimal
+from typing import Any, Dict, Sequence
+
+import orjson
+
+# Column order of the property rows selected from property_search. Rows are
+# mapped positionally, so queries must select exactly PROPERTY_COLUMNS first.
+VALUATION_FIELDS = (
+    "unit_of_property_id",
+    "valuation_no_roll",
+    "capital_value",
+    "improvements_value",
+    "land_value",
+    "no_of_bedrooms",
+    "improvements_description",
+    "building_total_floor_area",
+    "property_category",
+    "actual_property_use",
+    "legal_description",
+)
+ADDRESS_FIELDS = (
+    "address_id",
+    "full_address",
+    "town_city",
+    "suburb_locality",
+    "territorial_authority",
+    "full_road_name",
+    "address_number",
+)
+PROPERTY_COLUMNS = VALUATION_FIELDS + ADDRESS_FIELDS
+
+_ADDRESS_START = len(VALUATION_FIELDS)
+_ADDRESS_END = len(PROPERTY_COLUMNS)
+
+
+def row_to_property_data(row: Sequence) -> Dict:
+    """Map a row selected as PROPERTY_COLUMNS onto the PropertyResponse structure."""
+    return {
+        "valuation": dict(zip(VALUATION_FIELDS, row[:_ADDRESS_START])),
+        "address": dict(zip(ADDRESS_FIELDS, row[_ADDRESS_START:_ADDRESS_END])),
+    }
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode value as JSON bytes with orjson."""
+    return orjson.dumps(value, default=_default)
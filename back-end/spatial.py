@@ -0,0 +1,259 @@
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from config import SPATIAL_GRID_CELL_DEGREES
+from serialization import PROPERTY_COLUMNS, row_to_property_data
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+# Must match LOCATION_EXPRESSION in data_process/spatial_index.py, which
+# builds the GiST index on property_search
+LOCATION_EXPRESSION = "(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography)"
+ORIGIN_EXPRESSION = "(ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography)"
+LOCATION_INDEX = "property_search_location_idx"
+
+# Beyond this radius the nearest search scans every point instead of the grid
+MAX_GRID_SEARCH_M = 50000
+
+PROPERTY_COLUMNS_SQL = ", ".join(PROPERTY_COLUMNS)
+
+
+def haversine_m(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in metres from one point to many."""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class _Grid:
+    """
+    Address points bucketed into square cells, sorted so each cell is a contiguous slice.
+
+    Limits count properties, not points: an address can hold several
+    properties, so searches return the closest addresses that hold `limit`
+    properties between them.
+    """
+
+    def __init__(self, address_ids: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray,
+                 cell_degrees: float, property_counts: Optional[np.ndarray] = None):
+        self.cell_degrees = cell_degrees
+        if property_counts is None:
+            property_counts = np.ones(len(address_ids), dtype=np.int64)
+        cells = self._cell_keys(latitudes, longitudes)
+        order = np.argsort(cells, kind="stable")
+        self.address_ids = address_ids[order]
+        self.latitudes = latitudes[order]
+        self.longitudes = longitudes[order]
+        self.property_counts = property_counts[order]
+
+        keys, starts = np.unique(cells[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self.cells = dict(zip(keys.tolist(), zip(starts.tolist(), ends.tolist())))
+
+    def __len__(self):
+        return len(self.address_ids)
+
+    def _cell_keys(self, latitudes, longitudes):
+        rows = np.floor(latitudes / self.cell_degrees).astype(np.int64)
+        columns = np.floor(longitudes / self.cell_degrees).astype(np.int64)
+        return columns * 1_000_003 + rows
+
+    def _candidates(self, latitude: float, longitude: float, radius_m: float) -> Optional[np.ndarray]:
+        """Positions of the points in cells overlapping the radius, or None if there are none."""
+        if not math.isfinite(radius_m):
+            return np.arange(len(self))
+        lat_cells = math.ceil(radius_m / METRES_PER_DEGREE / self.cell_degrees)
+        lon_scale = max(math.cos(math.radians(latitude)), 0.01)
+        lon_cells = math.ceil(radius_m / (METRES_PER_DEGREE * lon_scale) / self.cell_degrees)
+        if (2 * lat_cells + 1) * (2 * lon_cells + 1) > len(self.cells):
+            # Visiting every cell in the box would cost more than a full scan
+            return np.arange(len(self))
+
+        row = math.floor(latitude / self.cell_degrees)
+        column = math.floor(longitude / self.cell_degrees)
+        ranges = []
+        for c in range(column - lon_cells, column + lon_cells + 1):
+            for r in range(row - lat_cells, row + lat_cells + 1):
+                cell = self.cells.get(c * 1_000_003 + r)
+                if cell is not None:
+                    ranges.append(np.arange(*cell))
+        return np.concatenate(ranges) if ranges else None
+
+    def _within(self, latitude: float, longitude: float, radius_m: float,
+                limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and distances of the closest points within radius_m holding `limit` properties."""
+        candidates = self._candidates(latitude, longitude, radius_m)
+        if candidates is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        distances = haversine_m(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        inside = distances <= radius_m
+        candidates, distances = candidates[inside], distances[inside]
+        # Every address holds at least one property, so the closest `limit`
+        # addresses are enough
+        if len(distances) > limit:
+            keep = np.argpartition(distances, limit - 1)[:limit]
+            candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances)
+        candidates, distances = candidates[order], distances[order]
+        # Up to the address that brings the property count to limit
+        covered = int(np.searchsorted(np.cumsum(self.property_counts[candidates]), limit)) + 1
+        return candidates[:covered], distances[:covered]
+
+    def _matches(self, positions: np.ndarray, distances: np.ndarray) -> List[Tuple[int, float]]:
+        return [(int(self.address_ids[i]), float(d)) for i, d in zip(positions, distances)]
+
+    def within(self, latitude: float, longitude: float, radius_m: float, limit: int) -> List[Tuple[int, float]]:
+        """(address_id, distance) of the closest points within radius_m holding `limit` properties, closest first."""
+        return self._matches(*self._within(latitude, longitude, radius_m, limit))
+
+    def nearest(self, latitude: float, longitude: float, n: int) -> List[Tuple[int, float]]:
+        """The closest points holding n properties, searching outwards from the cell containing the point."""
+        radius_m = self.cell_degrees * METRES_PER_DEGREE
+        while radius_m < MAX_GRID_SEARCH_M:
+            positions, distances = self._within(latitude, longitude, radius_m, n)
+            if self.property_counts[positions].sum() >= n:
+                return self._matches(positions, distances)
+            radius_m *= 2
+        return self.within(latitude, longitude, math.inf, n)
+
+
+class SpatialIndex:
+    """
+    Radius and nearest-neighbour search over property_search coordinates.
+
+    When the importer was able to build the PostGIS GiST index, queries run
+    in Postgres. Otherwise the coordinates are loaded into an in-memory grid
+    on first use, rebuilt when the property_search data version changes.
+    One request rebuilds the grid, outside the lock, while the others keep
+    using the previous one.
+    """
+
+    def __init__(self, session_factory, versions, cell_degrees: float = SPATIAL_GRID_CELL_DEGREES):
+        self.session_factory = session_factory
+        self.versions = versions
+        self.cell_degrees = cell_degrees
+        # (data version, whether PostGIS serves queries, grid if it doesn't)
+        self._state: Optional[Tuple[int, bool, Optional[_Grid]]] = None
+        # Set when the load in progress finishes
+        self._loading: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+
+    def within(self, latitude: float, longitude: float, radius_m: float, limit: int) -> List[Dict]:
+        """Properties within radius_m metres of the point, closest first."""
+        postgis, grid = self._current()
+        if postgis:
+            return self._query_postgis(f"""
+                SELECT {PROPERTY_COLUMNS_SQL}, ST_Distance({LOCATION_EXPRESSION}, {ORIGIN_EXPRESSION}) AS distance_m
+                FROM property_search
+                WHERE ST_DWithin({LOCATION_EXPRESSION}, {ORIGIN_EXPRESSION}, :radius_m)
+                ORDER BY distance_m
+                LIMIT :limit
+            """, {"latitude": latitude, "longitude": longitude, "radius_m": radius_m, "limit": limit})
+        return self._properties(grid.within(latitude, longitude, radius_m, limit), limit)
+
+    def nearest(self, latitude: float, longitude: float, n: int) -> List[Dict]:
+        """The n properties closest to the point, closest first."""
+        postgis, grid = self._current()
+        if postgis:
+            # <-> against a constant point is answered from the GiST index
+            return self._query_postgis(f"""
+                SELECT {PROPERTY_COLUMNS_SQL}, ST_Distance({LOCATION_EXPRESSION}, {ORIGIN_EXPRESSION}) AS distance_m
+                FROM property_search
+                WHERE longitude IS NOT NULL AND latitude IS NOT NULL
+                ORDER BY {LOCATION_EXPRESSION} <-> {ORIGIN_EXPRESSION}
+                LIMIT :limit
+            """, {"latitude": latitude, "longitude": longitude, "limit": n})
+        return self._properties(grid.nearest(latitude, longitude, n), n)
+
+    def _current(self) -> Tuple[bool, Optional[_Grid]]:
+        """
+        Whether PostGIS serves queries and, if not, the grid to use.
+
+        The first request to see a new data version loads it; the others
+        carry on with the previous state, or wait if there is none yet.
+        """
+        version = self.versions.get("property_search")
+        with self._lock:
+            state = self._state
+            if state is not None and state[0] == version:
+                return state[1], state[2]
+            loading = self._loading
+            if loading is None:
+                loading = self._loading = threading.Event()
+                loader = True
+            else:
+                loader = False
+
+        if loader:
+            try:
+                state = self._load(version)
+                with self._lock:
+                    self._state = state
+            finally:
+                with self._lock:
+                    self._loading = None
+                loading.set()
+        elif state is None:
+            loading.wait()
+            state = self._state
+            if state is None:
+                raise RuntimeError("The spatial index could not be loaded")
+        return state[1], state[2]
+
+    def _load(self, version) -> Tuple[int, bool, Optional[_Grid]]:
+        with self.session_factory() as db:
+            postgis = db.execute(
+                text("SELECT to_regclass(:index_name)"), {"index_name": LOCATION_INDEX}
+            ).scalar() is not None
+            if postgis:
+                return version, True, None
+            # Reading every coordinate can take longer than the API statement timeout
+            db.execute(text("SET LOCAL statement_timeout = 0"))
+            rows = db.execute(text("""
+                SELECT address_id, min(latitude), min(longitude), count(*)
+                FROM property_search
+                WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+                GROUP BY address_id
+            """)).all()
+        grid = _Grid(
+            np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows)),
+            np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows)),
+            self.cell_degrees,
+            np.fromiter((row[3] for row in rows), dtype=np.int64, count=len(rows))
+        )
+        logger.info(f"Spatial grid built: {len(grid)} points in {len(grid.cells)} cells")
+        return version, False, grid
+
+    def _query_postgis(self, sql: str, params: Dict) -> List[Dict]:
+        with self.session_factory() as db:
+            rows = db.execute(text(sql), params).all()
+        return [{"distance_m": row.distance_m, **row_to_property_data(row)} for row in rows]
+
+    def _properties(self, matches: List[Tuple[int, float]], limit: int) -> List[Dict]:
+        """Join grid matches to their valuation data, keeping distance order, up to limit properties."""
+        if not matches:
+            return []
+        with self.session_factory() as db:
+            rows = db.execute(text(f"""
+                SELECT {PROPERTY_COLUMNS_SQL} FROM property_search
+                WHERE address_id = ANY(:address_ids)
+            """), {"address_ids": [address_id for address_id, _ in matches]}).all()
+        by_address = {}
+        for row in rows:
+            by_address.setdefault(row.address_id, []).append(row_to_property_data(row))
+        return [
+            {"distance_m": distance, **property_data}
+            for address_id, distance in matches
+            for property_data in by_address.get(address_id, [])
+        ][:limit]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The back-end modules import each other by name, as when run from back-end
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
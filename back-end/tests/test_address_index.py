@@ -0,0 +1,104 @@
+from array import array
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from address_index import AddressPrefixIndex, _PackedIndex
+from address_normalization import normalize_address
+
+ADDRESSES = [
+    (101, "292 Yaldhurst Road, Sockburn, Christchurch"),
+    (102, "290 Yaldhurst Road, Sockburn, Christchurch"),
+    (103, "1/23 Main Road, Hornby, Christchurch"),
+    (104, "5 Avenal Street, Avonhead, Christchurch"),
+    (105, "7 Avenue Road, Papanui, Christchurch"),
+    (106, "Yaldhurst Domain, Yaldhurst"),
+]
+
+
+def build_index(addresses):
+    """Pack addresses the way AddressPrefixIndex._build does."""
+    packed_addresses = bytearray()
+    address_offsets = array("Q", [0])
+    address_ids = array("q")
+    entries = []
+    for row, (address_id, full_address) in enumerate(addresses):
+        packed_addresses += full_address.encode("utf-8")
+        address_offsets.append(len(packed_addresses))
+        address_ids.append(address_id)
+        key = normalize_address(full_address)
+        entries.append((key.encode("utf-8"), row))
+        if key[0].isdigit():
+            entries.append((key.split(" ", 1)[1].encode("utf-8"), row))
+
+    keys = bytearray()
+    key_offsets = array("Q", [0])
+    key_rows = array("I")
+    for key, row in sorted(entries):
+        keys += key
+        key_offsets.append(len(keys))
+        key_rows.append(row)
+    return _PackedIndex(keys, key_offsets, key_rows, packed_addresses, address_offsets, address_ids)
+
+
+@pytest.fixture
+def index():
+    return build_index(ADDRESSES)
+
+
+def ids(suggestions):
+    return [suggestion["address_id"] for suggestion in suggestions]
+
+
+def test_full_address_prefix(index):
+    assert ids(index.search(b"292 yaldhurst", 10)) == [101]
+
+
+def test_prefix_without_street_number(index):
+    # Keyed without the number too, in key order; equal keys in address order
+    assert ids(index.search(b"yaldhurst", 10)) == [106, 101, 102]
+
+
+def test_suggestions_carry_display_address(index):
+    assert index.search(b"1/23 main", 10) == [
+        {"address_id": 103, "full_address": "1/23 Main Road, Hornby, Christchurch"}
+    ]
+
+
+def test_limit(index):
+    assert len(index.search(b"yaldhurst", 2)) == 2
+
+
+def test_each_address_once(index):
+    # "avenue road" matches 105 by its full key and its numberless key
+    assert ids(index.search(b"7 avenue", 10)) == [105]
+    assert ids(index.search(b"avenue", 10)) == [105]
+
+
+def test_no_match(index):
+    assert index.search(b"zzz", 10) == []
+    assert index.search(b"0", 10) == []
+
+
+def test_len_and_nbytes(index):
+    # Every address is numbered except the domain, which has one key
+    assert len(index) == 2 * len(ADDRESSES) - 1
+    assert index.nbytes() >= len(index.keys) + len(index.addresses)
+
+
+class FixedVersions:
+    def get(self, dataset):
+        return 1
+
+
+def no_database():
+    raise AssertionError("autocomplete must not query the database")
+
+
+def test_no_suggestions_until_index_is_built():
+    addresses = AddressPrefixIndex(no_database, FixedVersions())
+    assert addresses.suggest("292 yald") == []
+
+    addresses._index, addresses._index_version = build_index(ADDRESSES), 1
+    assert ids(addresses.suggest("292 yald")) == [101]
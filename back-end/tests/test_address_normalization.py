@@ -0,0 +1,85 @@
+import os
+import re
+
+import pytest
+
+from address_normalization import (
+    MACRONS,
+    MACRONS_FOLDED,
+    ROAD_TYPE_ABBREVIATIONS,
+    SEPARATOR_PATTERN,
+    abbreviation_pattern,
+    normalize_address,
+    normalize_address_function_sql,
+)
+
+ADDRESSES = [
+    "292 Yaldhurst Road, Sockburn, Christchurch",
+    "1/23 Main Rd",
+    "1/23 Main Rd.",
+    "Flat 2, 14-16 St Albans St",
+    "  Māngere   Rd,  ",
+    "RD 2 Rolleston",
+    "st/rd",
+    "Mt Eden-Rd",
+    "12A Ave",
+    "Ave Ave St",
+    "Tce",
+    "Avenal Street",
+    "ōtautahi",
+    "",
+    "---",
+]
+
+
+def sql_steps_in_python(value: str) -> str:
+    """The steps of the generated SQL function, run with Python re."""
+    value = value.lower().translate(str.maketrans(MACRONS, MACRONS_FOLDED))
+    value = re.sub(SEPARATOR_PATTERN, " ", value).strip(" ")
+    for abbreviation, full in ROAD_TYPE_ABBREVIATIONS.items():
+        value = re.sub(abbreviation_pattern(abbreviation), rf"\g<1>{full}", value)
+    return value
+
+
+@pytest.mark.parametrize("address", ADDRESSES)
+def test_python_matches_sql_steps(address):
+    assert normalize_address(address) == sql_steps_in_python(address)
+
+
+def test_slash_and_hyphen_tokens():
+    assert normalize_address("1/23 Main Rd") == "1/23 main road"
+    assert normalize_address("Mt Eden-Rd") == "mount eden road"
+    # Only whole tokens are expanded
+    assert normalize_address("st/rd") == "st/rd"
+
+
+def test_expand_last_token():
+    assert normalize_address("12 Queen Ave", expand_last_token=False) == "12 queen ave"
+    assert normalize_address("12 Ave Queen", expand_last_token=False) == "12 avenue queen"
+
+
+def test_sql_function_uses_every_abbreviation():
+    sql = normalize_address_function_sql()
+    for abbreviation, full in ROAD_TYPE_ABBREVIATIONS.items():
+        assert f"'{abbreviation_pattern(abbreviation)}', '\\1{full}'" in sql
+
+
+def test_expansions_are_not_abbreviations():
+    # The SQL applies the replacements one after another, Python in one pass
+    assert not set(ROAD_TYPE_ABBREVIATIONS.values()) & set(ROAD_TYPE_ABBREVIATIONS)
+
+
+@pytest.mark.skipif(not os.getenv("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL is not set")
+def test_python_matches_database_function():
+    psycopg2 = pytest.importorskip("psycopg2")
+    connection = psycopg2.connect(os.environ["TEST_DATABASE_URL"])
+    try:
+        with connection.cursor() as cursor:
+            # Created inside the transaction, which is rolled back
+            cursor.execute(normalize_address_function_sql())
+            for address in ADDRESSES:
+                cursor.execute("SELECT normalize_address(%s)", (address,))
+                assert cursor.fetchone()[0] == normalize_address(address)
+    finally:
+        connection.rollback()
+        connection.close()
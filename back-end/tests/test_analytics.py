@@ -0,0 +1,43 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from analytics import QUANTILES, _grouped_quantiles
+
+
+def test_matches_numpy_per_group():
+    rng = np.random.default_rng(3)
+    groups = rng.integers(0, 20, size=5000)
+    values = rng.lognormal(13, 0.5, size=5000)
+    result = _grouped_quantiles(groups, values)
+
+    assert result["code"].tolist() == sorted(set(groups.tolist()))
+    for i, code in enumerate(result["code"]):
+        group_values = values[groups == code]
+        assert result["count"][i] == len(group_values)
+        assert result["mean"][i] == pytest.approx(group_values.mean())
+        for name, fraction in QUANTILES.items():
+            # numpy's default quantile method is the same linear interpolation
+            assert result[name][i] == pytest.approx(np.quantile(group_values, fraction))
+
+
+def test_single_value_groups():
+    result = _grouped_quantiles(np.array([5, 1, 5]), np.array([10.0, 3.0, 30.0]))
+    assert result["code"].tolist() == [1, 5]
+    assert result["count"].tolist() == [1, 2]
+    assert result["median"].tolist() == [3.0, 20.0]
+    assert result["p10"].tolist() == pytest.approx([3.0, 12.0])
+
+
+def test_unsorted_input_is_not_modified():
+    groups = np.array([2, 1, 2, 1])
+    values = np.array([4.0, 3.0, 1.0, 2.0])
+    _grouped_quantiles(groups, values)
+    assert groups.tolist() == [2, 1, 2, 1]
+    assert values.tolist() == [4.0, 3.0, 1.0, 2.0]
+
+
+def test_empty():
+    result = _grouped_quantiles(np.array([], dtype=np.int64), np.array([]))
+    assert len(result["code"]) == 0
+    assert all(len(result[name]) == 0 for name in ["count", "mean", *QUANTILES])
@@ -0,0 +1,174 @@
+"""
+Retry and backoff of the LLM calls behind report jobs, with FakeChatModel
+standing in for Claude.
+"""
+import asyncio
+from typing import Any
+
+import pytest
+
+pytest.importorskip("langchain_core")
+anthropic = pytest.importorskip("anthropic")
+httpx = pytest.importorskip("httpx")
+
+from benchmarks.fake_llm import FakeChatModel
+from llm import generation
+from llm.client_letter import ClientLetterGenerator
+from llm.config import LLM_RETRY_BASE_SECONDS, LLM_RETRY_MAX_SECONDS
+from llm.generation import _is_retryable, _retry_delay, generate_ai_content
+from llm.property_description import PropertyDescriptionGenerator
+
+PROPERTY = {
+    "valuation": {
+        "unit_of_property_id": "a1b2c3",
+        "valuation_no_roll": 10123,
+        "capital_value": 720000,
+        "improvements_value": 320000,
+        "land_value": 400000,
+        "no_of_bedrooms": 3,
+        "improvements_description": "DWG OI",
+        "building_total_floor_area": 150,
+        "property_category": "RD",
+        "actual_property_use": "Residential dwelling",
+        "legal_description": "LOT 1 DP 12345",
+    },
+    "address": {
+        "address_id": 1000001,
+        "full_address": "292 Yaldhurst Road, Sockburn, Christchurch",
+        "town_city": "Christchurch",
+        "suburb_locality": "Sockburn",
+        "territorial_authority": "Christchurch City",
+        "full_road_name": "Yaldhurst Road",
+        "address_number": 292,
+    },
+}
+
+REQUEST = httpx.Request("POST", "https://fake-llm.invalid")
+
+
+def connection_error():
+    return anthropic.APIConnectionError(request=REQUEST)
+
+
+def status_error(status_code: int, headers=None):
+    response = httpx.Response(status_code, headers=headers or {}, request=REQUEST)
+    error_class = {400: anthropic.BadRequestError, 429: anthropic.RateLimitError}.get(
+        status_code, anthropic.InternalServerError
+    )
+    return error_class("error", response=response, body=None)
+
+
+class FlakyChatModel(FakeChatModel):
+    """FakeChatModel whose first calls fail with the given errors, in order."""
+
+    latency_seconds: float = 0.0
+    first_token_seconds: float = 0.0
+    response_words: int = 5
+    errors: list = []
+    calls: int = 0
+
+    def _maybe_fail(self) -> None:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Record the backoff delays instead of waiting for them."""
+    delays = []
+
+    def record_delay(error: BaseException, attempt: int) -> float:
+        delays.append(_retry_delay(error, attempt))
+        return 0
+
+    monkeypatch.setattr(generation, "_retry_delay", record_delay)
+    # The call semaphore is bound to the event loop that first waits on it
+    monkeypatch.setattr(generation, "_call_semaphore", None)
+    return delays
+
+
+def generate(description_model, letter_model, retries: int, timeout: float = 5) -> Any:
+    return asyncio.run(generate_ai_content(
+        PROPERTY,
+        PropertyDescriptionGenerator(model=description_model),
+        ClientLetterGenerator(model=letter_model),
+        client_name="Jane Smith",
+        purpose="Mortgage",
+        timeout=timeout,
+        retries=retries,
+    ))
+
+
+def test_success_without_retries(no_backoff):
+    description, letter = FlakyChatModel(), FlakyChatModel()
+    content = generate(description, letter, retries=3)
+    assert set(content) == {"property_description", "client_letter"}
+    assert (description.calls, letter.calls) == (1, 1)
+    assert no_backoff == []
+
+
+def test_transient_errors_are_retried_until_success(no_backoff):
+    description = FlakyChatModel(errors=[connection_error(), status_error(529)])
+    letter = FlakyChatModel(errors=[status_error(429)])
+    content = generate(description, letter, retries=3)
+    assert "errors" not in content
+    assert content["property_description"] == "the property is a well"
+    assert (description.calls, letter.calls) == (3, 2)
+    assert len(no_backoff) == 3
+
+
+def test_gives_up_after_retries(no_backoff):
+    description = FlakyChatModel(errors=[connection_error() for _ in range(5)])
+    letter = FlakyChatModel()
+    content = generate(description, letter, retries=2)
+    # The failed section is reported; the other one is still returned
+    assert "property_description" not in content
+    assert "property_description" in content["errors"]
+    assert "client_letter" in content
+    assert description.calls == 3
+
+
+def test_permanent_errors_are_not_retried(no_backoff):
+    description = FlakyChatModel(errors=[status_error(400)])
+    content = generate(description, FlakyChatModel(), retries=3)
+    assert "property_description" in content["errors"]
+    assert description.calls == 1
+    assert no_backoff == []
+
+
+def test_timeouts_are_retried(no_backoff):
+    description = FlakyChatModel(latency_seconds=1.0)
+    content = generate(description, FlakyChatModel(), retries=1, timeout=0.05)
+    assert content["errors"]["property_description"] == "Timed out after 0.05s"
+    # Both attempts were cancelled before the model answered
+    assert description.calls == 0
+    assert len(no_backoff) == 1
+
+
+def test_retryable_errors_are_found_through_the_generators_wrapping():
+    try:
+        try:
+            raise status_error(503)
+        except Exception as e:
+            raise Exception("Failed to generate property description") from e
+    except Exception as wrapped:
+        assert _is_retryable(wrapped)
+    assert _is_retryable(asyncio.TimeoutError())
+    assert not _is_retryable(status_error(400))
+    assert not _is_retryable(ValueError("bad prompt"))
+
+
+def test_backoff_doubles_with_jitter_up_to_the_maximum():
+    error = connection_error()
+    for attempt in range(10):
+        ceiling = min(LLM_RETRY_BASE_SECONDS * 2 ** attempt, LLM_RETRY_MAX_SECONDS)
+        for _ in range(20):
+            assert ceiling / 2 <= _retry_delay(error, attempt) <= ceiling
+
+
+def test_backoff_honours_retry_after():
+    assert _retry_delay(status_error(429, {"retry-after": "7"}), 0) == 7
+    assert _retry_delay(status_error(429, {"retry-after": "3600"}), 0) == LLM_RETRY_MAX_SECONDS
+    # Unparseable values fall back to exponential backoff
+    assert _retry_delay(status_error(429, {"retry-after": "soon"}), 0) <= LLM_RETRY_BASE_SECONDS
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from search_cache import _ENTRY_OVERHEAD_BYTES, SearchResultCache
+
+
+class FixedVersions:
+    def __init__(self, version=1):
+        self.version = version
+
+    def current(self, dataset):
+        return self.version
+
+
+def page_size(key, body, next_cursor=None):
+    return len(key) + len(body) + len(next_cursor or "") + _ENTRY_OVERHEAD_BYTES
+
+
+def store(cache, key, body, next_cursor=None):
+    asyncio.run(cache.set(key, body, next_cursor))
+
+
+def lookup(cache, key):
+    return asyncio.run(cache.get(key))
+
+
+def test_evicts_least_recently_used_beyond_max_bytes():
+    body = b"x" * 1000
+    cache = SearchResultCache(FixedVersions(), max_entries=100,
+                              max_bytes=3 * page_size("k0", body), redis_url=None)
+    for key in ["k0", "k1", "k2"]:
+        store(cache, key, body)
+    assert lookup(cache, "k0") == (body, None)
+
+    # k1 is now the least recently used
+    store(cache, "k3", body)
+    assert lookup(cache, "k1") is None
+    assert lookup(cache, "k0") is not None
+    assert cache._bytes <= cache.max_bytes
+
+
+def test_byte_count_tracks_entries():
+    cache = SearchResultCache(FixedVersions(), max_entries=100, max_bytes=10 ** 6, redis_url=None)
+    store(cache, "a", b"1234", "cursor")
+    store(cache, "b", b"12")
+    # Replacing an entry replaces its size
+    store(cache, "a", b"123456789")
+    assert cache._bytes == page_size("a", b"123456789") + page_size("b", b"12")
+
+
+def test_page_larger_than_the_cache_is_not_stored():
+    cache = SearchResultCache(FixedVersions(), max_entries=100, max_bytes=500, redis_url=None)
+    store(cache, "small", b"x")
+    store(cache, "large", b"x" * 1000)
+    assert lookup(cache, "large") is None
+    # ...and does not evict what is there
+    assert lookup(cache, "small") == (b"x", None)
+
+
+def test_max_entries():
+    cache = SearchResultCache(FixedVersions(), max_entries=2, max_bytes=10 ** 6, redis_url=None)
+    for key in ["a", "b", "c"]:
+        store(cache, key, b"x")
+    assert lookup(cache, "a") is None
+    assert len(cache._entries) == 2
+
+
+def test_new_data_version_empties_the_cache():
+    versions = FixedVersions(1)
+    cache = SearchResultCache(versions, max_entries=100, max_bytes=10 ** 6, redis_url=None)
+    key = cache.make_key("292 Yaldhurst Rd", 20, None)
+    store(cache, key, b"[]")
+    assert cache.make_key("292  yaldhurst road", 20, None) == key
+
+    versions.version = 2
+    new_key = cache.make_key("292 Yaldhurst Rd", 20, None)
+    assert new_key != key
+    assert cache._bytes == 0
+    assert lookup(cache, key) is None
@@ -0,0 +1,52 @@
+import base64
+import json
+from collections import namedtuple
+
+import pytest
+
+from search_cursor import CONTAINS_TIER, PREFIX_TIER, decode_cursor, encode_cursor
+
+Row = namedtuple("Row", ["full_address_normalized", "unit_of_property_id", "address_id"])
+
+
+def test_round_trip():
+    row = Row("292 yaldhurst road sockburn christchurch", "a1b2c3", 1234567)
+    assert decode_cursor(encode_cursor(CONTAINS_TIER, row)) == {
+        "cursor_tier": CONTAINS_TIER,
+        "cursor_full_address_normalized": "292 yaldhurst road sockburn christchurch",
+        "cursor_unit_of_property_id": "a1b2c3",
+        "cursor_address_id": 1234567,
+    }
+
+
+def test_cursor_is_url_safe():
+    row = Row("1/23 main road ~~~ ???", "x" * 40, 2 ** 40)
+    cursor = encode_cursor(PREFIX_TIER, row)
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_=")
+    assert decode_cursor(cursor)["cursor_full_address_normalized"] == "1/23 main road ~~~ ???"
+
+
+def encode(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    "é",
+    encode({"full_address_normalized": "a"}),
+    encode([0, "a", "b"]),
+    encode([0, "a", "b", 1, 2]),
+    encode([0, "a", "b", "1"]),
+    encode([0, "a", "b", True]),
+    encode([0, 1, "b", 1]),
+    encode([2, "a", "b", 1]),
+    encode([True, "a", "b", 1]),
+    encode([1.0, "a", "b", 1]),
+    # Cursors from the earlier address and similarity orderings
+    encode(["a", "b", 1]),
+    encode([0.5, "292 Yaldhurst Road", "a1b2c3", 1]),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,127 @@
+import math
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sqlalchemy")
+
+from spatial import MAX_GRID_SEARCH_M, SpatialIndex, _Grid, haversine_m
+
+CELL_DEGREES = 0.01
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(7)
+    count = 5000
+    address_ids = np.arange(1000, 1000 + count, dtype=np.int64)
+    # Around Christchurch, with a sparse scatter further out
+    latitudes = np.concatenate([rng.normal(-43.53, 0.05, count - 100), rng.uniform(-45, -42, 100)])
+    longitudes = np.concatenate([rng.normal(172.63, 0.07, count - 100), rng.uniform(171, 174, 100)])
+    property_counts = rng.choice([1, 1, 1, 2, 5], size=count)
+    return address_ids, latitudes, longitudes, property_counts
+
+
+@pytest.fixture(scope="module")
+def grid(points):
+    address_ids, latitudes, longitudes, property_counts = points
+    return _Grid(address_ids, latitudes, longitudes, CELL_DEGREES, property_counts)
+
+
+def brute_force(points, latitude, longitude, radius_m):
+    """(address_id, distance, properties) of every point within radius_m, closest first."""
+    address_ids, latitudes, longitudes, property_counts = points
+    distances = haversine_m(latitude, longitude, latitudes, longitudes)
+    order = np.argsort(distances)
+    return [
+        (int(address_ids[i]), float(distances[i]), int(property_counts[i]))
+        for i in order if distances[i] <= radius_m
+    ]
+
+
+def expected_matches(matches, limit):
+    """The closest matches holding limit properties between them."""
+    kept, properties = [], 0
+    for address_id, distance, count in matches:
+        if properties >= limit:
+            break
+        kept.append((address_id, distance))
+        properties += count
+    return kept
+
+
+def properties_in(points, matches):
+    counts = dict(zip(points[0].tolist(), points[3].tolist()))
+    return sum(counts[address_id] for address_id, _ in matches)
+
+
+@pytest.mark.parametrize("latitude,longitude,radius_m,limit", [
+    (-43.53, 172.63, 500, 1000),
+    (-43.53, 172.63, 2000, 25),
+    (-43.60, 172.55, 5000, 7),
+    (-43.53, 172.63, 50000, 1),
+    (-44.50, 171.50, 1000, 10),
+])
+def test_within_matches_brute_force(points, grid, latitude, longitude, radius_m, limit):
+    found = grid.within(latitude, longitude, radius_m, limit)
+    expected = expected_matches(brute_force(points, latitude, longitude, radius_m), limit)
+    assert [address_id for address_id, _ in found] == [address_id for address_id, _ in expected]
+    assert np.allclose([d for _, d in found], [d for _, d in expected])
+
+
+def test_within_limit_counts_properties(points, grid):
+    found = grid.within(-43.53, 172.63, 5000, 20)
+    # Enough addresses for 20 properties, and no more than needed
+    assert properties_in(points, found) >= 20
+    assert properties_in(points, found[:-1]) < 20
+
+
+@pytest.mark.parametrize("latitude,longitude,n", [
+    (-43.53, 172.63, 1),
+    (-43.53, 172.63, 30),
+    (-44.90, 173.90, 5),
+    # Far from every point, so the search falls back to a full scan
+    (-40.0, 178.0, 3),
+])
+def test_nearest_matches_brute_force(points, grid, latitude, longitude, n):
+    found = grid.nearest(latitude, longitude, n)
+    expected = expected_matches(brute_force(points, latitude, longitude, math.inf), n)
+    assert [address_id for address_id, _ in found] == [address_id for address_id, _ in expected]
+    assert properties_in(points, found) >= n
+
+
+def test_nearest_fallback_is_beyond_grid_search(points, grid):
+    distance = grid.nearest(-40.0, 178.0, 1)[0][1]
+    assert distance > MAX_GRID_SEARCH_M
+
+
+def test_empty_cells(grid):
+    assert grid.within(0.0, 0.0, 1000, 10) == []
+
+
+def test_property_counts_default_to_one():
+    grid = _Grid(np.array([1, 2, 3]), np.array([-43.5, -43.5001, -43.6]), np.array([172.6, 172.6, 172.6]),
+                 CELL_DEGREES)
+    assert [address_id for address_id, _ in grid.within(-43.5, 172.6, 100, 5)] == [1, 2]
+    assert [address_id for address_id, _ in grid.nearest(-43.5, 172.6, 1)] == [1]
+
+
+class FixedVersions:
+    def __init__(self, version):
+        self.version = version
+
+    def get(self, dataset):
+        return self.version
+
+
+def no_database():
+    raise AssertionError("the index must not query the database")
+
+
+def test_previous_grid_served_while_rebuilding(grid):
+    index = SpatialIndex(no_database, FixedVersions(2))
+    index._state = (1, False, grid)
+    # Another request is loading version 2
+    index._loading = threading.Event()
+    assert index._current() == (False, grid)
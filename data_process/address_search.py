@@ -0,0 +1,58 @@
+import importlib.util
+import os
+
+def _load_address_normalization():
+    """
+    Load back-end/address_normalization.py, the single definition of
+    address normalization, so the SQL function is built from the same
+    rules as the API's Python normalizer. It is loaded by path because
+    data_process and back-end are separate script directories.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "back-end", "address_normalization.py")
+    spec = importlib.util.spec_from_file_location("address_normalization", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+_address_normalization = _load_address_normalization()
+ROAD_TYPE_ABBREVIATIONS = _address_normalization.ROAD_TYPE_ABBREVIATIONS
+normalize_address_function_sql = _address_normalization.normalize_address_function_sql
+
+def create_normalize_address_function(connection):
+    """
+    Create pg_trgm and the normalize_address(text) SQL function.
+
+    Expression indexes over normalize_address() are rebuilt when its
+    definition changes, since they hold values computed by the old one.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute("SELECT prosrc FROM pg_proc WHERE proname = 'normalize_address'")
+        previous = cursor.fetchone()
+        cursor.execute(normalize_address_function_sql())
+        cursor.execute("SELECT prosrc FROM pg_proc WHERE proname = 'normalize_address'")
+        current = cursor.fetchone()
+        if previous is not None and previous != current:
+            cursor.execute("""
+                SELECT indexrelid::regclass::text FROM pg_index
+                WHERE pg_get_expr(indexprs, indrelid) LIKE '%normalize_address(%'
+            """)
+            for (index_name,) in cursor.fetchall():
+                print(f"Rebuilding {index_name} for the new normalize_address")
+                cursor.execute(f"REINDEX INDEX {index_name}")
+    connection.commit()
+
+def create_address_search_index(connection, table_name='nz_addresses'):
+    """
+    Create the normalize_address function and a trigram index over the
+    normalized full_address so substring searches no longer scan the table.
+    """
+    create_normalize_address_function(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS {table_name}_full_address_trgm_idx
+            ON {table_name} USING gin (normalize_address(full_address) gin_trgm_ops)
+        """)
+        cursor.execute(f"ANALYZE {table_name}")
+    connection.commit()
+    print(f"Address search index created on {table_name}.")
@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from db_connection import get_db_connection
+from bulk_loader import table_exists
+from data_version import bump_data_version
+
+DATASET = 'analytics_snapshot'
+SOURCE_TABLE = 'property_search'
+
+# Where the snapshot is written; the back-end reads ANALYTICS_SNAPSHOT_DIR too
+SNAPSHOT_DIR = os.getenv(
+    'ANALYTICS_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analytics_snapshot')
+)
+MANIFEST_FILE = 'manifest.json'
+
+# Rows fetched per round trip from the server-side cursor
+FETCH_SIZE = 100000
+
+# Numeric columns and their dtypes. Missing values are NaN.
+NUMERIC_COLUMNS = {
+    "capital_value": np.float64,
+    "land_value": np.float64,
+    "improvements_value": np.float64,
+    "building_total_floor_area": np.float32,
+    "no_of_bedrooms": np.float32,
+    "longitude": np.float64,
+    "latitude": np.float64,
+}
+
+# Text columns stored as int32 codes into a per-column dictionary. Missing
+# values are -1.
+CATEGORY_COLUMNS = [
+    "territorial_authority",
+    "suburb_locality",
+    "town_city",
+    "property_category",
+]
+
+# One row per property; property_search has a row per address
+SNAPSHOT_SQL = f"""
+    SELECT DISTINCT ON (unit_of_property_id)
+        unit_of_property_id,
+        {', '.join(NUMERIC_COLUMNS)},
+        {', '.join(CATEGORY_COLUMNS)}
+    FROM {SOURCE_TABLE}
+    ORDER BY unit_of_property_id, address_id
+"""
+
+def _read_columns(connection):
+    """Stream the snapshot rows into per-column arrays and category dictionaries."""
+    chunks = {column: [] for column in ["unit_of_property_id", *NUMERIC_COLUMNS, *CATEGORY_COLUMNS]}
+    dictionaries = {column: {} for column in CATEGORY_COLUMNS}
+
+    with connection.cursor(name='analytics_snapshot') as cursor:
+        cursor.execute(SNAPSHOT_SQL)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            chunks["unit_of_property_id"].append(np.array(columns[0], dtype=str))
+            for i, (column, dtype) in enumerate(NUMERIC_COLUMNS.items(), start=1):
+                chunks[column].append(np.array(
+                    [np.nan if value is None else value for value in columns[i]], dtype=dtype
+                ))
+            for i, column in enumerate(CATEGORY_COLUMNS, start=1 + len(NUMERIC_COLUMNS)):
+                codes = dictionaries[column]
+                chunks[column].append(np.array(
+                    [-1 if value is None else codes.setdefault(value, len(codes)) for value in columns[i]],
+                    dtype=np.int32
+                ))
+            print(f"Read {sum(len(chunk) for chunk in chunks['unit_of_property_id'])} rows for the snapshot")
+    connection.commit()
+
+    arrays = {}
+    for column, parts in chunks.items():
+        if parts:
+            arrays[column] = np.concatenate(parts)
+        elif column == "unit_of_property_id":
+            arrays[column] = np.array([], dtype=str)
+        else:
+            arrays[column] = np.array([], dtype=np.int32 if column in dictionaries else NUMERIC_COLUMNS[column])
+    return arrays, {column: list(codes) for column, codes in dictionaries.items()}
+
+def _write_manifest(directory, manifest):
+    """Replace the manifest atomically so readers never see a partial one."""
+    path = os.path.join(directory, MANIFEST_FILE)
+    # Unique per writer, so concurrent exports don't share a temporary file
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(temporary, path)
+
+def _current_version(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)["directory"]
+    except FileNotFoundError:
+        return None
+
+def _version_time(name):
+    """Start time of a version directory, for ordering versions."""
+    try:
+        return int(name[1:].split('-')[0])
+    except ValueError:
+        return 0
+
+def export_analytics_snapshot(connection, directory=SNAPSHOT_DIR):
+    """
+    Write a columnar snapshot of property_search for the back-end's analytics.
+
+    Each column is saved as a .npy file in a new version directory, so the
+    back-end can memory-map it, and the text columns are dictionary encoded.
+    The manifest is switched to the new version only once every file is
+    written, then the data version is bumped and older versions removed.
+    """
+    if not table_exists(connection, SOURCE_TABLE):
+        print(f"Skipping {DATASET} export; {SOURCE_TABLE} does not exist")
+        return
+
+    arrays, dictionaries = _read_columns(connection)
+
+    # Written under a temporary name and renamed into place once complete.
+    # Names carry the start time, and the random suffix keeps versions apart
+    # even if two exports read the clock at the same instant.
+    version_dir = f"v{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    target = os.path.join(directory, version_dir)
+    if os.path.exists(target):
+        raise FileExistsError(f"Analytics snapshot version {target} already exists")
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.tmp-', dir=directory)
+    try:
+        for column, values in arrays.items():
+            np.save(os.path.join(staging, f"{column}.npy"), values)
+        # os.rename refuses to replace a non-empty directory, and the check
+        # above covers an empty one
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_manifest(directory, {
+        "directory": version_dir,
+        "rows": len(arrays["unit_of_property_id"]),
+        "numeric_columns": list(NUMERIC_COLUMNS),
+        "category_columns": CATEGORY_COLUMNS,
+        "dictionaries": dictionaries,
+    })
+
+    bump_data_version(connection, DATASET)
+
+    # Remove versions older than the one the manifest points at now, which
+    # may be a concurrent export's; newer ones may be about to be published.
+    # Open memory maps of the old files stay valid after they are unlinked.
+    current = _version_time(_current_version(directory) or version_dir)
+    for name in os.listdir(directory):
+        if name.startswith('v') and _version_time(name) < current:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    print(f"Analytics snapshot of {len(arrays['unit_of_property_id'])} properties written to {target}.")
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    if conn:
+        try:
+            export_analytics_snapshot(conn)
+        finally:
+            conn.close()
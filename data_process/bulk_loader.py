@@ -0,0 +1,362 @@
+import argparse
+import csv
+import os
+from multiprocessing import Pool
+
+from db_connection import get_db_connection
+from data_version import clear_llm_content, record_load_watermark, source_unchanged
+from table_schemas import convert_column_types, create_keys_and_indexes
+
+# Bytes handed to COPY per read from the CSV file
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Shards per worker in parallel mode, so one slow shard doesn't idle the rest
+SHARDS_PER_WORKER = 4
+
+# Column LINZ adds to change set exports: INSERT, UPDATE or DELETE
+CHANGE_COLUMN = '__change__'
+
+def staging_table_name(table_name):
+    return f"{table_name}_staging"
+
+def read_csv_header(csv_path):
+    """Return the CSV's column names, lower-cased to match the table columns."""
+    with open(csv_path, newline='', encoding='utf-8-sig') as f:
+        return [col.strip().lower() for col in next(csv.reader(f))]
+
+def create_table(connection, table_name, columns, serial_id=False, unlogged=False):
+    """Drop and recreate table_name with a TEXT column per CSV column."""
+    # Use TEXT for all columns to handle mixed data types
+    columns_def = [f"{col} TEXT" for col in columns]
+    if serial_id:
+        columns_def.insert(0, "id SERIAL PRIMARY KEY")
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        cursor.execute(
+            f"CREATE {'UNLOGGED ' if unlogged else ''}TABLE {table_name} ({', '.join(columns_def)})"
+        )
+    connection.commit()
+    print(f"Table {table_name} created successfully.")
+
+def copy_csv(connection, csv_path, table_name, columns):
+    """
+    Stream csv_path into table_name with COPY FROM STDIN.
+
+    The file is passed straight through to Postgres in fixed-size reads, so
+    memory use does not grow with the size of the file. Empty fields load as
+    NULL.
+    """
+    copy_sql = f"""
+        COPY {table_name} ({', '.join(columns)})
+        FROM STDIN WITH (FORMAT csv, HEADER true, ENCODING 'UTF8')
+    """
+    with open(csv_path, 'rb') as f, connection.cursor() as cursor:
+        cursor.copy_expert(copy_sql, f, size=COPY_BUFFER_SIZE)
+        rows = cursor.rowcount
+    connection.commit()
+    return rows
+
+class _FileRange:
+    """Read-only view of bytes [start, end) of an open file, for copy_expert."""
+
+    def __init__(self, f, start, end):
+        f.seek(start)
+        self.f = f
+        self.remaining = end - start
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+def split_csv(csv_path, shards):
+    """
+    Split the data rows of csv_path into up to `shards` byte ranges.
+
+    Boundaries are moved forward to the next line start. This assumes no
+    quoted field contains a newline, which holds for the LINZ exports.
+
+    Returns:
+        list: (start, end) byte offsets, header excluded
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, 'rb') as f:
+        f.readline()  # header
+        data_start = f.tell()
+        boundaries = [data_start]
+        for i in range(1, shards):
+            f.seek(data_start + (size - data_start) * i // shards)
+            f.readline()  # skip to the start of the next line
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+        boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def _copy_shard(args):
+    """Pool worker: COPY one byte range of the CSV on its own connection."""
+    csv_path, table_name, columns, start, end = args
+    connection = get_db_connection()
+    if not connection:
+        raise RuntimeError("Failed to connect to database")
+    try:
+        copy_sql = f"""
+            COPY {table_name} ({', '.join(columns)})
+            FROM STDIN WITH (FORMAT csv, ENCODING 'UTF8')
+        """
+        with open(csv_path, 'rb') as f, connection.cursor() as cursor:
+            cursor.copy_expert(copy_sql, _FileRange(f, start, end), size=COPY_BUFFER_SIZE)
+            rows = cursor.rowcount
+        connection.commit()
+        return rows
+    finally:
+        connection.close()
+
+def copy_csv_parallel(csv_path, table_name, columns, workers):
+    """Load csv_path into table_name with `workers` concurrent COPY processes."""
+    shards = split_csv(csv_path, workers * SHARDS_PER_WORKER)
+    tasks = [(csv_path, table_name, columns, start, end) for start, end in shards]
+
+    total_rows = 0
+    with Pool(workers) as pool:
+        for shard_number, rows in enumerate(pool.imap_unordered(_copy_shard, tasks), start=1):
+            total_rows += rows
+            print(f"Imported shard {shard_number}/{len(tasks)} ({total_rows} rows processed)")
+    return total_rows
+
+def swap_in_staging_table(connection, table_name):
+    """
+    Atomically replace table_name with its staging table.
+
+    Readers see either the old table or the fully loaded new one. Indexes
+    and sequences built on the staging table are renamed to match.
+    """
+    staging = staging_table_name(table_name)
+    with connection.cursor() as cursor:
+        # Writing the WAL for the staging table is the slow part; do it
+        # before taking the lock on the live table
+        cursor.execute(f"ALTER TABLE {staging} SET LOGGED")
+        connection.commit()
+
+        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        cursor.execute(f"ALTER TABLE {staging} RENAME TO {table_name}")
+        cursor.execute("""
+            SELECT indexname FROM pg_indexes
+            WHERE tablename = %s AND indexname LIKE %s
+        """, (table_name, f"{staging}%"))
+        for (index_name,) in cursor.fetchall():
+            cursor.execute(f"ALTER INDEX {index_name} RENAME TO {table_name}{index_name[len(staging):]}")
+        cursor.execute("""
+            SELECT c.relname FROM pg_class c
+            JOIN pg_depend d ON d.objid = c.oid AND d.deptype = 'a'
+            WHERE c.relkind = 'S' AND d.refobjid = %s::regclass AND c.relname LIKE %s
+        """, (table_name, f"{staging}%"))
+        for (sequence_name,) in cursor.fetchall():
+            cursor.execute(f"ALTER SEQUENCE {sequence_name} RENAME TO {table_name}{sequence_name[len(staging):]}")
+    connection.commit()
+    print(f"Swapped {staging} in as {table_name}.")
+
+def table_exists(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", (table_name,))
+        exists = cursor.fetchone()[0] is not None
+    connection.commit()
+    return exists
+
+def table_columns(connection, table_name):
+    """Column names and types of table_name, as a dict."""
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+        """, (table_name,))
+        columns = dict(cursor.fetchall())
+    connection.commit()
+    return columns
+
+def merge_staging_table(connection, table_name, columns, key_column, post_merge=None):
+    """
+    Apply the loaded staging table to table_name as a delta.
+
+    Rows are compared by an md5 hash of their columns and matched on
+    key_column. Only new or changed rows are written, and rows missing from
+    the snapshot are deleted. For a LINZ change set (a CSV with a __change__
+    column) the listed DELETEs are applied and no other rows are removed.
+    Cached LLM content for the properties whose rows changed is cleared in
+    the same transaction, and post_merge, if given, is called as
+    post_merge(cursor, table_name, changed_table) with the table of changed
+    rows (old and new versions).
+
+    Returns:
+        tuple: (rows upserted, rows deleted)
+    """
+    staging = staging_table_name(table_name)
+    is_change_set = CHANGE_COLUMN in columns
+    data_columns = [col for col in columns if col != CHANGE_COLUMN]
+    column_list = ', '.join(data_columns)
+    staging_hash = f"md5(ROW({', '.join('s.' + col for col in data_columns)})::text)"
+    live_hash = f"md5(ROW({', '.join('t.' + col for col in data_columns)})::text)"
+    live_rows = f"s.{CHANGE_COLUMN} <> 'DELETE'" if is_change_set else "TRUE"
+
+    # ON CONFLICT relies on the primary key / unique index on key_column
+    # created by create_keys_and_indexes on the last full load
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE TEMP TABLE {table_name}_delta ON COMMIT DROP AS
+            SELECT {', '.join('s.' + col for col in data_columns)}
+            FROM {staging} s
+            LEFT JOIN {table_name} t ON t.{key_column} = s.{key_column}
+            WHERE {live_rows}
+                AND (t.{key_column} IS NULL OR {staging_hash} <> {live_hash})
+        """)
+        # Old and new versions of every changed row, for cache invalidation
+        cursor.execute(f"""
+            CREATE TEMP TABLE {table_name}_changed ON COMMIT DROP AS
+            SELECT {column_list} FROM {table_name}_delta
+            UNION ALL
+            SELECT {', '.join('t.' + col for col in data_columns)}
+            FROM {table_name} t
+            JOIN {table_name}_delta d ON d.{key_column} = t.{key_column}
+        """)
+        cursor.execute(f"""
+            INSERT INTO {table_name} ({column_list})
+            SELECT {column_list} FROM {table_name}_delta
+            ON CONFLICT ({key_column}) DO UPDATE
+            SET {', '.join(f'{col} = EXCLUDED.{col}' for col in data_columns if col != key_column)}
+        """)
+        rows_upserted = cursor.rowcount
+
+        if is_change_set:
+            deleted = f"""
+                DELETE FROM {table_name} t
+                USING {staging} s
+                WHERE s.{key_column} = t.{key_column} AND s.{CHANGE_COLUMN} = 'DELETE'
+            """
+        else:
+            deleted = f"""
+                DELETE FROM {table_name} t
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {staging} s WHERE s.{key_column} = t.{key_column}
+                )
+            """
+        cursor.execute(f"""
+            WITH deleted AS ({deleted} RETURNING {', '.join('t.' + col for col in data_columns)})
+            INSERT INTO {table_name}_changed SELECT {column_list} FROM deleted
+        """)
+        rows_deleted = cursor.rowcount
+
+        clear_llm_content(cursor, table_name, f"{table_name}_changed")
+        if post_merge:
+            post_merge(cursor, table_name, f"{table_name}_changed")
+
+        cursor.execute(f"DROP TABLE {staging}")
+    connection.commit()
+    return rows_upserted, rows_deleted
+
+def load_csv(connection, csv_path, table_name, serial_id=False, workers=1, post_load=None,
+             incremental_key=None, post_swap=None, post_merge=None):
+    """
+    Replace or update table_name with the contents of csv_path.
+
+    The CSV is loaded into an unlogged staging table and its columns are
+    converted to the types declared in table_schemas. For a full load it is
+    then keyed, indexed, post-processed and swapped in, so the API never
+    sees a partially loaded table. For an incremental load only the
+    differences are applied to the live table.
+
+    Args:
+        connection: psycopg2 connection from get_db_connection
+        csv_path: CSV file with a header row
+        table_name: Table to (re)create and load
+        serial_id: Add a SERIAL id primary key column
+        workers: Number of parallel COPY processes; 1 loads serially
+        post_load: Optional callable(connection, staging_table) run before
+            the swap, e.g. to build indexes
+        incremental_key: Key column to merge on instead of replacing the
+            table. Ignored when the table does not exist yet.
+        post_swap: Optional callable(connection) run after a full load has
+            been swapped in, e.g. to rebuild derived tables
+        post_merge: Optional callable(cursor, table_name, changed_table) run
+            in an incremental merge's transaction, e.g. to update derived
+            tables; see merge_staging_table
+
+    Returns:
+        int: Number of rows inserted, updated or deleted
+    """
+    incremental = incremental_key is not None and table_exists(connection, table_name)
+    if incremental and source_unchanged(connection, table_name, csv_path):
+        print(f"{csv_path} has not changed since the last load of {table_name}; nothing to do.")
+        return 0
+
+    columns = read_csv_header(csv_path)
+    staging = staging_table_name(table_name)
+    create_table(connection, staging, columns, serial_id=serial_id, unlogged=True)
+
+    print(f"Loading {csv_path} into {staging} with {workers} worker(s)...")
+    if workers > 1:
+        rows = copy_csv_parallel(csv_path, staging, columns, workers)
+    else:
+        rows = copy_csv(connection, csv_path, staging, columns)
+
+    # Typed columns, so the staging rows hash the same way as the live ones
+    convert_column_types(connection, staging, table_name)
+
+    # A live table with other columns (e.g. one created by the API before
+    # the first import) can't be merged into; replace it instead
+    if incremental:
+        staging_columns = table_columns(connection, staging)
+        staging_columns.pop(CHANGE_COLUMN, None)
+        if staging_columns != table_columns(connection, table_name):
+            if CHANGE_COLUMN in columns:
+                raise ValueError(
+                    f"{table_name} columns differ from the change set {csv_path}; "
+                    f"load a full snapshot first"
+                )
+            print(f"{table_name} columns differ from {csv_path}; loading it in full instead.")
+            incremental = False
+
+    if incremental:
+        rows_upserted, rows_deleted = merge_staging_table(
+            connection, table_name, columns, incremental_key, post_merge=post_merge
+        )
+        print(f"Incremental import completed: {rows_upserted} rows inserted or updated, "
+              f"{rows_deleted} rows deleted.")
+    else:
+        create_keys_and_indexes(connection, staging, table_name)
+        if post_load:
+            post_load(connection, staging)
+        swap_in_staging_table(connection, table_name)
+        with connection.cursor() as cursor:
+            clear_llm_content(cursor, table_name)
+        connection.commit()
+        if post_swap:
+            post_swap(connection)
+        rows_upserted, rows_deleted = rows, 0
+        print(f"Data import completed successfully! Total rows imported: {rows}")
+
+    record_load_watermark(connection, table_name, csv_path, rows_upserted, rows_deleted)
+    return rows_upserted + rows_deleted
+
+def parse_import_args(description, incremental=False):
+    """Command line options shared by the import scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of parallel COPY processes (default: 1, serial)'
+    )
+    if incremental:
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Apply only changed rows to the existing table instead of replacing it'
+        )
+    return parser.parse_args()
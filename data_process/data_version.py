@@ -0,0 +1,119 @@
+import os
+
+# Tables whose columns are formatted into the LLM prompts, with the query
+# giving the properties affected by a set of changed rows ({changed} is a
+# table of the changed rows, old and new versions)
+CONTENT_SOURCE_DATASETS = {
+    "nz_valuation_roll": "SELECT unit_of_property_id FROM {changed}",
+    "nz_property_address_ref": "SELECT unit_of_property_id FROM {changed}",
+    "nz_addresses": """
+        SELECT r.unit_of_property_id
+        FROM {changed} c
+        JOIN nz_property_address_ref r ON r.address_id = c.address_id
+    """,
+}
+
+def clear_llm_content(cursor, dataset, changed_table=None):
+    """
+    Delete the back-end's cached LLM content generated from changed rows.
+
+    Runs in the caller's transaction. After a full load every entry is
+    removed; after an incremental merge only entries for the properties
+    whose rows changed, as listed in changed_table. Entries written before
+    the cache recorded their property are removed either way.
+
+    Args:
+        cursor: Cursor of the load's connection
+        dataset: Table that was loaded
+        changed_table: Table of the changed rows, or None after a full load
+    """
+    if dataset not in CONTENT_SOURCE_DATASETS:
+        return
+    cursor.execute("SELECT to_regclass('llm_content_cache')")
+    if cursor.fetchone()[0] is None:
+        return
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'llm_content_cache' AND column_name = 'unit_of_property_id'
+    """)
+    if changed_table is None or cursor.fetchone() is None:
+        cursor.execute("DELETE FROM llm_content_cache")
+    else:
+        changed_properties = CONTENT_SOURCE_DATASETS[dataset].format(changed=changed_table)
+        cursor.execute(f"""
+            DELETE FROM llm_content_cache
+            WHERE unit_of_property_id IS NULL
+                OR unit_of_property_id IN ({changed_properties})
+        """)
+    print(f"Cleared {cursor.rowcount} cached LLM content entries.")
+
+def increment_data_version(cursor, dataset):
+    """Bump the version of `dataset` in the caller's transaction and return it."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            dataset TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO data_versions (dataset, version)
+        VALUES (%s, 1)
+        ON CONFLICT (dataset) DO UPDATE
+        SET version = data_versions.version + 1, loaded_at = now()
+        RETURNING version
+    """, (dataset,))
+    return cursor.fetchone()[0]
+
+def bump_data_version(connection, dataset):
+    """Record a completed load of `dataset` in the data_versions table."""
+    with connection.cursor() as cursor:
+        version = increment_data_version(cursor, dataset)
+    connection.commit()
+    print(f"{dataset} is now at data version {version}.")
+    return version
+
+def _ensure_watermark_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS load_watermarks (
+            dataset TEXT PRIMARY KEY,
+            source_file TEXT NOT NULL,
+            source_size BIGINT NOT NULL,
+            source_mtime DOUBLE PRECISION NOT NULL,
+            rows_upserted BIGINT NOT NULL,
+            rows_deleted BIGINT NOT NULL,
+            loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+def source_unchanged(connection, dataset, csv_path):
+    """True if csv_path is the same file (size and mtime) as the last load of dataset."""
+    stat = os.stat(csv_path)
+    with connection.cursor() as cursor:
+        _ensure_watermark_table(cursor)
+        cursor.execute("""
+            SELECT source_file, source_size, source_mtime
+            FROM load_watermarks WHERE dataset = %s
+        """, (dataset,))
+        row = cursor.fetchone()
+    connection.commit()
+    return row == (os.path.abspath(csv_path), stat.st_size, stat.st_mtime)
+
+def record_load_watermark(connection, dataset, csv_path, rows_upserted, rows_deleted):
+    """Remember which source file dataset was last loaded from and what changed."""
+    stat = os.stat(csv_path)
+    with connection.cursor() as cursor:
+        _ensure_watermark_table(cursor)
+        cursor.execute("""
+            INSERT INTO load_watermarks
+                (dataset, source_file, source_size, source_mtime, rows_upserted, rows_deleted)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (dataset) DO UPDATE
+            SET source_file = EXCLUDED.source_file,
+                source_size = EXCLUDED.source_size,
+                source_mtime = EXCLUDED.source_mtime,
+                rows_upserted = EXCLUDED.rows_upserted,
+                rows_deleted = EXCLUDED.rows_deleted,
+                loaded_at = now()
+        """, (dataset, os.path.abspath(csv_path), stat.st_size, stat.st_mtime, rows_upserted, rows_deleted))
+    connection.commit()
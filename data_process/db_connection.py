@@ -1,15 +1,23 @@
+import os
+
 import psycopg2
 from psycopg2 import Error
 
+# Set to load a different database, e.g. a scratch one for benchmarks
+DATABASE_URL = os.getenv('DATABASE_URL')
+
 def get_db_connection():
     try:
-        connection = psycopg2.connect(
-            host="localhost",
-            port="5432",
-            database="postgres",
-            user="postgres",
-            password="123456"
-        )
+        if DATABASE_URL:
+            connection = psycopg2.connect(DATABASE_URL)
+        else:
+            connection = psycopg2.connect(
+                host="localhost",
+                port="5432",
+                database="postgres",
+                user="postgres",
+                password="123456"
+            )
         print("Successfully connected to PostgreSQL database!")
         return connection
     except (Exception, Error) as error:
@@ -0,0 +1,90 @@
+from db_connection import get_db_connection
+from bulk_loader import staging_table_name, swap_in_staging_table, table_exists
+from data_version import bump_data_version
+
+TABLE_NAME = 'market_stats'
+SOURCE_TABLE = 'property_search'
+
+# Marks a grouping column that was rolled up ("all suburbs", "all categories")
+ALL = '*'
+
+def _quantiles(column, alias):
+    return ",\n".join(
+        f"round(percentile_cont({fraction}) WITHIN GROUP (ORDER BY {column}))::bigint AS {alias}_{name}"
+        for name, fraction in [("p10", 0.1), ("p25", 0.25), ("median", 0.5), ("p75", 0.75), ("p90", 0.9)]
+    )
+
+# One row per territorial authority, suburb and property category, with the
+# suburb and/or category rolled up. property_search has a row per address,
+# so each property is counted once.
+MARKET_STATS_SQL = f"""
+    WITH properties AS (
+        SELECT DISTINCT ON (unit_of_property_id)
+            COALESCE(territorial_authority, '') AS territorial_authority,
+            COALESCE(suburb_locality, '') AS suburb_locality,
+            COALESCE(property_category, '') AS property_category,
+            capital_value, land_value, building_total_floor_area, no_of_bedrooms
+        FROM {SOURCE_TABLE}
+        ORDER BY unit_of_property_id, address_id
+    )
+    SELECT
+        territorial_authority,
+        CASE WHEN GROUPING(suburb_locality) = 1 THEN '{ALL}' ELSE suburb_locality END AS suburb_locality,
+        CASE WHEN GROUPING(property_category) = 1 THEN '{ALL}' ELSE property_category END AS property_category,
+        count(*) AS property_count,
+        {_quantiles("capital_value", "capital_value")},
+        {_quantiles("land_value", "land_value")},
+        round(percentile_cont(0.5) WITHIN GROUP (
+            ORDER BY capital_value::double precision / NULLIF(building_total_floor_area, 0)
+        ))::bigint AS value_per_sqm_median,
+        jsonb_build_object(
+            '0', count(*) FILTER (WHERE no_of_bedrooms = 0),
+            '1', count(*) FILTER (WHERE no_of_bedrooms = 1),
+            '2', count(*) FILTER (WHERE no_of_bedrooms = 2),
+            '3', count(*) FILTER (WHERE no_of_bedrooms = 3),
+            '4', count(*) FILTER (WHERE no_of_bedrooms = 4),
+            '5+', count(*) FILTER (WHERE no_of_bedrooms >= 5),
+            'unknown', count(*) FILTER (WHERE no_of_bedrooms IS NULL)
+        ) AS bedroom_distribution
+    FROM properties
+    GROUP BY GROUPING SETS (
+        (territorial_authority),
+        (territorial_authority, property_category),
+        (territorial_authority, suburb_locality),
+        (territorial_authority, suburb_locality, property_category)
+    )
+"""
+
+def build_market_stats(connection):
+    """
+    Rebuild the market_stats aggregate table from property_search.
+
+    Quantiles of capital and land value, median value per square metre of
+    floor area and the bedroom distribution are computed once at import
+    time; the API looks them up by primary key.
+    """
+    if not table_exists(connection, SOURCE_TABLE):
+        print(f"Skipping {TABLE_NAME} build; {SOURCE_TABLE} does not exist")
+        return
+
+    staging = staging_table_name(TABLE_NAME)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE UNLOGGED TABLE {staging} AS {MARKET_STATS_SQL}")
+        cursor.execute(f"""
+            ALTER TABLE {staging}
+            ADD PRIMARY KEY (territorial_authority, suburb_locality, property_category)
+        """)
+        cursor.execute(f"ANALYZE {staging}")
+    connection.commit()
+
+    swap_in_staging_table(connection, TABLE_NAME)
+    bump_data_version(connection, TABLE_NAME)
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    if conn:
+        try:
+            build_market_stats(conn)
+        finally:
+            conn.close()
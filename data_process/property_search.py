@@ -0,0 +1,164 @@
+from db_connection import get_db_connection
+from address_search import create_normalize_address_function
+from bulk_loader import staging_table_name, swap_in_staging_table, table_exists
+from data_version import CONTENT_SOURCE_DATASETS, bump_data_version, increment_data_version
+from spatial_index import create_location_index
+
+TABLE_NAME = 'property_search'
+SOURCE_TABLES = ['nz_valuation_roll', 'nz_property_address_ref', 'nz_addresses']
+
+# Exactly the columns the API's search returns, plus the normalized address
+# and the NZGD2000 coordinates (close enough to WGS84 for search). The
+# normalized address sorts bytewise ("C" collation), so addresses starting
+# with a search term are one range of its btree index.
+PROPERTY_SEARCH_SQL = """
+    SELECT
+        a.unit_of_property_id,
+        a.valuation_no_roll,
+        a.capital_value,
+        a.improvements_value,
+        a.land_value,
+        a.no_of_bedrooms,
+        a.improvements_description,
+        a.building_total_floor_area,
+        a.property_category,
+        a.actual_property_use,
+        a.legal_description,
+        c.address_id,
+        c.full_address,
+        c.town_city,
+        c.suburb_locality,
+        c.territorial_authority,
+        c.full_road_name,
+        c.address_number,
+        normalize_address(c.full_address) COLLATE "C" AS full_address_normalized,
+        c.gd2000_xcoord AS longitude,
+        c.gd2000_ycoord AS latitude
+    FROM nz_valuation_roll a
+    INNER JOIN nz_property_address_ref b ON a.unit_of_property_id = b.unit_of_property_id
+    INNER JOIN nz_addresses c ON b.address_id = c.address_id
+"""
+
+def build_property_search(connection):
+    """
+    Rebuild the denormalized property_search table the API reads from.
+
+    The join is materialized into a staging table, indexed, and swapped in,
+    so searches keep using the previous copy until the new one is complete.
+    """
+    missing = [table for table in SOURCE_TABLES if not table_exists(connection, table)]
+    if missing:
+        print(f"Skipping {TABLE_NAME} build; missing tables: {', '.join(missing)}")
+        return
+
+    create_normalize_address_function(connection)
+    staging = staging_table_name(TABLE_NAME)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(f"CREATE UNLOGGED TABLE {staging} AS {PROPERTY_SEARCH_SQL}")
+        cursor.execute(f"""
+            CREATE INDEX {staging}_property_address_idx
+            ON {staging} (unit_of_property_id, address_id)
+        """)
+        cursor.execute(f"""
+            CREATE INDEX {staging}_address_id_idx ON {staging} (address_id)
+        """)
+        # Exact lookups for /properties/batch
+        cursor.execute(f"""
+            CREATE INDEX {staging}_valuation_no_roll_idx ON {staging} (valuation_no_roll)
+        """)
+        # Also the page order of /properties/search, so keyset pages and
+        # the prefix tier are index range scans
+        cursor.execute(f"""
+            CREATE INDEX {staging}_full_address_normalized_idx
+            ON {staging} (full_address_normalized, unit_of_property_id, address_id)
+        """)
+        # Comparables load one territorial authority and category at a time
+        cursor.execute(f"""
+            CREATE INDEX {staging}_authority_category_idx
+            ON {staging} (territorial_authority, property_category)
+        """)
+        cursor.execute(f"""
+            CREATE INDEX {staging}_full_address_trgm_idx
+            ON {staging} USING gin (full_address_normalized gin_trgm_ops)
+        """)
+        # A finer histogram of addresses, which the planner samples to
+        # estimate how many rows contain a search term: rare terms are
+        # fetched through the trigram index and sorted, common ones by
+        # walking the address index until the page is full
+        cursor.execute(f"""
+            ALTER TABLE {staging} ALTER COLUMN full_address_normalized SET STATISTICS 1000
+        """)
+        cursor.execute(f"ANALYZE {staging}")
+    connection.commit()
+    create_location_index(connection, staging)
+
+    swap_in_staging_table(connection, TABLE_NAME)
+    bump_data_version(connection, TABLE_NAME)
+
+def update_property_search(cursor, dataset, changed_table):
+    """
+    Apply an incremental merge of one of the source tables to property_search.
+
+    Runs in the merge's transaction, as load_csv's post_merge. The rows of
+    the properties affected by the changed rows (the same properties whose
+    cached LLM content is cleared) are rebuilt from the source tables; only
+    rows that differ are deleted or inserted, and the data version is
+    bumped only if any were.
+
+    Args:
+        cursor: Cursor of the merge's connection
+        dataset: Source table that was merged
+        changed_table: Table of the changed rows, old and new versions
+    """
+    cursor.execute("SELECT to_regclass(%s)", (TABLE_NAME,))
+    if cursor.fetchone()[0] is None:
+        print(f"Skipping {TABLE_NAME} update; it has not been built yet")
+        return
+
+    affected = CONTENT_SOURCE_DATASETS[dataset].format(changed=changed_table)
+    cursor.execute(f"""
+        CREATE TEMP TABLE {TABLE_NAME}_affected ON COMMIT DROP AS
+        SELECT DISTINCT unit_of_property_id FROM ({affected}) properties
+    """)
+    cursor.execute(f"""
+        CREATE TEMP TABLE {TABLE_NAME}_rebuilt ON COMMIT DROP AS
+        {PROPERTY_SEARCH_SQL}
+        WHERE a.unit_of_property_id IN (SELECT unit_of_property_id FROM {TABLE_NAME}_affected)
+    """)
+    cursor.execute(f"CREATE INDEX ON {TABLE_NAME}_rebuilt (unit_of_property_id)")
+
+    # Both tables come from PROPERTY_SEARCH_SQL, so their columns line up
+    cursor.execute(f"""
+        DELETE FROM {TABLE_NAME} t
+        WHERE t.unit_of_property_id IN (SELECT unit_of_property_id FROM {TABLE_NAME}_affected)
+            AND NOT EXISTS (
+                SELECT 1 FROM {TABLE_NAME}_rebuilt r
+                WHERE r.unit_of_property_id = t.unit_of_property_id
+                    AND ROW(r.*) IS NOT DISTINCT FROM ROW(t.*)
+            )
+    """)
+    rows_deleted = cursor.rowcount
+    cursor.execute(f"""
+        INSERT INTO {TABLE_NAME}
+        SELECT r.* FROM {TABLE_NAME}_rebuilt r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {TABLE_NAME} t
+            WHERE t.unit_of_property_id = r.unit_of_property_id
+                AND ROW(t.*) IS NOT DISTINCT FROM ROW(r.*)
+        )
+    """)
+    rows_inserted = cursor.rowcount
+
+    print(f"Updated {TABLE_NAME}: {rows_inserted} rows inserted, {rows_deleted} rows deleted.")
+    if rows_inserted or rows_deleted:
+        version = increment_data_version(cursor, TABLE_NAME)
+        print(f"{TABLE_NAME} is now at data version {version}.")
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    if conn:
+        try:
+            build_property_search(conn)
+        finally:
+            conn.close()
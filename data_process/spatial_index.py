@@ -0,0 +1,39 @@
+import psycopg2
+
+# Geography point for a row of property_search. The back-end's PostGIS
+# queries use the same expression so the planner can match the index.
+LOCATION_EXPRESSION = "(ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography)"
+
+def postgis_available(connection):
+    """Enable PostGIS if the server has it installed."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+        connection.commit()
+        return True
+    except psycopg2.Error as error:
+        connection.rollback()
+        print(f"PostGIS is not available ({str(error).strip()}).")
+        return False
+
+def create_location_index(connection, table_name):
+    """
+    Build a GiST index over the coordinates of table_name for radius and
+    nearest-neighbour queries. Without PostGIS no index is built and the
+    back-end answers those queries from an in-memory grid instead.
+
+    Returns:
+        bool: Whether the index was created
+    """
+    if not postgis_available(connection):
+        print(f"Skipping the spatial index on {table_name}; the API will use its in-memory grid.")
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE INDEX {table_name}_location_idx
+            ON {table_name} USING gist ({LOCATION_EXPRESSION})
+        """)
+    connection.commit()
+    print(f"Spatial index created on {table_name}.")
+    return True
@@ -0,0 +1,124 @@
+# Column types for the imported tables, from the LINZ data dictionaries in
+# this folder. The CSVs are loaded as TEXT and converted after the load;
+# columns not listed here stay TEXT.
+
+# How each declared type is cast from the cleaned text value
+CASTS = {
+    "INTEGER": "round({value}::numeric)::integer",
+    "BIGINT": "round({value}::numeric)::bigint",
+    "DOUBLE PRECISION": "{value}::double precision",
+    # DVR dates are DDMMYYYY integers, so leading zeros may have been lost
+    "DATE": "to_date(lpad({value}, 8, '0'), 'DDMMYYYY')",
+}
+
+COLUMN_TYPES = {
+    "nz_valuation_roll": {
+        "valuation_no_roll": "INTEGER",
+        "valuation_no_assessment": "BIGINT",
+        "district_ta_code": "INTEGER",
+        "land_area": "DOUBLE PRECISION",
+        "ownership_code": "INTEGER",
+        "current_effective_valuation_date": "DATE",
+        "capital_value": "BIGINT",
+        "improvements_value": "BIGINT",
+        "land_value": "BIGINT",
+        "trees": "INTEGER",
+        "annual_value": "BIGINT",
+        "annual_value_indicator": "INTEGER",
+        "gross_rental": "BIGINT",
+        "no_of_bedrooms": "INTEGER",
+        "units_of_use": "INTEGER",
+        "off_street_parking": "INTEGER",
+        "building_site_coverage": "INTEGER",
+        "building_total_floor_area": "INTEGER",
+        "mass_total_living_area": "INTEGER",
+        "mass_garage_freestanding": "INTEGER",
+        "mass_garage_under_main_roof": "INTEGER",
+        "production": "INTEGER",
+        "sales_group": "INTEGER",
+    },
+    "nz_addresses": {
+        "address_id": "BIGINT",
+        "address_number": "INTEGER",
+        "address_number_high": "INTEGER",
+        "water_route_name_id": "BIGINT",
+        "road_section_id": "BIGINT",
+        "gd2000_xcoord": "DOUBLE PRECISION",
+        "gd2000_ycoord": "DOUBLE PRECISION",
+    },
+    "nz_property_address_ref": {
+        "id": "BIGINT",
+        "address_id": "BIGINT",
+    },
+    "nz_properties": {
+        "id": "BIGINT",
+    },
+}
+
+# Keys and join indexes created once the data is loaded
+PRIMARY_KEYS = {
+    "nz_valuation_roll": "unit_of_property_id",
+    "nz_property_address_ref": "id",
+    "nz_properties": "id",
+}
+
+UNIQUE_INDEXES = {
+    "nz_addresses": ["address_id"],
+}
+
+INDEXES = {
+    "nz_property_address_ref": ["unit_of_property_id", "address_id"],
+    "nz_properties": ["unit_of_property_id"],
+}
+
+def _existing_columns(cursor, table_name):
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = %s
+    """, (table_name,))
+    return {row[0] for row in cursor.fetchall()}
+
+def convert_column_types(connection, table_name, dataset):
+    """
+    Convert the TEXT columns of a freshly loaded table to their declared types.
+
+    Empty strings and the 'nan' strings left by the old pandas importers are
+    treated as NULL. All columns are converted in a single table rewrite.
+
+    Args:
+        connection: psycopg2 connection
+        table_name: Table to convert (usually the staging table)
+        dataset: Name of the live table whose declared types apply
+    """
+    column_types = COLUMN_TYPES.get(dataset)
+    if not column_types:
+        return
+
+    with connection.cursor() as cursor:
+        existing = _existing_columns(cursor, table_name)
+        alterations = []
+        for column, column_type in column_types.items():
+            if column not in existing:
+                continue
+            value = f"NULLIF(NULLIF(btrim({column}::text), ''), 'nan')"
+            using = CASTS[column_type].format(value=value)
+            alterations.append(f"ALTER COLUMN {column} TYPE {column_type} USING {using}")
+
+        if alterations:
+            cursor.execute(f"ALTER TABLE {table_name} {', '.join(alterations)}")
+    connection.commit()
+    print(f"Converted {len(alterations)} columns of {table_name} to typed columns.")
+
+def create_keys_and_indexes(connection, table_name, dataset):
+    """Add the primary key and join indexes declared for dataset to table_name."""
+    with connection.cursor() as cursor:
+        primary_key = PRIMARY_KEYS.get(dataset)
+        if primary_key:
+            cursor.execute(f"ALTER TABLE {table_name} ADD PRIMARY KEY ({primary_key})")
+        for column in UNIQUE_INDEXES.get(dataset, []):
+            cursor.execute(f"CREATE UNIQUE INDEX {table_name}_{column}_key ON {table_name} ({column})")
+        for column in INDEXES.get(dataset, []):
+            cursor.execute(f"CREATE INDEX {table_name}_{column}_idx ON {table_name} ({column})")
+        cursor.execute(f"ANALYZE {table_name}")
+    connection.commit()
+    print(f"Created keys and indexes on {table_name}.")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The import scripts import each other by name, as when run from data_process
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
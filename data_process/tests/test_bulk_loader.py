@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from bulk_loader import split_csv
+
+HEADER = b"unit_of_property_id,full_address\n"
+
+
+def write_csv(tmp_path, rows, trailing_newline=True):
+    path = tmp_path / "data.csv"
+    data = b"\n".join(rows) + (b"\n" if trailing_newline else b"")
+    path.write_bytes(HEADER + data)
+    return str(path), data
+
+
+def check_shards(path, data, shards):
+    with open(path, "rb") as f:
+        content = f.read()
+    # Contiguous, non-empty, covering exactly the data rows
+    assert shards[0][0] == len(HEADER)
+    assert shards[-1][1] == len(content)
+    for (_, end), (start, _) in zip(shards, shards[1:]):
+        assert end == start
+    assert all(start < end for start, end in shards)
+    assert b"".join(content[start:end] for start, end in shards) == data
+    # Every boundary falls at the start of a line
+    for start, _ in shards:
+        assert content[start - 1:start] == b"\n"
+
+
+@pytest.mark.parametrize("shards", [1, 2, 3, 7, 16])
+def test_shards_split_at_line_starts(tmp_path, shards):
+    rows = [f"{i:06d},{i} Yaldhurst Road, Sockburn".encode("utf-8") for i in range(1000)]
+    path, data = write_csv(tmp_path, rows)
+    result = split_csv(path, shards)
+    assert len(result) == shards
+    check_shards(path, data, result)
+
+
+def test_more_shards_than_rows(tmp_path):
+    path, data = write_csv(tmp_path, [b"1,a", b"2,b", b"3,c"])
+    result = split_csv(path, 50)
+    assert len(result) <= 3
+    check_shards(path, data, result)
+
+
+def test_row_longer_than_a_shard(tmp_path):
+    rows = [b"1,short", b"2," + b"x" * 10000, b"3,short", b"4,short"]
+    path, data = write_csv(tmp_path, rows)
+    result = split_csv(path, 8)
+    check_shards(path, data, result)
+    # The long row lies within one shard
+    long_start = len(HEADER) + data.find(rows[1])
+    long_end = long_start + len(rows[1])
+    assert any(start <= long_start and long_end <= end for start, end in result)
+
+
+def test_no_trailing_newline(tmp_path):
+    rows = [f"{i},row {i}".encode("utf-8") for i in range(100)]
+    path, data = write_csv(tmp_path, rows, trailing_newline=False)
+    result = split_csv(path, 4)
+    check_shards(path, data, result)
+
+
+def test_multibyte_characters(tmp_path):
+    rows = [f"{i},{i} Māngere Road, Ōtāhuhu".encode("utf-8") for i in range(200)]
+    path, data = write_csv(tmp_path, rows)
+    result = split_csv(path, 6)
+    check_shards(path, data, result)
+    for start, end in result:
+        with open(path, "rb") as f:
+            f.seek(start)
+            f.read(end - start).decode("utf-8")
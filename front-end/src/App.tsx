@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useCallback, useEffect, useState } from 'react';
 import { BrowserRouter as Router, Route, Routes } from 'react-router-dom';
 import NavBar from './components/NavBar';
 import About from './components/About';
@@ -22,23 +22,28 @@ interface ValuationResult {
     territorial_authority: string;
   };
   valuation: {
-    capital_value: string;
-    land_value: string;
-    improvements_value: string;
+    capital_value: number | null;
+    land_value: number | null;
+    improvements_value: number | null;
     improvements_description: string;
-    building_total_floor_area: string;
+    building_total_floor_area: number | null;
     property_category: string;
     unit_of_property_id: string;
-    valuation_no_roll: string;
-    no_of_bedrooms: string;
+    valuation_no_roll: number | null;
+    no_of_bedrooms: number | null;
     actual_property_use: string;
   };
-  AI_content: {
+  AI_content?: {
     property_description: string;
     client_letter: string;
   };
 }
 
+interface AddressSuggestion {
+  address_id: number;
+  full_address: string;
+}
+
 interface ReportOptions {
   salesMethod: string;
   advertisement: string;
@@ -57,11 +62,47 @@ const MainContent: React.FC = () => {
   const [error, setError] = useState<string | null>(null);
   const [valuationResult, setValuationResult] = useState<ValuationResult | null>(null);
   const [showReportModal, setShowReportModal] = useState(false);
+  const [suggestions, setSuggestions] = useState<AddressSuggestion[]>([]);
+
+  // Fetch address suggestions as the user types, debounced
+  useEffect(() => {
+    if (formData.address.trim().length < 3) {
+      setSuggestions([]);
+      return;
+    }
+
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ q: formData.address, limit: '8' });
+        const response = await fetch(
+          `http://localhost:8000/addresses/autocomplete?${params}`,
+          { signal: controller.signal }
+        );
+        if (response.ok) {
+          setSuggestions(await response.json());
+        }
+      } catch (err) {
+        // Aborted by a newer keystroke, or the suggestion service is unavailable
+      }
+    }, 150);
+
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [formData.address]);
 
   const handleInputChange = (field: string, value: string) => {
     setFormData(prev => ({ ...prev, [field]: value }));
   };
 
+  // AI content is streamed by ValuationReport, only for the property the user
+  // opens; the finished sections are kept for the report download
+  const handleAIContent = useCallback((aiContent: { property_description: string; client_letter: string }) => {
+    setValuationResult(prev => (prev ? { ...prev, AI_content: aiContent } : prev));
+  }, []);
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     setError(null);
@@ -124,7 +165,14 @@ const MainContent: React.FC = () => {
                 onChange={(e) => handleInputChange('address', e.target.value)}
                 required
                 placeholder="Enter property address"
+                list="address-suggestions"
+                autoComplete="off"
               />
+              <datalist id="address-suggestions">
+                {suggestions.map((suggestion) => (
+                  <option key={suggestion.address_id} value={suggestion.full_address} />
+                ))}
+              </datalist>
             </div>
             <div className="form-group">
               <label htmlFor="propertyType">Property Type</label>
@@ -188,6 +236,7 @@ const MainContent: React.FC = () => {
           <ValuationReport 
             valuationResult={valuationResult}
             onGenerateReport={() => setShowReportModal(true)}
+            onAIContent={handleAIContent}
           />
 
           {showReportModal && (
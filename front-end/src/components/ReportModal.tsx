@@ -9,23 +9,23 @@ interface ReportOptions {
 
 interface ValuationResult {
   address: {
-    address_id: string;
+    address_id: number;
     full_address: string;
     town_city: string;
     suburb_locality: string;
     territorial_authority: string;
   };
   valuation: {
-    capital_value: string;
-    improvements_value: string;
-    land_value: string;
-    building_total_floor_area: string;
+    capital_value: number | null;
+    improvements_value: number | null;
+    land_value: number | null;
+    building_total_floor_area: number | null;
     improvements_description: string;
     property_category: string;
     unit_of_property_id: string;
-    valuation_no_roll: string;
+    valuation_no_roll: number | null;
   };
-  AI_content: {
+  AI_content?: {
     property_description: string;
     client_letter: string;
   };
@@ -63,8 +63,8 @@ const ReportModal: React.FC<ReportModalProps> = ({ onClose, valuationResult }) =
     }
   };
 
-  const formatCurrency = (value: string) => {
-    return `$${parseInt(value).toLocaleString()}`;
+  const formatCurrency = (value: number | null) => {
+    return `$${(value ?? 0).toLocaleString()}`;
   };
 
   const generatePDF = () => {
@@ -141,12 +141,12 @@ const ReportModal: React.FC<ReportModalProps> = ({ onClose, valuationResult }) =
     
     // Property Description
     addText('Property Description:', 14, [0, 0, 0], true);
-    const propertyDesc = doc.splitTextToSize(valuationResult.AI_content.property_description, contentWidth);
+    const propertyDesc = doc.splitTextToSize(valuationResult.AI_content?.property_description ?? '', contentWidth);
     addText(propertyDesc, 12, [0, 0, 0]);
 
     // Client Letter
     addText('Client Letter:', 14, [0, 0, 0], true);
-    const clientLetter = doc.splitTextToSize(valuationResult.AI_content.client_letter, contentWidth);
+    const clientLetter = doc.splitTextToSize(valuationResult.AI_content?.client_letter ?? '', contentWidth);
     addText(clientLetter, 12, [0, 0, 0]);
 
     // Additional Information
@@ -341,7 +341,7 @@ const ReportModal: React.FC<ReportModalProps> = ({ onClose, valuationResult }) =
 
               <h3>Property Details</h3>
               <p><strong>Address:</strong> {valuationResult.address.full_address}</p>
-              <p><strong>Estimated Value:</strong> ${parseInt(valuationResult.valuation.capital_value).toLocaleString()}</p>
+              <p><strong>Estimated Value:</strong> {formatCurrency(valuationResult.valuation.capital_value)}</p>
             </div>
             <div className="modal-actions">
               <button onClick={() => setShowPreview(false)} className="secondary-button">
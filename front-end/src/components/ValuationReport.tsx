@@ -1,10 +1,10 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { FaHome, FaDollarSign, FaInfoCircle, FaChartLine, FaMapMarkerAlt, FaRulerCombined } from 'react-icons/fa';
 import './ValuationReport.css';
 
 interface ValuationResult {
   address: {
-    address_id: string;
+    address_id: number;
     full_address: string;
     town_city: string;
     suburb_locality: string;
@@ -12,31 +12,81 @@ interface ValuationResult {
   };
   valuation: {
     unit_of_property_id: string;
-    valuation_no_roll: string;
-    capital_value: string;
-    improvements_value: string;
-    land_value: string;
-    no_of_bedrooms: string;
+    valuation_no_roll: number | null;
+    capital_value: number | null;
+    improvements_value: number | null;
+    land_value: number | null;
+    no_of_bedrooms: number | null;
     improvements_description: string;
-    building_total_floor_area: string;
+    building_total_floor_area: number | null;
     property_category: string;
     actual_property_use: string;
     legal_description: string;
   };
-  AI_content: {
-    property_description: string;
-    client_letter: string;
-  };
+  AI_content?: AIContent;
+}
+
+interface AIContent {
+  property_description: string;
+  client_letter: string;
 }
 
+type AISection = keyof AIContent;
+
 interface ValuationReportProps {
   valuationResult: ValuationResult;
   onGenerateReport: () => void;
+  onAIContent: (content: AIContent) => void;
 }
 
-const ValuationReport: React.FC<ValuationReportProps> = ({ valuationResult, onGenerateReport }) => {
-  const formatCurrency = (value: string) => {
-    return parseInt(value).toLocaleString('en-NZ', {
+const ValuationReport: React.FC<ValuationReportProps> = ({ valuationResult, onGenerateReport, onAIContent }) => {
+  const [streamedContent, setStreamedContent] = useState<AIContent>({
+    property_description: '',
+    client_letter: '',
+  });
+  const [aiError, setAiError] = useState<string | null>(null);
+  const unitOfPropertyId = valuationResult.valuation.unit_of_property_id;
+
+  // Stream the AI sections as they are generated, so text appears from the
+  // first token instead of after the whole letter is written
+  useEffect(() => {
+    setStreamedContent({ property_description: '', client_letter: '' });
+    setAiError(null);
+
+    const completed: Partial<AIContent> = {};
+    const source = new EventSource(
+      `http://localhost:8000/properties/${encodeURIComponent(unitOfPropertyId)}/ai-content/stream`
+    );
+
+    source.addEventListener('delta', (event) => {
+      const { section, text } = JSON.parse((event as MessageEvent).data);
+      setStreamedContent(prev => ({ ...prev, [section]: prev[section as AISection] + text }));
+    });
+    source.addEventListener('section_complete', (event) => {
+      const { section, content } = JSON.parse((event as MessageEvent).data);
+      completed[section as AISection] = content;
+      setStreamedContent(prev => ({ ...prev, [section]: content }));
+    });
+    source.addEventListener('section_error', () => {
+      setAiError('Failed to generate AI analysis');
+    });
+    source.addEventListener('done', () => {
+      source.close();
+      if (completed.property_description !== undefined && completed.client_letter !== undefined) {
+        onAIContent(completed as AIContent);
+      }
+    });
+    // EventSource reconnects on its own; a fresh generation isn't wanted
+    source.onerror = () => {
+      source.close();
+      setAiError('Failed to generate AI analysis');
+    };
+
+    return () => source.close();
+  }, [unitOfPropertyId, onAIContent]);
+
+  const formatCurrency = (value: number | null) => {
+    return (value ?? 0).toLocaleString('en-NZ', {
       style: 'currency',
       currency: 'NZD',
       minimumFractionDigits: 0,
@@ -44,16 +94,16 @@ const ValuationReport: React.FC<ValuationReportProps> = ({ valuationResult, onGe
     });
   };
 
-  const getPropertySizeCategory = (size: string) => {
-    const area = parseInt(size);
+  const getPropertySizeCategory = (size: number | null) => {
+    const area = size ?? 0;
     if (area < 120) return 'compact';
     if (area < 200) return 'medium-sized';
     return 'spacious';
   };
 
   const getLandValuePercentage = () => {
-    const landValue = parseInt(valuationResult.valuation.land_value);
-    const totalValue = parseInt(valuationResult.valuation.capital_value);
+    const landValue = valuationResult.valuation.land_value ?? 0;
+    const totalValue = valuationResult.valuation.capital_value ?? 0;
     return Math.round((landValue / totalValue) * 100);
   };
 
@@ -90,7 +140,7 @@ const ValuationReport: React.FC<ValuationReportProps> = ({ valuationResult, onGe
               <div>
                 <label>Property Specifications</label>
                 <p>Building Area: {valuationResult.valuation.building_total_floor_area} m²</p>
-                {valuationResult.valuation.no_of_bedrooms && valuationResult.valuation.no_of_bedrooms !== 'nan' && (
+                {valuationResult.valuation.no_of_bedrooms != null && (
                   <p>Bedrooms: {valuationResult.valuation.no_of_bedrooms}</p>
                 )}
                 <p>Category: {valuationResult.valuation.property_category}</p>
@@ -159,12 +209,27 @@ const ValuationReport: React.FC<ValuationReportProps> = ({ valuationResult, onGe
                 <li>Land value: {getLandValuePercentage()}% of total value</li>
               </ul>
             </div>
+            <div className="ai-analysis">
+              <h5>Property Description</h5>
+              <p>{streamedContent.property_description || 'Generating...'}</p>
+              <h5>Client Letter</h5>
+              <p>{streamedContent.client_letter || 'Generating...'}</p>
+            </div>
+            {aiError && (
+              <div className="error-message">
+                <p>{aiError}</p>
+              </div>
+            )}
           </div>
         </div>
       </div>
 
-      <button className="generate-report-button" onClick={onGenerateReport}>
-        Download Comprehensive Report
+      <button
+        className="generate-report-button"
+        onClick={onGenerateReport}
+        disabled={!valuationResult.AI_content}
+      >
+        {valuationResult.AI_content ? 'Download Comprehensive Report' : 'Preparing AI Analysis...'}
       </button>
     </div>
   );